@@ -0,0 +1,131 @@
+"""
+middleware.py
+
+Compression of Datastar Server-Sent Event responses
+"""
+import zlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used without it
+    brotli = None
+
+
+SSE_CONTENT_TYPE = "text/event-stream"
+# it's not worth compressing really short responses, such as a single patched signal
+SSE_MIN_COMPRESS_LENGTH = 200
+GZIP_LEVEL = 6
+# brotli quality 5 compresses a page of event cards to about half the size of gzip 9, and close to quality 11 at a fraction of the cost
+BROTLI_QUALITY = 5
+
+
+def get_accepted_encodings(accept_encoding: str) -> set[str]:
+    """
+    Get the content codings an Accept-Encoding header allows, leaving out the ones with q=0.
+    """
+
+    encodings = set()
+    for part in accept_encoding.split(","):
+        coding, *params = [token.strip() for token in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.replace(" ", "").startswith("q="):
+                try:
+                    quality = float(param.split("=", 1)[1])
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            encodings.add(coding.lower())
+    return encodings
+
+
+def get_sse_encoding(accept_encoding: str) -> str | None:
+    """
+    Negotiate the encoding of an SSE response, preferring brotli when it is installed.
+
+    :param accept_encoding: Accept-Encoding request header
+    :return: "br", "gzip", or None if the response should not be compressed
+    """
+
+    accepted = get_accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class SSECompressor:
+    """
+    Incremental brotli or gzip compressor that flushes after every chunk,
+    so each Server-Sent Event can be decoded by the browser as soon as it arrives.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(chunk) + self.compressor.flush()
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+class SSECompressionMiddleware(MiddlewareMixin):
+    """
+    Compress text/event-stream responses with brotli or gzip when the browser allows it.
+    Buffered responses are compressed as a whole, while streamed responses are compressed and flushed event by
+    event. Other responses are left to the rest of the stack.
+    """
+
+    def process_response(self, request, response):
+        if not response.get("Content-Type", "").startswith(SSE_CONTENT_TYPE):
+            return response
+        if not response.streaming and len(response.content) < SSE_MIN_COMPRESS_LENGTH:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = get_sse_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        compressor = SSECompressor(encoding)
+        if response.streaming:
+            # pull to lexical scope in case streaming_content is set again later
+            original_iterator = response.streaming_content
+            if response.is_async:
+                async def compress_stream():
+                    async for chunk in original_iterator:
+                        yield compressor.compress(chunk)
+                    yield compressor.finish()
+            else:
+                def compress_stream():
+                    for chunk in original_iterator:
+                        yield compressor.compress(chunk)
+                    yield compressor.finish()
+
+            response.streaming_content = compress_stream()
+            # the compressed size is not known until the stream ends
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = compressor.compress(response.content) + compressor.finish()
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -57,6 +57,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'WeVolunteer.middleware.SSECompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -158,15 +159,44 @@ WSGI_APPLICATION = 'WeVolunteer.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Persistent connections are kept per thread. ASGI runs every request's database work in its own thread, so asgi.py
+# sets DATABASE_CONN_MAX_AGE to 0 to close each connection at the end of its request instead of keeping one per thread.
 DB_DEFAULT = dj_database_url.config(
     default= os.environ.get("DATABASE_URL"),
-    conn_max_age=600
+    conn_max_age=int(os.getenv("DATABASE_CONN_MAX_AGE", "600"))
 )
 DATABASES = {
     "default": DB_DEFAULT,
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Defaults to a per process memory cache. Set CACHE_BACKEND and CACHE_LOCATION to share the cache between processes,
+# e.g. django.core.cache.backends.redis.RedisCache and redis://127.0.0.1:6379
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "wevolunteer"),
+    }
+}
+
+
+# Live event updates
+# Live updates are only streamed under ASGI. Every open stream holds a LISTEN database connection for as long as the
+# page is open, so the number of streams each worker process accepts is capped.
+LIVE_UPDATES_MAX_CONNECTIONS = int(os.getenv("LIVE_UPDATES_MAX_CONNECTIONS", "20"))
+# seconds between heartbeats, which keep proxies from timing out idle streams and detect closed pages
+LIVE_UPDATES_HEARTBEAT_SECONDS = float(os.getenv("LIVE_UPDATES_HEARTBEAT_SECONDS", "15"))
+# a stream that falls further behind than this many changed events asks its page to reload instead of catching up
+LIVE_UPDATES_MAX_PENDING = int(os.getenv("LIVE_UPDATES_MAX_PENDING", "100"))
+
+
+# Deterministic "load more" SSE responses may be cached by shared caches such as a CDN for this many seconds.
+# Only responses to requests without a session cookie are marked public. 0 disables shared caching.
+SSE_SHARED_CACHE_SECONDS = int(os.getenv("SSE_SHARED_CACHE_SECONDS", "0"))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 LANGUAGE_CODE = 'en-us'
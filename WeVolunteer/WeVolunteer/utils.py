@@ -3,9 +3,20 @@ utils.py
 
 Various utility functions
 """
+from asgiref.sync import sync_to_async
 from datastar_py.consts import ElementPatchMode
 from datastar_py.sse import ServerSentEventGenerator
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+
+def is_asgi_request(request) -> bool:
+    """
+    Check if a request is served by an ASGI server, which can stream async iterators without holding a thread.
+    """
+    return isinstance(request, ASGIRequest)
 
 
 def respond_via_sse(
@@ -43,6 +54,44 @@ def respond_via_sse(
     return response
 
 
+def stream_respond_via_sse(patches, signals=None, url=None, asynchronous: bool = False) -> StreamingHttpResponse:
+    """
+    Respond to a request with a streamed Server-Sent Event (SSE) response, sending each element patch as soon as
+    it is rendered instead of buffering the whole response.
+    The signals are sent first, so the browser can update its state before the elements arrive.
+
+    :param patches: Iterable of (html, selector, patch_mode) tuples, consumed lazily while the response is sent
+    :param signals: Optional dictionary of signals to patch
+    :param url: Optional URL for saving URL state
+    :param asynchronous: Stream with an async iterator that renders each patch in a thread, for requests served by
+        ASGI (see is_asgi_request). Django buffers a sync iterator under ASGI and an async one under WSGI,
+        so the iterator has to match the server
+    :return: A StreamingHttpResponse that yields one SSE per patch
+    """
+
+    def stream():
+        if signals:
+            yield ServerSentEventGenerator.patch_signals(signals)
+        for html, selector, patch_mode in patches:
+            yield ServerSentEventGenerator.patch_elements(html, selector=selector, mode=patch_mode)
+        if url:
+            yield ServerSentEventGenerator.execute_script('window.history.replaceState({}, "", "' + url + '")')
+
+    async def astream():
+        # next() renders the patch, which may query the database, so it runs in the thread sensitive sync thread
+        sync_stream = stream()
+        while (event := await sync_to_async(next)(sync_stream, None)) is not None:
+            yield event
+
+    response = StreamingHttpResponse(astream() if asynchronous else stream())
+    response["Content-Type"] = "text/event-stream"
+    response["Cache-Control"] = "no-cache"
+    # stop proxies such as nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+
+    return response
+
+
 def patch_signals_respond_via_sse(signals) -> HttpResponse:
     """
     Respond to a request with a Server-Sent Event (SSE) response by only patching Datastar signals.
@@ -73,4 +122,26 @@ def remove_respond_via_sse(selector) -> HttpResponse:
     response["Content-Type"] = "text/event-stream"
     response["Cache-Control"] = "no-cache"
     # response["Connection"] = "keep-alive"
-    return response
\ No newline at end of file
+    return response
+
+
+def allow_shared_caching(response, request, seconds: int | None = None):
+    """
+    Opt an SSE response that is deterministic for its request URL, which carries the Datastar signals, in to being
+    stored by shared caches such as a CDN for a short time.
+    Only responses to requests without a session cookie are marked public, since logged in users see more details,
+    and the response varies on Cookie so shared caches never serve them to logged in users.
+
+    :param response: The SSE response
+    :param request: The request the response answers
+    :param seconds: Optional shared cache TTL in seconds, defaults to settings.SSE_SHARED_CACHE_SECONDS
+    :return: The response
+    """
+    seconds = settings.SSE_SHARED_CACHE_SECONDS if seconds is None else seconds
+    if not seconds or settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return response
+
+    # browsers always revalidate, only shared caches keep the response
+    response["Cache-Control"] = f"public, max-age=0, s-maxage={seconds}"
+    patch_vary_headers(response, ("Cookie",))
+    return response
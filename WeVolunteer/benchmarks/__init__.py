@@ -0,0 +1,17 @@
+"""
+Performance benchmarks.
+
+Each benchmark module exposes add_arguments(parser) and run(options, stdout),
+and is run against a throwaway, seeded database with
+    python manage.py benchmark <name>
+"""
+from benchmarks import event_cards, event_indexes, recurrence, search, sse_concurrency, views
+
+BENCHMARKS = {
+    "event_cards": event_cards,
+    "event_indexes": event_indexes,
+    "recurrence": recurrence,
+    "search": search,
+    "sse_concurrency": sse_concurrency,
+    "views": views,
+}
@@ -0,0 +1,100 @@
+"""
+event_cards.py
+
+Benchmark rendering the event cards of a 500 card page, without the event card fragment cache.
+
+The events are built in memory with a mix of tags, so no database is needed. The benchmark times the tag badges
+rendered with the per-tag label filters, the badges rendered with the event_badges tag, and the whole event-card
+partial, which is what a page of cards costs when none of its cards are cached.
+"""
+import datetime
+import random
+
+from django.contrib.auth.models import AnonymousUser
+from django.template import engines
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from benchmarks.harness import format_summary, summarize, time_calls
+from core.cache import EVENT_CARD_TEMPLATE
+from core.models import Event, EventDescriptors, EventLocationDescriptors, Organization, get_time_of_day_mask
+
+
+# the tag badges as the event card rendered them before the event_badges tag
+FILTER_BADGES_TEMPLATE = """{% load enum_tags %}{% for event in events %}
+{% if event.event_descriptor_tags %}
+    {% for tag in event.event_descriptor_tags %}
+        <span class="badge rounded-pill bg-wv-yellow text-black fs-6 fw-light py-2 px-3 my-1 me-1">{{ tag|event_descriptor_label }}</span>
+    {% endfor %}
+{% endif %}
+{% for tag in event.time_of_day %}
+    <span class="badge rounded-pill bg-wv-pink text-black fs-6 fw-light py-2 px-3 my-1 me-1">{{ tag|time_of_day_label }}</span>
+{% endfor %}
+{% if event.location_descriptor_tags %}
+    {% for tag in event.location_descriptor_tags %}
+        <span class="badge rounded-pill bg-wv-green text-black fs-6 fw-light py-2 px-3 my-1 me-1">{{ tag|event_location_descriptor_label }}</span>
+    {% endfor %}
+{% endif %}
+{% endfor %}"""
+
+EVENT_BADGES_TEMPLATE = """{% load enum_tags %}{% for event in events %}
+{% event_badges event %}
+{% endfor %}"""
+
+
+def add_arguments(parser):
+    """
+    Add the benchmark command line arguments.
+    """
+
+    parser.add_argument("--cards", type=int, default=500, help="Number of event cards on the page")
+    parser.add_argument("--iterations", type=int, default=20, help="Number of timed runs per operation")
+
+
+def build_events(count: int) -> list[Event]:
+    """
+    Build unsaved events with up to four event descriptor tags, up to two location descriptor tags,
+    and start and end times spread over the day.
+    """
+
+    randomizer = random.Random(0)
+    organization = Organization(id=1, name="Benchmark Organization")
+    events = []
+    for i in range(count):
+        start_time = datetime.time(randomizer.randrange(6, 20), randomizer.choice([0, 30]))
+        end_time = datetime.time(min(start_time.hour + randomizer.randrange(1, 5), 23), start_time.minute)
+        events.append(Event(
+            id=i + 1,
+            title=f"Benchmark Event {i}",
+            organization=organization,
+            date=datetime.date.today(),
+            start_time=start_time,
+            end_time=end_time,
+            time_of_day_mask=get_time_of_day_mask(start_time, end_time),
+            event_descriptor_tags=randomizer.sample(EventDescriptors.values, randomizer.randrange(5)),
+            location_descriptor_tags=randomizer.sample(EventLocationDescriptors.values, randomizer.randrange(3)),
+            description="Benchmark event description",
+        ))
+    return events
+
+
+def run(options, stdout):
+    """
+    Time rendering the tag badges and the event cards of a page of events.
+    """
+
+    events = build_events(options["cards"])
+    request = RequestFactory().get("/events")
+    request.user = AnonymousUser()
+    filter_badges = engines["django"].from_string(FILTER_BADGES_TEMPLATE)
+    event_badges = engines["django"].from_string(EVENT_BADGES_TEMPLATE)
+    event_card = get_template(EVENT_CARD_TEMPLATE)
+
+    operations = {
+        f"badges of {len(events)} cards, with the label filters": lambda: filter_badges.render({"events": events}),
+        f"badges of {len(events)} cards, with the event_badges tag": lambda: event_badges.render({"events": events}),
+        f"{len(events)} event cards": lambda: [event_card.render({"event": event, "request": request}) for event in events],
+    }
+    for description, operation in operations.items():
+        stdout.write(f"\n--- {description}")
+        stdout.write(format_summary(summarize(time_calls(operation, options["iterations"]))))
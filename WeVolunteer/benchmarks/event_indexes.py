@@ -0,0 +1,116 @@
+"""
+event_indexes.py
+
+Benchmark the Event access paths used by the views, with and without the indexes added in
+core.migrations.0012_event_indexes.
+
+The "before" phase runs inside a transaction that drops the Event Meta.indexes and restores the plain
+foreign key indexes the table had before, then rolls back. Both phases print the EXPLAIN ANALYZE plan and
+latency percentiles for every access path.
+"""
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+
+from benchmarks.harness import analyze, benchmark_database, format_summary, summarize, time_calls
+from benchmarks.seed import seed
+from core.models import Event, Organization
+from core.views import get_events_by_month_and_year, get_next_month_events
+
+
+def add_arguments(parser):
+    """
+    Add the benchmark command line arguments.
+    """
+
+    parser.add_argument("--events", type=int, default=1_000_000, help="Number of events to seed")
+    parser.add_argument("--organizations", type=int, default=1_000, help="Number of organizations to seed")
+    parser.add_argument("--contacts", type=int, default=3, help="Number of contacts to seed per organization")
+    parser.add_argument("--years", type=int, default=5, help="Number of years the events are spread over")
+    parser.add_argument("--iterations", type=int, default=50, help="Number of timed runs per access path")
+    parser.add_argument("--keepdb", action="store_true", help="Keep the seeded benchmark database for the next run")
+
+
+def get_access_paths() -> dict:
+    """
+    Get the querysets for each Event access path used by the views, keyed by a description.
+    """
+
+    today = datetime.date.today()
+    organization = Organization.objects.order_by("id").first()
+    contact_id = Event.objects.filter(primary_contact__isnull=False).values_list("primary_contact", flat=True).first()
+
+    return {
+        "month feed (date__month/date__year)": Event.objects.filter(
+            date__month=today.month, date__year=today.year
+        ).select_related("organization", "primary_contact").order_by("date", "start_time", "title"),
+        "month feed (half-open date range)": get_events_by_month_and_year(today),
+        "organization upcoming events": Event.objects.filter(organization=organization, date__gte=today),
+        "organization past events page": Event.objects.filter(
+            organization=organization, date__lt=today
+        ).order_by("-date", "start_time", "title")[:3],
+        "primary contact event count": Event.objects.filter(primary_contact_id=contact_id).values("id"),
+    }
+
+
+def time_queryset(queryset, iterations: int) -> list[float]:
+    """
+    Time the raw SQL of a queryset, excluding ORM model instantiation.
+    """
+
+    sql, params = queryset.query.sql_with_params()
+
+    def execute():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            cursor.fetchall()
+
+    return time_calls(execute, iterations)
+
+
+def run_phase(name: str, iterations: int, stdout):
+    """
+    Print the plan and latency of every access path, plus the next month lookup, under the current schema.
+    """
+
+    stdout.write(f"\n===== {name} =====")
+    for description, queryset in get_access_paths().items():
+        stdout.write(f"\n--- {description}")
+        stdout.write(queryset.explain(analyze=True, buffers=True))
+        stdout.write(format_summary(summarize(time_queryset(queryset, iterations))))
+
+    cursor_date = datetime.date.today().replace(day=1) + relativedelta(months=+3)
+    stdout.write("\n--- next month with events (get_next_month_events)")
+    stdout.write(format_summary(summarize(time_calls(lambda: get_next_month_events(cursor_date), iterations))))
+
+
+def run(options, stdout):
+    """
+    Seed the benchmark database and run both phases.
+    """
+
+    with benchmark_database(keepdb=options["keepdb"]):
+        stdout.write(f"Seeding {options['events']} events for {options['organizations']} organizations...")
+        start_date = datetime.date.today() - relativedelta(years=options["years"] // 2)
+        seed(
+            organizations=options["organizations"],
+            contacts_per_organization=options["contacts"],
+            events=options["events"],
+            start_date=start_date,
+            days=365 * options["years"],
+        )
+        analyze()
+
+        table = Event._meta.db_table
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in Event._meta.indexes:
+                    cursor.execute(f'DROP INDEX "{index.name}"')
+                cursor.execute(f'CREATE INDEX "benchmark_event_organization_id" ON "{table}" ("organization_id")')
+                cursor.execute(f'CREATE INDEX "benchmark_event_primary_contact_id" ON "{table}" ("primary_contact_id")')
+                cursor.execute(f'ANALYZE "{table}"')
+            run_phase("before: foreign key indexes only", options["iterations"], stdout)
+            transaction.set_rollback(True)
+
+        run_phase("after: event access path indexes", options["iterations"], stdout)
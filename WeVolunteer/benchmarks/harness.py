@@ -0,0 +1,101 @@
+"""
+harness.py
+
+Shared helpers for running benchmarks against a throwaway database
+"""
+import contextlib
+import math
+import time
+
+from django.db import connection
+
+
+@contextlib.contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Context manager.
+    Create and migrate a dedicated benchmark database and point the default connection at it.
+    The database is destroyed on exit unless keepdb is set, which lets repeated runs reuse seeded data.
+
+    :param keepdb: keep the benchmark database around after the benchmark finishes
+    """
+
+    test_settings = connection.settings_dict["TEST"]
+    original_test_name = test_settings.get("NAME")
+    original_name = connection.settings_dict["NAME"]
+    test_settings["NAME"] = f"benchmark_{original_name}"
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(original_name, verbosity=0, keepdb=keepdb)
+        test_settings["NAME"] = original_test_name
+
+
+def time_calls(fn, iterations: int, warmup: int = 3) -> list[float]:
+    """
+    Call the given function repeatedly and time each call.
+
+    :param fn: function to call with no arguments
+    :param iterations: number of timed calls
+    :param warmup: number of untimed calls made first to warm caches
+    :return: list of call durations in milliseconds
+    """
+
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Get the nearest-rank percentile of a list of samples.
+
+    :param samples: list of samples
+    :param pct: percentile between 0 and 100
+    :return: the sample at the given percentile
+    """
+
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Summarize a list of millisecond timings as latency percentiles.
+
+    :param samples: list of samples in milliseconds
+    :return: dictionary with p50, p95, p99 and max keys
+    """
+
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def format_summary(summary: dict[str, float]) -> str:
+    """
+    Format a latency summary created by summarize for printing.
+    """
+
+    return "  ".join(f"{key}={value:.2f}ms" for key, value in summary.items())
+
+
+def analyze():
+    """
+    Refresh the Postgres planner statistics after seeding so EXPLAIN plans reflect the seeded volumes.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
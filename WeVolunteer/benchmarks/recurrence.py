@@ -0,0 +1,124 @@
+"""
+recurrence.py
+
+Benchmark the lazy expansion of recurring events added in core.recurrence.
+
+Every seeded event becomes the first occurrence of a series, mostly weekly with a mix of daily and monthly rules,
+and the benchmark times expanding and counting their occurrences over a year long window, both in memory and
+with the queries that load the series. The target is under 100ms for a year of 10k series.
+Occurrences only become Event instances once they are displayed, which costs about as much per event as loading
+stored events, so that is timed for the series of one organization. Expanding a whole year of them misses the target
+(a p50 of 115-120ms for the 100 series of one organization), so its details page only lists the next
+ORGANIZATION_OCCURRENCES_PER_SERIES occurrences of each series and counts the rest, which takes about 21ms.
+"""
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.db.models import Q
+
+from benchmarks.harness import analyze, benchmark_database, format_summary, summarize, time_calls
+from benchmarks.seed import seed
+from core.models import Event, EventRecurrence, Organization, RecurrenceFrequency
+from core.recurrence import (
+    SERIES_RULE_FIELDS,
+    count_occurrences,
+    count_occurrences_by_organization,
+    get_next_occurrence_date,
+    get_occurrence_ordinals,
+    get_occurrences,
+    get_series_queryset,
+)
+from core.views import ORGANIZATION_OCCURRENCES_PER_SERIES
+
+
+def add_arguments(parser):
+    """
+    Add the benchmark command line arguments.
+    """
+
+    parser.add_argument("--series", type=int, default=10_000, help="Number of recurring event series to seed")
+    parser.add_argument("--organizations", type=int, default=100, help="Number of organizations to seed")
+    parser.add_argument("--iterations", type=int, default=20, help="Number of timed runs per operation")
+    parser.add_argument("--keepdb", action="store_true", help="Keep the seeded benchmark database for the next run")
+
+
+def seed_recurrences():
+    """
+    Attach a recurrence rule to every seeded event. Does nothing if rules already exist.
+    One in ten series is daily, one in ten monthly, and the rest weekly, some on several weekdays,
+    and one in five series ends within the next year.
+    """
+
+    if EventRecurrence.objects.exists():
+        return
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {EventRecurrence._meta.db_table} (event_id, frequency, interval, weekdays, until)
+            SELECT
+                id,
+                CASE WHEN id %% 10 = 0 THEN %(daily)s WHEN id %% 10 = 1 THEN %(monthly)s ELSE %(weekly)s END,
+                1 + id %% 2,
+                -- Monday, Wednesday, and Friday
+                CASE WHEN id %% 3 = 0 THEN 21 ELSE 0 END,
+                CASE WHEN id %% 5 = 0 THEN current_date + (id %% 365)::int END
+            FROM {Event._meta.db_table}
+            """,
+            {
+                "daily": RecurrenceFrequency.DAILY.value,
+                "monthly": RecurrenceFrequency.MONTHLY.value,
+                "weekly": RecurrenceFrequency.WEEKLY.value,
+            },
+        )
+
+
+def run(options, stdout):
+    """
+    Seed the benchmark database and time the expansion of a year of occurrences.
+    """
+
+    with benchmark_database(keepdb=options["keepdb"]):
+        stdout.write(f"Seeding {options['series']} recurring event series for {options['organizations']} organizations...")
+        today = datetime.date.today()
+        seed(
+            organizations=options["organizations"],
+            contacts_per_organization=1,
+            events=options["series"],
+            start_date=today - relativedelta(years=1),
+            days=365,
+        )
+        seed_recurrences()
+        analyze()
+
+        start = today.replace(day=1)
+        end = start + relativedelta(years=1)
+        rules = list(get_series_queryset(start, end).values_list("id", *SERIES_RULE_FIELDS))
+        start_ordinal, end_ordinal = start.toordinal(), end.toordinal()
+
+        def expand_rules():
+            return [get_occurrence_ordinals(*rule, start_ordinal, end_ordinal) for event_id, *rule in rules]
+
+        organization_id = Organization.objects.order_by("id").values_list("id", flat=True).first()
+        occurrence_count = sum(count_occurrences(rules, {}, start, end).values())
+        stdout.write(f"{len(rules)} series with {occurrence_count} occurrences from {start} to {end}")
+
+        operations = {
+            "expand a year of occurrence dates, in memory": expand_rules,
+            "count a year of occurrences, in memory": lambda: count_occurrences(rules, {}, start, end),
+            "load the rules and count a year of occurrences": lambda: count_occurrences(
+                list(get_series_queryset(start, end).values_list("id", *SERIES_RULE_FIELDS)), {}, start, end
+            ),
+            "find the next occurrence within a year": lambda: get_next_occurrence_date(today, end),
+            "load and expand a year of one organization's occurrences": lambda: get_occurrences(
+                start, end, Q(organization_id=organization_id)
+            ),
+            "load and expand one organization's next occurrences and count the rest, like its details page": lambda: (
+                get_occurrences(start, end, Q(organization_id=organization_id), limit=ORGANIZATION_OCCURRENCES_PER_SERIES),
+                count_occurrences_by_organization([organization_id], start),
+            ),
+        }
+        for description, operation in operations.items():
+            stdout.write(f"\n--- {description}")
+            stdout.write(format_summary(summarize(time_calls(operation, options["iterations"]))))
@@ -0,0 +1,61 @@
+"""
+search.py
+
+Benchmark the full text search over Events and Organizations added in core.migrations.0015_search_vectors.
+
+Prints the EXPLAIN ANALYZE plan and latency percentiles for a selective search, a search matching about one in
+twenty events, and an organization search. The target is under 50ms at 1M events.
+Upcoming event searches only rank the soonest core.search.SEARCH_EVENT_CANDIDATES matches, so their cost
+should stay flat as the number of matching events grows.
+"""
+import datetime
+
+from dateutil.relativedelta import relativedelta
+
+from benchmarks.harness import analyze, benchmark_database, format_summary, summarize, time_calls
+from benchmarks.seed import seed
+from core.models import Event
+from core.search import search_events, search_organizations
+
+
+def add_arguments(parser):
+    """
+    Add the benchmark command line arguments.
+    """
+
+    parser.add_argument("--events", type=int, default=1_000_000, help="Number of events to seed")
+    parser.add_argument("--organizations", type=int, default=1_000, help="Number of organizations to seed")
+    parser.add_argument("--years", type=int, default=5, help="Number of years the events are spread over")
+    parser.add_argument("--iterations", type=int, default=50, help="Number of timed runs per search")
+    parser.add_argument("--keepdb", action="store_true", help="Keep the seeded benchmark database for the next run")
+
+
+def run(options, stdout):
+    """
+    Seed the benchmark database and time each search.
+    """
+
+    with benchmark_database(keepdb=options["keepdb"]):
+        stdout.write(f"Seeding {options['events']} events for {options['organizations']} organizations...")
+        start_date = datetime.date.today() - relativedelta(years=options["years"] // 2)
+        seed(
+            organizations=options["organizations"],
+            contacts_per_organization=1,
+            events=options["events"],
+            start_date=start_date,
+            days=365 * options["years"],
+        )
+        analyze()
+
+        # titles are "Benchmark Event <i>", so the number of an upcoming event matches only that event
+        upcoming_title = Event.objects.filter(date__gte=datetime.date.today() + relativedelta(days=1)).values_list("title", flat=True).first()
+        searches = {
+            "events: one matching event": (search_events, upcoming_title.rsplit(" ", 1)[-1]),
+            "events: one in twenty events": (search_events, "painting"),
+            "events: phrase within one in twenty events": (search_events, '"help with painting" -moving'),
+            "organizations: one matching organization": (search_organizations, str(options["organizations"] - 1)),
+        }
+        for description, (search, text) in searches.items():
+            stdout.write(f"\n--- {description} ({text!r})")
+            stdout.write(f"{len(search(text))} results")
+            stdout.write(format_summary(summarize(time_calls(lambda: search(text), options["iterations"]))))
@@ -0,0 +1,219 @@
+"""
+sse_concurrency.py
+
+Benchmark the concurrent throughput of the "load more" Datastar SSE endpoints under gunicorn sync workers (WSGI)
+and under uvicorn workers (ASGI).
+
+Both servers are started against the seeded benchmark database with the same number of worker processes, and
+a pool of client threads requests the next month of filtered events and the next page of an organization's past
+events for a fixed duration. Prints the throughput, latency percentiles, and error count of each server.
+Requires gunicorn and uvicorn to be installed; a server that is not installed is skipped.
+"""
+import datetime
+import http.client
+import importlib.util
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from benchmarks.harness import analyze, benchmark_database, format_summary, summarize
+from benchmarks.seed import seed
+from core.cursors import encode_month_cursor
+from core.models import Organization
+from core.views import get_past_events_page
+
+
+SERVERS = {
+    "gunicorn-sync": (
+        "gunicorn",
+        lambda workers, port: [
+            sys.executable, "-m", "gunicorn", "WeVolunteer.wsgi:application",
+            "--worker-class", "sync", "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+        ],
+    ),
+    "uvicorn-asgi": (
+        "uvicorn",
+        lambda workers, port: [
+            sys.executable, "-m", "uvicorn", "WeVolunteer.asgi:application",
+            "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port), "--no-access-log",
+        ],
+    ),
+}
+
+
+def add_arguments(parser):
+    """
+    Add the benchmark command line arguments.
+    """
+
+    parser.add_argument("--events", type=int, default=100_000, help="Number of events to seed")
+    parser.add_argument("--organizations", type=int, default=1_000, help="Number of organizations to seed")
+    parser.add_argument("--years", type=int, default=5, help="Number of years the events are spread over")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker processes per server")
+    parser.add_argument("--concurrency", type=int, default=64, help="Number of concurrent client connections")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to send requests to each server")
+    parser.add_argument("--port", type=int, default=8765, help="Port the servers listen on")
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS), help="Servers to benchmark")
+    parser.add_argument("--keepdb", action="store_true", help="Keep the seeded benchmark database for the next run")
+
+
+def get_database_url() -> str:
+    """
+    Get a DATABASE_URL for the benchmark database the default connection points at, for the server processes.
+    """
+
+    settings_dict = connection.settings_dict
+    user = quote(settings_dict["USER"] or "", safe="")
+    password = quote(settings_dict["PASSWORD"] or "", safe="")
+    credentials = f"{user}:{password}@" if password else f"{user}@" if user else ""
+    host = quote(settings_dict["HOST"] or "", safe="")
+    port = f":{settings_dict['PORT']}" if settings_dict["PORT"] else ""
+    return f"postgres://{credentials}{host}{port}/{settings_dict['NAME']}"
+
+
+def get_request_paths(organizations: int) -> list[str]:
+    """
+    Get the "load more" request paths sent by the clients: the next month of painting events from each of the
+    next twelve months, and the second page of past events of up to fifty organizations.
+    """
+
+    today = datetime.date.today()
+    paths = []
+    for i in range(12):
+        signals = {"next_month_cursor": encode_month_cursor(today + relativedelta(months=+i)), "filter_event_descriptors": ["PAINTING"]}
+        paths.append(f"{reverse('core:get-next-month-events')}?{urlencode({'datastar': json.dumps(signals)})}")
+
+    for organization_id in Organization.objects.order_by("id").values_list("id", flat=True)[:min(organizations, 50)]:
+        first_page, cursor = get_past_events_page(organization_id)
+        if cursor:
+            signals = {"past_events_cursor": cursor}
+            paths.append(f"{reverse('core:get-next-past-events', args=[organization_id])}?{urlencode({'datastar': json.dumps(signals)})}")
+    return paths
+
+
+def wait_for_server(port: int, process: subprocess.Popen, timeout: float = 30):
+    """
+    Wait until the server accepts connections.
+
+    :raises RuntimeError: if the server exits or does not start in time
+    """
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            client = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            client.request("GET", reverse("core:about"))
+            client.getresponse().read()
+            client.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+def run_clients(port: int, paths: list[str], concurrency: int, duration: float) -> tuple[list[float], int, float]:
+    """
+    Send requests from concurrent keep-alive client connections until the duration is up.
+    Requests in flight at the deadline are allowed to finish.
+
+    :return: tuple of the successful request latencies in milliseconds, the number of failed requests,
+        and the seconds taken until the last request finished
+    """
+
+    start_time = time.monotonic()
+    deadline = time.monotonic() + duration
+    path_cycle = itertools.cycle(paths)
+    lock = threading.Lock()
+    samples = []
+    errors = 0
+
+    def client_loop():
+        nonlocal errors
+        client = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.monotonic() < deadline:
+            with lock:
+                path = next(path_cycle)
+            start = time.perf_counter()
+            try:
+                client.request("GET", path)
+                response = client.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                client.close()
+                client = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    samples.append(elapsed)
+                else:
+                    errors += 1
+        client.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client_loop)
+    return samples, errors, time.monotonic() - start_time
+
+
+def run(options, stdout):
+    """
+    Seed the benchmark database, then start each server and measure its "load more" throughput.
+    """
+
+    with benchmark_database(keepdb=options["keepdb"]):
+        stdout.write(f"Seeding {options['events']} events for {options['organizations']} organizations...")
+        seed(
+            organizations=options["organizations"],
+            contacts_per_organization=1,
+            events=options["events"],
+            start_date=datetime.date.today() - relativedelta(years=options["years"] // 2),
+            days=365 * options["years"],
+        )
+        analyze()
+        paths = get_request_paths(options["organizations"])
+
+        environment = {
+            **os.environ,
+            "DATABASE_URL": get_database_url(),
+            "DEBUG": "False",
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1,localhost",
+        }
+        for name in options["servers"]:
+            module, command = SERVERS[name]
+            stdout.write(f"\n--- {name}: {options['workers']} workers, {options['concurrency']} connections, {options['duration']}s")
+            if importlib.util.find_spec(module) is None:
+                stdout.write(f"skipped, {module} is not installed")
+                continue
+
+            process = subprocess.Popen(
+                command(options["workers"], options["port"]),
+                cwd=settings.BASE_DIR,
+                env=environment,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_server(options["port"], process)
+                samples, errors, elapsed = run_clients(options["port"], paths, options["concurrency"], options["duration"])
+            finally:
+                process.terminate()
+                process.wait()
+
+            stdout.write(f"{len(samples) / elapsed:.1f} requests/s, {errors} errors")
+            if samples:
+                stdout.write(format_summary(summarize(samples)))
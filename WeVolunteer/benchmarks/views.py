@@ -0,0 +1,293 @@
+"""
+views.py
+
+Benchmark the latency, query count, and response size of every route in core/urls.py, for an anonymous visitor
+and for a logged in organization administrator.
+
+Each route is requested through the Django test client against the seeded benchmark database, so the numbers
+include the middleware, the templates, and the fragment cache, which is warm after the untimed warmup requests.
+Routes that only accept POST, like deleting an event, are posted inside a transaction that is rolled back,
+so every timed request changes the same data. The test client is a WSGI client, so the live updates route,
+which only streams under ASGI, measures its 204 response.
+
+The results are compared against a JSON baseline from an earlier run on the same machine, and the comparison
+flags routes that got slower, run more queries, respond with more bytes, or respond with another status code.
+Pass --save-baseline to write the results as the new baseline.
+"""
+import datetime
+import json
+from pathlib import Path
+from urllib.parse import urlencode
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from benchmarks.harness import analyze, benchmark_database, summarize, time_calls
+from benchmarks.seed import seed
+from core import urls
+from core.cursors import encode_month_cursor
+from core.models import Event, EventRecurrence, OrganizationAdministrator, OrganizationContact, RecurrenceFrequency
+from core.views import get_past_events_page
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "views_baseline.json"
+BENCHMARK_USERNAME = "benchmark_administrator"
+ANONYMOUS = "anonymous"
+ADMINISTRATOR = "administrator"
+
+
+def add_arguments(parser):
+    """
+    Add the benchmark command line arguments.
+    """
+
+    parser.add_argument("--organizations", type=int, default=1_000, help="Number of organizations to seed")
+    parser.add_argument("--contacts", type=int, default=3, help="Number of contacts to seed per organization")
+    parser.add_argument("--events", type=int, default=100_000, help="Number of events to seed")
+    parser.add_argument("--years", type=int, default=2, help="Number of years the events are spread over, half of them in the past")
+    parser.add_argument("--iterations", type=int, default=30, help="Number of timed requests per route")
+    parser.add_argument("--routes", nargs="+", help="Only benchmark these route names")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Path of the JSON baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="Fraction by which the p50 latency or response size may grow before it is flagged as a regression",
+    )
+    parser.add_argument(
+        "--min-slowdown", type=float, default=1.0,
+        help="Milliseconds by which the p50 latency must grow before it is flagged, so fast routes are not flagged for noise",
+    )
+    parser.add_argument("--keepdb", action="store_true", help="Keep the seeded benchmark database for the next run")
+
+
+def get_datastar_url(route: str, signals: dict, args: list | None = None) -> str:
+    return f"{reverse(f'core:{route}', args=args)}?{urlencode({'datastar': json.dumps(signals)})}"
+
+
+def get_view_requests(ids: dict) -> list[dict]:
+    """
+    Get the request of every route in core/urls.py.
+
+    :param ids: dictionary with the organization, contact, event, and recurring event ids, the date of an occurrence
+        of the recurring event, and the next month and past events cursors to request
+    :return: list of dictionaries with the route name, the request method, and the url
+    """
+
+    organization_id, contact_id, event_id = ids["organization"], ids["contact"], ids["event"]
+    recurring_event_id, occurrence_date = ids["recurring_event"], ids["occurrence_date"]
+    return [
+        {"route": "events", "method": "get", "url": reverse("core:events")},
+        {"route": "about", "method": "get", "url": reverse("core:about")},
+        {"route": "search", "method": "get", "url": f"{reverse('core:search')}?q=painting"},
+        {"route": "search-results", "method": "get", "url": get_datastar_url("search-results", {"search_query": "painting"})},
+        {"route": "filter-events", "method": "get", "url": get_datastar_url("filter-events", {"filter_event_descriptors": ["PAINTING"]})},
+        {
+            "route": "get-next-month-events",
+            "method": "get",
+            "url": get_datastar_url("get-next-month-events", {"next_month_cursor": ids["next_month_cursor"]}),
+        },
+        {"route": "event-live-updates", "method": "get", "url": reverse("core:event-live-updates")},
+        {"route": "event-feed", "method": "get", "url": reverse("core:event-feed")},
+        {"route": "event-details", "method": "get", "url": reverse("core:event-details", args=[event_id])},
+        {"route": "event-add", "method": "get", "url": reverse("core:event-add")},
+        {"route": "event-edit", "method": "get", "url": reverse("core:event-edit", args=[event_id])},
+        {"route": "event-delete", "method": "post", "url": reverse("core:event-delete", args=[event_id])},
+        {
+            "route": "event-occurrence-cancel",
+            "method": "post",
+            "url": reverse("core:event-occurrence-cancel", args=[recurring_event_id, occurrence_date]),
+        },
+        {
+            "route": "event-occurrence-edit",
+            "method": "post",
+            "url": reverse("core:event-occurrence-edit", args=[recurring_event_id, occurrence_date]),
+        },
+        {"route": "api-events", "method": "get", "url": reverse("core:api-events")},
+        {"route": "organizations", "method": "get", "url": reverse("core:organizations")},
+        {"route": "org-details", "method": "get", "url": reverse("core:org-details", args=[organization_id])},
+        {"route": "org-event-feed", "method": "get", "url": reverse("core:org-event-feed", args=[organization_id])},
+        {
+            "route": "get-next-past-events",
+            "method": "get",
+            "url": get_datastar_url("get-next-past-events", {"past_events_cursor": ids["past_events_cursor"]}, [organization_id]),
+        },
+        {"route": "org-edit", "method": "get", "url": reverse("core:org-edit", args=[organization_id])},
+        {"route": "org-contact-add", "method": "get", "url": reverse("core:org-contact-add")},
+        {"route": "org-contact-edit", "method": "get", "url": reverse("core:org-contact-edit", args=[contact_id])},
+        {"route": "org-contact-delete", "method": "post", "url": reverse("core:org-contact-delete", args=[contact_id])},
+    ]
+
+
+def get_route_names() -> set[str]:
+    return {pattern.name for pattern in urls.urlpatterns if pattern.name}
+
+
+def get_benchmark_ids() -> dict:
+    """
+    Pick the seeded rows the routes are requested with, and set up the administrator and recurring event they need.
+    The first organization with events is used, and its two next upcoming events are the event and the recurring
+    event, which repeats weekly.
+    """
+
+    today = datetime.date.today()
+    organization_id = Event.objects.values_list("organization_id", flat=True).order_by("organization_id").first()
+    user, created = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+    OrganizationAdministrator.objects.get_or_create(user=user, defaults={"organization_id": organization_id})
+
+    upcoming_events = Event.objects.filter(organization_id=organization_id, date__gte=today).order_by("date", "id")
+    event_id, recurring_event_id = upcoming_events.values_list("id", flat=True)[:2]
+    recurring_event = Event.objects.get(id=recurring_event_id)
+    EventRecurrence.objects.get_or_create(event=recurring_event, defaults={"frequency": RecurrenceFrequency.WEEKLY, "interval": 1})
+
+    past_events, past_events_cursor = get_past_events_page(organization_id)
+    return {
+        "user": user,
+        "organization": organization_id,
+        "contact": OrganizationContact.objects.filter(organization_id=organization_id).order_by("id").values_list("id", flat=True).first(),
+        "event": event_id,
+        "recurring_event": recurring_event_id,
+        "occurrence_date": (recurring_event.date + datetime.timedelta(weeks=1)).isoformat(),
+        "next_month_cursor": encode_month_cursor(today),
+        "past_events_cursor": past_events_cursor,
+    }
+
+
+def get_client_host() -> str:
+    for host in settings.ALLOWED_HOSTS:
+        return "localhost" if host == "*" else host.lstrip(".")
+    return "localhost"
+
+
+def send_request(client: Client, view_request: dict) -> tuple[int, int]:
+    """
+    Send a request and read its whole response.
+    POST requests are sent inside a transaction that is rolled back.
+
+    :return: tuple of the response status code and the number of response body bytes
+    """
+
+    if view_request["method"] == "post":
+        with transaction.atomic():
+            response = client.post(view_request["url"])
+            transaction.set_rollback(True)
+    else:
+        response = client.get(view_request["url"])
+
+    if not response.streaming:
+        return response.status_code, len(response.content)
+    try:
+        return response.status_code, sum(len(chunk) for chunk in response.streaming_content)
+    finally:
+        response.close()
+
+
+def measure(client: Client, view_request: dict, iterations: int) -> dict:
+    """
+    Measure the latency percentiles, query count, response size, and status code of a route.
+    """
+
+    with CaptureQueriesContext(connection) as queries:
+        status_code, size = send_request(client, view_request)
+    samples = time_calls(lambda: send_request(client, view_request), iterations)
+    return {**summarize(samples), "queries": len(queries), "bytes": size, "status": status_code}
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float, min_slowdown: float) -> list[str]:
+    """
+    Compare the results of a run against a baseline.
+
+    :param results: dictionary of "<route> (<variant>)" keys to measurements, as returned by measure
+    :param baseline: results of an earlier run
+    :param tolerance: fraction by which the p50 latency and the response size may grow
+    :param min_slowdown: milliseconds by which the p50 latency must grow to be flagged
+    :return: list of descriptions of the regressions
+    """
+
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        previous = baseline[key]
+        if result["status"] != previous["status"]:
+            regressions.append(f"{key}: status {previous['status']} -> {result['status']}")
+        if result["p50"] > previous["p50"] * (1 + tolerance) and result["p50"] - previous["p50"] >= min_slowdown:
+            regressions.append(f"{key}: p50 {previous['p50']:.2f}ms -> {result['p50']:.2f}ms")
+        if result["queries"] > previous["queries"]:
+            regressions.append(f"{key}: {previous['queries']} -> {result['queries']} queries")
+        if result["bytes"] > previous["bytes"] * (1 + tolerance):
+            regressions.append(f"{key}: {previous['bytes']} -> {result['bytes']} bytes")
+    return regressions
+
+
+def run(options, stdout):
+    """
+    Seed the benchmark database, measure every route, and compare the results against the baseline.
+
+    :raises CommandError: if a route is missing from the benchmark or regressed against the baseline
+    """
+
+    missing_routes = get_route_names() - {view_request["route"] for view_request in get_view_requests({
+        "organization": 1, "contact": 1, "event": 1, "recurring_event": 1, "occurrence_date": "2000-01-01",
+        "next_month_cursor": "", "past_events_cursor": "",
+    })}
+    if missing_routes:
+        raise CommandError(f"No benchmark request for the routes: {', '.join(sorted(missing_routes))}")
+
+    with benchmark_database(keepdb=options["keepdb"]):
+        stdout.write(
+            f"Seeding {options['events']} events for {options['organizations']} organizations "
+            f"with {options['contacts']} contacts each..."
+        )
+        today = datetime.date.today()
+        seed(
+            organizations=options["organizations"],
+            contacts_per_organization=options["contacts"],
+            events=options["events"],
+            start_date=today - relativedelta(months=options["years"] * 6),
+            days=options["years"] * 365,
+        )
+        ids = get_benchmark_ids()
+        analyze()
+
+        host = get_client_host()
+        anonymous_client = Client(HTTP_HOST=host)
+        administrator_client = Client(HTTP_HOST=host)
+        administrator_client.force_login(ids["user"])
+        clients = {ANONYMOUS: anonymous_client, ADMINISTRATOR: administrator_client}
+
+        results = {}
+        for view_request in get_view_requests(ids):
+            if options["routes"] and view_request["route"] not in options["routes"]:
+                continue
+            for variant, client in clients.items():
+                key = f"{view_request['route']} ({variant})"
+                result = results[key] = measure(client, view_request, options["iterations"])
+                stdout.write(
+                    f"{key:<42} status={result['status']}  p50={result['p50']:.2f}ms  p95={result['p95']:.2f}ms  "
+                    f"p99={result['p99']:.2f}ms  queries={result['queries']}  bytes={result['bytes']}"
+                )
+
+    seed_options = {name: options[name] for name in ("organizations", "contacts", "events", "years", "iterations")}
+    if options["save_baseline"]:
+        options["baseline"].write_text(json.dumps({"options": seed_options, "results": results}, indent=2) + "\n")
+        stdout.write(f"\nSaved the baseline to {options['baseline']}")
+        return
+
+    if not options["baseline"].exists():
+        stdout.write(f"\nNo baseline at {options['baseline']}, pass --save-baseline to save one")
+        return
+
+    baseline = json.loads(options["baseline"].read_text())
+    if baseline["options"] != seed_options:
+        stdout.write(f"\nThe baseline was measured with other options: {baseline['options']}")
+    regressions = find_regressions(results, baseline["results"], options["tolerance"], options["min_slowdown"])
+    if regressions:
+        stdout.write("\nRegressions against the baseline:\n" + "\n".join(regressions))
+        raise CommandError(f"{len(regressions)} regressions against the baseline")
+    stdout.write("\nNo regressions against the baseline")
@@ -1,8 +1,11 @@
 from django.contrib import admin
 
-from core.models import Organization, OrganizationContact, Event, OrganizationAdministrator
+from core.models import Organization, OrganizationContact, Event, OrganizationAdministrator, EventRecurrence, EventOccurrenceException, Location
 
 admin.site.register(Organization)
 admin.site.register(OrganizationContact)
 admin.site.register(Event)
 admin.site.register(OrganizationAdministrator)
+admin.site.register(EventRecurrence)
+admin.site.register(EventOccurrenceException)
+admin.site.register(Location)
@@ -0,0 +1,285 @@
+"""
+api.py
+
+Read-only JSON API of events for partner sites.
+Events are loaded as values() rows of only the requested fields, so unrequested columns and joins are skipped,
+and are paginated with keyset cursors in the (date, start_time, title, id) order of every event list.
+The occurrences of recurring events are expanded up to the recurrence horizon and merged into each page.
+"""
+import datetime
+from itertools import islice
+
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cursors import decode_event_cursor, encode_event_sort_key_cursor
+from core.filters import event_facets, event_filters_q
+from core.models import Event, time_of_day_mask_enum_lists
+from core.recurrence import (
+    get_occurrence_values,
+    get_occurrences,
+    get_recurrence_horizon,
+    merge_occurrence_values,
+    values_sort_key,
+)
+
+
+API_EVENTS_DEFAULT_LIMIT = 50
+API_EVENTS_MAX_LIMIT = 200
+EVENT_SORT_FIELDS = ['date', 'start_time', 'title', 'id']
+
+
+def get_times_of_day(time_of_day_mask: int) -> list[str]:
+    return [time_of_day.value for time_of_day in time_of_day_mask_enum_lists[time_of_day_mask]]
+
+
+# field name: (values() lookup, nested object or None, requires authentication, conversion function or None)
+# the address and primary contact are only shown to logged in users, like on the event cards
+event_api_fields = {
+    "id": ("id", None, False, None),
+    "title": ("title", None, False, None),
+    "date": ("date", None, False, None),
+    "start_time": ("start_time", None, False, None),
+    "end_time": ("end_time", None, False, None),
+    "address": ("address", None, True, None),
+    "description": ("description", None, False, None),
+    "event_descriptors": ("event_descriptor_tags", None, False, None),
+    "location_descriptors": ("location_descriptor_tags", None, False, None),
+    "times_of_day": ("time_of_day_mask", None, False, get_times_of_day),
+    "updated_at": ("updated_at", None, False, None),
+    "organization.id": ("organization_id", "organization", False, None),
+    "organization.name": ("organization__name", "organization", False, None),
+    "organization.website": ("organization__website", "organization", False, None),
+    "primary_contact.name": ("primary_contact__name", "primary_contact", True, None),
+    "primary_contact.email": ("primary_contact__email", "primary_contact", True, None),
+    "primary_contact.phone": ("primary_contact__phone", "primary_contact", True, None),
+    "primary_contact.notes": ("primary_contact__notes", "primary_contact", True, None),
+}
+NESTED_OBJECTS = {nested for lookup, nested, requires_authentication, convert in event_api_fields.values() if nested}
+
+
+class ApiError(ValueError):
+    """
+    Invalid API request, with the HTTP status code to respond with.
+    """
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_api_fields(fields_param: str | None, is_authenticated: bool) -> list[str]:
+    """
+    Get the field names selected by a fields query parameter.
+    A nested object name such as "organization" selects all of its fields.
+
+    :param fields_param: comma separated field names, or None for every field the viewer may see
+    :param is_authenticated: whether the viewer is logged in
+    :return: list of field names in event_api_fields order
+    :raises ApiError: if a field does not exist, or requires authentication and the viewer is not logged in
+    """
+
+    if not fields_param:
+        return [
+            name for name, (lookup, nested, requires_authentication, convert) in event_api_fields.items()
+            if is_authenticated or not requires_authentication
+        ]
+
+    selected = set()
+    for requested in fields_param.split(","):
+        requested = requested.strip()
+        names = [name for name in event_api_fields if name == requested or name.startswith(f"{requested}.")]
+        if not names:
+            raise ApiError(f"Unknown field '{requested}'.")
+        if not is_authenticated and any(event_api_fields[name][2] for name in names):
+            raise ApiError(f"Field '{requested}' requires authentication.", status=403)
+        selected.update(names)
+    return [name for name in event_api_fields if name in selected]
+
+
+def parse_date(value: str | None, param: str) -> datetime.date | None:
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError as e:
+        raise ApiError(f"Invalid {param} date, expected YYYY-MM-DD.") from e
+
+
+def get_api_date_range(params) -> tuple[datetime.date, datetime.date | None]:
+    """
+    Get the first and last dates of the events in API query parameters, which default to upcoming events.
+
+    :param params: request QueryDict
+    :return: tuple of the start date and the optional end date, inclusive
+    :raises ApiError: if a date is invalid
+    """
+
+    return parse_date(params.get("start"), "start") or timezone.now().date(), parse_date(params.get("end"), "end")
+
+
+def get_api_event_q(params) -> Q:
+    """
+    Get a Q object for the filters in API query parameters other than the date range, so it also matches
+    recurring events whose series started before the range.
+    The organization filter accepts several ids, and the facet filters take comma separated values,
+    matched like the facet filters of the events page.
+
+    :param params: request QueryDict
+    :raises ApiError: if a filter value is invalid
+    """
+
+    q = Q()
+    organization_ids = params.getlist("organization")
+    if organization_ids:
+        if not all(organization_id.isdigit() for organization_id in organization_ids):
+            raise ApiError("Invalid organization id.")
+        q &= Q(organization_id__in=[int(organization_id) for organization_id in organization_ids])
+
+    filters = {}
+    for facet, (heading, signal, enum, field, color) in event_facets.items():
+        values = [value for value in params.get(facet, "").split(",") if value]
+        if any(value not in enum.values for value in values):
+            raise ApiError(f"Invalid {facet} value, expected some of {', '.join(enum.values)}.")
+        if values:
+            filters[facet] = sorted(set(values))
+    return q & event_filters_q(filters)
+
+
+def get_api_limit(value: str | None) -> int:
+    if value is None:
+        return API_EVENTS_DEFAULT_LIMIT
+    if not value.isdigit() or not 1 <= int(value) <= API_EVENTS_MAX_LIMIT:
+        raise ApiError(f"Invalid limit, expected 1 to {API_EVENTS_MAX_LIMIT}.")
+    return int(value)
+
+
+def get_api_events_queryset(q: Q, lookups: list[str], limit: int, after: tuple | None = None):
+    """
+    Get a values() queryset of one page of events, with one extra row to find out whether there is another page.
+    The sort key columns are always loaded to build the next cursor.
+
+    :param q: Q object of the filters
+    :param lookups: values() lookups of the selected fields
+    :param limit: number of events on the page
+    :param after: optional (date, start_time, title, id) sort key of the last event of the previous page
+    """
+
+    queryset = Event.objects.filter(q)
+    if after is not None:
+        date, start_time, title, event_id = after
+        # the plain date bound lets the planner use a range scan of the date index for the keyset condition
+        queryset = queryset.filter(date__gte=date).filter(
+            Q(date__gt=date)
+            | Q(date=date, start_time__gt=start_time)
+            | Q(date=date, start_time=start_time, title__gt=title)
+            | Q(date=date, start_time=start_time, title=title, id__gt=event_id)
+        )
+    return queryset.order_by(*EVENT_SORT_FIELDS).values(*{*lookups, *EVENT_SORT_FIELDS})[:limit + 1]
+
+
+def get_api_occurrence_rows(filter_q: Q, lookups: list[str], start: datetime.date, end: datetime.date | None,
+                            limit: int, after: tuple | None = None) -> list[dict]:
+    """
+    Get values() rows of the occurrences of recurring events that may be on one page of events, up to the
+    recurrence horizon, including the occurrences of series that started before the start date.
+
+    :param filter_q: Q object of the filters other than the date range
+    :param lookups: values() lookups of the selected fields
+    :param start: first date of the events
+    :param end: optional last date of the events
+    :param limit: number of events on the page
+    :param after: optional (date, start_time, title, id) sort key of the last event of the previous page
+    :return: list of rows after the previous page, unordered
+    """
+
+    if after is not None:
+        start = max(start, after[0])
+    end = end + datetime.timedelta(days=1) if end else get_recurrence_horizon(timezone.now().date())
+    # a series has one occurrence a day, so one of them at most is on the previous page's last date
+    occurrences = get_occurrences(start, end, filter_q, limit=limit + 2)
+    lookups = [*lookups, *EVENT_SORT_FIELDS]
+    rows = [get_occurrence_values(occurrence, lookups) for occurrence in occurrences]
+    if after is not None:
+        rows = [row for row in rows if values_sort_key(row) > after]
+    return rows
+
+
+def serialize_events(rows: list[dict], fields: list[str], event_url_prefix: str | None) -> list[dict]:
+    """
+    Build the JSON objects of values() rows, nesting the organization and primary contact fields.
+    A nested object whose values are all null, like the primary contact of an event without one, is null.
+
+    :param rows: values() rows, with is_occurrence set for occurrences of recurring events
+    :param fields: selected field names
+    :param event_url_prefix: absolute url of the event pages without the event id, or None to leave out the urls
+    :return: list of event dictionaries
+    """
+
+    plan = [(name.rpartition(".")[2], *event_api_fields[name]) for name in fields]
+    nested_objects = [nested for nested in NESTED_OBJECTS if any(field_nested == nested for _, _, field_nested, _, _ in plan)]
+
+    events = []
+    for row in rows:
+        event = {nested: {} for nested in nested_objects}
+        for key, lookup, nested, requires_authentication, convert in plan:
+            value = row[lookup]
+            if convert is not None:
+                value = convert(value)
+            if nested:
+                event[nested][key] = value
+            else:
+                event[key] = value
+        for nested in nested_objects:
+            if all(value is None for value in event[nested].values()):
+                event[nested] = None
+        if event_url_prefix is not None:
+            event["url"] = f"{event_url_prefix}{row['id']}"
+            # occurrences of a recurring event share the id of its first occurrence
+            if row.get("is_occurrence"):
+                event["url"] += f"?date={row['date']:%Y-%m-%d}"
+        events.append(event)
+    return events
+
+
+def get_api_events_page(request) -> dict:
+    """
+    Get one page of the events API response for a request.
+
+    :param request: HttpRequest with the fields, filter, limit, and cursor query parameters
+    :return: dictionary with the list of events and the cursor for the next page, or None if there are no more
+    :raises ApiError: if a query parameter is invalid
+    """
+
+    params = request.GET
+    fields = get_api_fields(params.get("fields"), request.user.is_authenticated)
+    start, end = get_api_date_range(params)
+    filter_q = get_api_event_q(params)
+    limit = get_api_limit(params.get("limit"))
+    after = None
+    if params.get("cursor"):
+        try:
+            after = decode_event_cursor(params["cursor"])
+        except ValueError as e:
+            raise ApiError("Invalid cursor.") from e
+
+    lookups = [event_api_fields[name][0] for name in fields]
+    q = filter_q & Q(date__gte=start)
+    if end:
+        q &= Q(date__lte=end)
+    rows = list(islice(merge_occurrence_values(
+        get_api_events_queryset(q, lookups, limit, after),
+        get_api_occurrence_rows(filter_q, lookups, start, end, limit, after),
+    ), limit + 1))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_event_sort_key_cursor(last["date"], last["start_time"], last["title"], last["id"])
+
+    # the event url is derived from the id, so it is included along with it
+    event_url_prefix = None
+    if "id" in fields:
+        event_url_prefix = request.build_absolute_uri(reverse("core:event-details", args=[0]))[:-1]
+    return {"events": serialize_events(rows, fields, event_url_prefix), "next_cursor": next_cursor}
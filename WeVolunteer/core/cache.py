@@ -0,0 +1,298 @@
+"""
+cache.py
+
+Versioned caching of rendered html fragments.
+Cached fragments are keyed by a version number that is bumped whenever the data they were rendered from changes,
+so invalidation never has to find and delete the fragments themselves.
+"""
+import datetime
+import hashlib
+import time
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+
+EVENT_CARD_TEMPLATE = "partials/event_card.html#event-card"
+EVENT_CARD_TIMEOUT = 60 * 60 * 24
+MONTH_LIST_TEMPLATE = "partials/monthly_event_list.html#monthly-event-list"
+# months without a cutoff only change when their version is bumped
+MONTH_LIST_TIMEOUT = 60 * 60 * 24 * 7
+# the month containing the cutoff is keyed by the cutoff date, so its entries are useless after a day
+CUTOFF_MONTH_LIST_TIMEOUT = 60 * 60 * 24
+# form choices only change when their organization version is bumped
+ORGANIZATION_CHOICES_TIMEOUT = 60 * 60 * 24 * 7
+# feeds are keyed by their page state, which changes with every event change, and by the date
+FEED_TIMEOUT = 60 * 60 * 24
+# the series count only changes when the series version is bumped
+SERIES_COUNT_TIMEOUT = 60 * 60 * 24 * 7
+# bumped whenever a recurring event series, one of its exceptions, or its first occurrence changes,
+# since its occurrences can be displayed in any month
+SERIES_VERSION_KEY = "core:version:series"
+
+
+def organization_version_key(organization_id: int) -> str:
+    return f"core:version:organization:{organization_id}"
+
+
+def month_version_key(month_date: datetime.date) -> str:
+    return f"core:version:month:{month_date.year}-{month_date.month:02}"
+
+
+def get_versions(keys: list[str]) -> dict[str, int]:
+    """
+    Get the current value of each version key, starting any missing version at the current time in nanoseconds
+    so a version that was evicted from the cache never repeats an earlier value.
+
+    :param keys: list of version keys
+    :return: dictionary of version keys to versions
+    """
+
+    versions = cache.get_many(keys)
+    missing_keys = [key for key in keys if key not in versions]
+    if missing_keys:
+        # add does not overwrite a version another request started or bumped in the meantime,
+        # so the versions are read back in one round trip
+        for key in missing_keys:
+            cache.add(key, time.time_ns(), timeout=None)
+        versions.update(cache.get_many(missing_keys))
+    return versions
+
+
+def bump_version(key: str):
+    """
+    Increment a version key, which invalidates every fragment cached under the previous version.
+    """
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_organization_version(organization_id: int):
+    """
+    Invalidate the cached fragments of an organization and all of its events.
+    """
+
+    bump_version(organization_version_key(organization_id))
+
+
+def bump_month_versions(dates):
+    """
+    Invalidate the cached event lists of every month containing one of the given dates.
+    """
+
+    for key in {month_version_key(date) for date in dates}:
+        bump_version(key)
+
+
+def bump_series_version():
+    """
+    Invalidate the cached series count and the cached event lists of every month, which may show occurrences of
+    recurring events.
+    """
+
+    bump_version(SERIES_VERSION_KEY)
+
+
+def event_card_key(event, version: int, is_authenticated: bool) -> str:
+    """
+    Get the cache key of a rendered event card.
+    Logged in users see the address and contact fields, so they get separate cards.
+    The occurrences of a recurring event share its id, so their cards are also keyed by date.
+    """
+
+    occurrence_part = f":{event.date:%Y-%m-%d}" if event.is_occurrence else ""
+    return f"core:event-card:{event.id}{occurrence_part}:{version}:{'user' if is_authenticated else 'anon'}"
+
+
+def render_event_cards(events, request) -> list[str]:
+    """
+    Get the rendered event-card partial of each event, rendering and caching only the cards that are not cached yet.
+    An event card shows the event, its organization, and its primary contact, which all belong to the event's
+    organization, so cards are versioned by organization.
+    Uses three cache round trips no matter how many events there are. Version keys that are not cached yet cost
+    one more round trip each to start them, and one more to read them back.
+
+    :param events: list of events, with organization and primary_contact already loaded
+    :param request: HttpRequest of the viewer
+    :return: list of card html strings in the same order as events
+    """
+
+    events = list(events)
+    if not events:
+        return []
+
+    is_authenticated = request.user.is_authenticated
+    versions = get_versions(list({organization_version_key(event.organization_id) for event in events}))
+    keys = [
+        event_card_key(event, versions[organization_version_key(event.organization_id)], is_authenticated)
+        for event in events
+    ]
+
+    cards = cache.get_many(keys)
+    missing = {}
+    template = get_template(EVENT_CARD_TEMPLATE)
+    for key, event in zip(keys, events):
+        if key not in cards:
+            missing[key] = template.render({"event": event, "request": request})
+    if missing:
+        cache.set_many(missing, timeout=EVENT_CARD_TIMEOUT)
+        cards.update(missing)
+
+    return [cards[key] for key in keys]
+
+
+def get_organization_choices(organization_id: int, load_choices) -> dict[str, list[tuple[int, str]]]:
+    """
+    Get the form choices scoped to an organization, loading them only when they are not cached yet.
+    The organization version is bumped whenever the organization or one of its contacts or locations changes,
+    so the choices are versioned by organization.
+
+    :param organization_id: id of the organization
+    :param load_choices: function taking the organization id and returning a dictionary of form field names to
+        lists of (id, label) choices
+    :return: dictionary of form field names to lists of (id, label) choices
+    """
+
+    version_key = organization_version_key(organization_id)
+    key = f"core:organization-choices:{organization_id}:{get_versions([version_key])[version_key]}"
+    choices = cache.get(key)
+    if choices is None:
+        choices = load_choices(organization_id)
+        cache.set(key, choices, timeout=ORGANIZATION_CHOICES_TIMEOUT)
+    return choices
+
+
+def month_list_key(month_start: datetime.date, version: int, series_version: int | None, cutoff: datetime.date | None,
+                   is_authenticated: bool) -> str:
+    """
+    Get the cache key of a rendered monthly-event-list partial for one month.
+    Months before the recurrence horizon also show occurrences, so they are keyed by the series version.
+    Logged in users see the address and contact fields, so they get separate lists.
+    """
+
+    series_part = series_version if series_version is not None else "none"
+    cutoff_part = cutoff.isoformat() if cutoff else "all"
+    return (
+        f"core:month-list:{month_start:%Y-%m}:{version}:{series_part}:{cutoff_part}:"
+        f"{'user' if is_authenticated else 'anon'}"
+    )
+
+
+def render_monthly_event_lists(month_starts: list[datetime.date], cutoff: datetime.date, request, load_events,
+                               horizon: datetime.date | None = None) -> str:
+    """
+    Get the rendered monthly-event-list partial of each month, loading and rendering only the months that are
+    not cached yet.
+    Events before the cutoff are left out, so the month containing the cutoff is cached per cutoff date and
+    is recomputed at most once a day, while the months after it are cached until one of their events changes.
+
+    :param month_starts: list of the first days of the months to render, in display order
+    :param cutoff: datetime.date of the earliest event to include
+    :param request: HttpRequest of the viewer
+    :param load_events: function taking the list of uncached month starts and returning a dictionary of those
+        month starts to their lists of events
+    :param horizon: optional datetime.date of the first month without occurrences of recurring events
+        (see core.recurrence), or None if the lists never show occurrences
+    :return: html of all the months
+    """
+
+    is_authenticated = request.user.is_authenticated
+    versions = get_versions([month_version_key(month_start) for month_start in month_starts] + [SERIES_VERSION_KEY])
+    cutoffs = {
+        month_start: cutoff if month_start <= cutoff < month_start + relativedelta(months=+1) else None
+        for month_start in month_starts
+    }
+    keys = {
+        month_start: month_list_key(
+            month_start,
+            versions[month_version_key(month_start)],
+            versions[SERIES_VERSION_KEY] if horizon is not None and month_start < horizon else None,
+            cutoffs[month_start],
+            is_authenticated,
+        )
+        for month_start in month_starts
+    }
+
+    lists = cache.get_many(list(keys.values()))
+    missing = [month_start for month_start in month_starts if keys[month_start] not in lists]
+    if missing:
+        monthly_events = load_events(missing)
+        template = get_template(MONTH_LIST_TEMPLATE)
+        for month_start in missing:
+            html = template.render({
+                "monthly_events": {f"{month_start.strftime('%B')} {month_start.year}": monthly_events[month_start]},
+                "request": request,
+            })
+            timeout = CUTOFF_MONTH_LIST_TIMEOUT if cutoffs[month_start] else MONTH_LIST_TIMEOUT
+            cache.set(keys[month_start], html, timeout=timeout)
+            lists[keys[month_start]] = html
+
+    return mark_safe("".join(lists[keys[month_start]] for month_start in month_starts))
+
+
+def get_series_count(load_count) -> int:
+    """
+    Get the number of recurring event series, loading it only when it is not cached yet.
+
+    :param load_count: function returning the number of series
+    :return: number of series
+    """
+
+    key = f"core:series-count:{get_versions([SERIES_VERSION_KEY])[SERIES_VERSION_KEY]}"
+    count = cache.get(key)
+    if count is None:
+        count = load_count()
+        cache.set(key, count, timeout=SERIES_COUNT_TIMEOUT)
+    return count
+
+
+def feed_key(scope: str, page_state: tuple[datetime.datetime, str], is_authenticated: bool, host: str) -> str:
+    """
+    Get the cache key of a rendered feed, such as "events" or "organization:1", at the given page state
+    (see core.conditional) and date.
+    A feed is the same for every anonymous viewer and for every logged in one, who also see addresses,
+    so unlike the page ETag the key does not depend on the user. It does depend on the host, which the event UIDs
+    and URLs are built from.
+
+    :param scope: scope of the feed
+    :param page_state: state of the feed from core.conditional
+    :param is_authenticated: whether the viewer is logged in
+    :param host: scheme and host the feed was requested from, such as "https://example.com"
+    """
+
+    last_modified, state = page_state
+    validator = f"{last_modified.isoformat()}:{state}:{timezone.now().date()}"
+    digest = hashlib.md5(validator.encode(), usedforsecurity=False).hexdigest()
+    viewer = "user" if is_authenticated else "anon"
+    return f"core:feed:{scope}:{viewer}:{host}:{digest}"
+
+
+def get_cached_stream(key: str, render_chunks, timeout: int = FEED_TIMEOUT):
+    """
+    Get the cached content of a streamed response, or a generator that renders it and caches it once the last
+    chunk has been sent, so a stream that is cut off is never cached.
+
+    :param key: cache key of the content
+    :param render_chunks: function returning an iterable of content strings
+    :param timeout: seconds to cache the content for
+    :return: cached content string, or generator of content strings
+    """
+
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    def stream():
+        chunks = []
+        for chunk in render_chunks():
+            chunks.append(chunk)
+            yield chunk
+        cache.set(key, "".join(chunks), timeout=timeout)
+
+    return stream()
@@ -0,0 +1,111 @@
+"""
+conditional.py
+
+Conditional GET support for the event and organization pages, so a visitor whose copy is still current
+gets a 304 Not Modified before any template work.
+Every event and contact change touches the updated_at of its organization (see core.signals), so the pages are
+validated from organization rows alone: an event or organization page by its organization's updated_at,
+and the site wide pages by the latest updated_at and the number of organizations, which also catches deletes.
+Queryset update() and bulk operations do not send signals, so code using them must touch the organizations itself.
+"""
+import datetime
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from core.models import Event, Organization
+from core.rules import get_administered_organization_id
+
+
+PAGE_STATE_ATTR = '_page_state'
+EPOCH = datetime.datetime.fromtimestamp(0, datetime.timezone.utc)
+
+
+def get_event_page_state(request, event_id: int) -> tuple[datetime.datetime, str] | None:
+    """
+    Get the state of an event page, which shows the event, its organization and its primary contact,
+    along with the number of events of the contact, which all belong to the event's organization.
+    """
+
+    updated_at = Event.objects.filter(id=event_id).values_list('organization__updated_at', flat=True).first()
+    return (updated_at, "") if updated_at else None
+
+
+def get_organization_page_state(request, org_id: int) -> tuple[datetime.datetime, str] | None:
+    """
+    Get the state of an organization page, which shows the organization and its events.
+    """
+
+    updated_at = Organization.objects.filter(id=org_id).values_list('updated_at', flat=True).first()
+    return (updated_at, "") if updated_at else None
+
+
+def get_site_page_state(request) -> tuple[datetime.datetime, str]:
+    """
+    Get the state of the pages listing every organization or every event, in one aggregate query.
+    """
+
+    state = Organization.objects.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return state['last_modified'] or EPOCH, str(state['count'])
+
+
+def get_viewer_key(request) -> str:
+    """
+    Get the part of a page's ETag that depends on the viewer, since logged in users see contact details
+    and the edit buttons of the organization they administer.
+    """
+
+    user = request.user
+    if not user.is_authenticated:
+        return "anon"
+    return f"{user.pk}:{get_administered_organization_id(user)}"
+
+
+def get_memoized_page_state(request, get_page_state, *args, **kwargs) -> tuple[datetime.datetime, str] | None:
+    """
+    Get the state of the requested page, looking it up once per request,
+    since condition() calls the ETag and Last-Modified functions separately and views may need it as well.
+    """
+
+    if not hasattr(request, PAGE_STATE_ATTR):
+        setattr(request, PAGE_STATE_ATTR, get_page_state(request, *args, **kwargs))
+    return getattr(request, PAGE_STATE_ATTR)
+
+
+def get_page_etag(request, page_state: tuple[datetime.datetime, str]) -> str:
+    """
+    Get the ETag of a page from its state, the viewer, and the current date, since upcoming and past events are
+    split by date.
+    """
+
+    last_modified, state = page_state
+    validator = f"{last_modified.isoformat()}:{state}:{get_viewer_key(request)}:{timezone.now().date()}"
+    return hashlib.md5(validator.encode(), usedforsecurity=False).hexdigest()
+
+
+def conditional_page(get_page_state):
+    """
+    Decorator answering conditional GET requests of a page with a 304 Not Modified when the page has not changed,
+    before the view runs.
+    The Last-Modified date covers the page state and the start of the current day, but not the viewer like the ETag
+    does, so browsers, which send both, revalidate with the ETag.
+
+    :param get_page_state: function taking the view's request and arguments, returning a tuple of the datetime
+        the page's data last changed and a string of anything else the page depends on,
+        or None if the page does not exist
+    """
+
+    def etag(request, *args, **kwargs):
+        page_state = get_memoized_page_state(request, get_page_state, *args, **kwargs)
+        return get_page_etag(request, page_state) if page_state else None
+
+    def last_modified(request, *args, **kwargs):
+        page_state = get_memoized_page_state(request, get_page_state, *args, **kwargs)
+        if page_state is None:
+            return None
+        start_of_day = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return max(page_state[0], start_of_day)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
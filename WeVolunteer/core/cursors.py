@@ -0,0 +1,76 @@
+"""
+cursors.py
+
+Opaque pagination cursors handed to the frontend as Datastar signals
+"""
+import datetime
+
+from django.core import signing
+
+
+MONTH_CURSOR_SALT = "core.cursors.month"
+EVENT_CURSOR_SALT = "core.cursors.event"
+
+
+def encode_month_cursor(month_date: datetime.date) -> str:
+    """
+    Encode the first month that has not been displayed yet as an opaque, signed cursor.
+
+    :param month_date: datetime.date containing the desired month and year, day is ignored
+    :return: cursor string
+    """
+
+    return signing.dumps(month_date.replace(day=1).isoformat(), salt=MONTH_CURSOR_SALT)
+
+
+def decode_month_cursor(cursor: str) -> datetime.date:
+    """
+    Decode a cursor created by encode_month_cursor.
+
+    :param cursor: cursor string
+    :return: datetime.date of the first day of the month the cursor points at
+    :raises ValueError: if the cursor is missing, malformed, or has been tampered with
+    """
+
+    try:
+        return datetime.date.fromisoformat(signing.loads(cursor, salt=MONTH_CURSOR_SALT))
+    except (signing.BadSignature, TypeError) as e:
+        raise ValueError("Invalid month cursor") from e
+
+
+def encode_event_cursor(event) -> str:
+    """
+    Encode the (date, start_time, title, id) sort key of the last event displayed as an opaque, signed cursor.
+
+    :param event: the last Event displayed
+    :return: cursor string
+    """
+
+    return encode_event_sort_key_cursor(event.date, event.start_time, event.title, event.id)
+
+
+def encode_event_sort_key_cursor(date: datetime.date, start_time: datetime.time, title: str, event_id: int) -> str:
+    """
+    Encode an event's (date, start_time, title, id) sort key as an opaque, signed cursor,
+    for callers that have the key without an Event instance, such as values() rows.
+
+    :return: cursor string, decoded by decode_event_cursor
+    """
+
+    return signing.dumps([date.isoformat(), start_time.isoformat(), title, event_id], salt=EVENT_CURSOR_SALT)
+
+
+def decode_event_cursor(cursor: str) -> tuple[datetime.date, datetime.time, str, int]:
+    """
+    Decode a cursor created by encode_event_cursor.
+
+    :param cursor: cursor string
+    :return: tuple of the date, start_time, title, and id of the event the cursor points at
+    :raises ValueError: if the cursor is missing, malformed, or has been tampered with
+    """
+
+    try:
+        date, start_time, title, event_id = signing.loads(cursor, salt=EVENT_CURSOR_SALT)
+        return datetime.date.fromisoformat(date), datetime.time.fromisoformat(start_time), str(title), int(event_id)
+    except (signing.BadSignature, TypeError) as e:
+        raise ValueError("Invalid event cursor") from e
@@ -0,0 +1,164 @@
+"""
+filters.py
+
+Faceted Event filters read from Datastar signals, along with the events near me filter
+"""
+import math
+
+from django.db.models import Count, Q
+
+from core.locations import NEAR_ME_RADIUS_MILES, near_q
+from core.models import EventDescriptors, EventLocationDescriptors, TimeOfDay, time_of_day_q
+
+
+# facet name: (heading, Datastar signal name, Enum, Event array field or None for time of day, badge color class)
+event_facets = {
+    "event_descriptors": ("Event Type", "filter_event_descriptors", EventDescriptors, "event_descriptor_tags", "bg-wv-yellow"),
+    "times_of_day": ("Time of Day", "filter_times_of_day", TimeOfDay, None, "bg-wv-pink"),
+    "location_descriptors": ("Location", "filter_location_descriptors", EventLocationDescriptors, "location_descriptor_tags", "bg-wv-green"),
+}
+# filters key of the events near me filter, whose value is [latitude, longitude, radius in miles]
+NEAR_FILTER = "near"
+
+
+def get_near_filter(qdict: dict) -> list[float] | None:
+    """
+    Read the events near me filter from a request datastar dictionary.
+    A radius of 0 turns the filter off.
+
+    :param qdict: request datastar dictionary
+    :return: list of the latitude, longitude, and radius in miles, or None if the filter is off
+    :raises ValueError: if a near me signal is invalid
+    """
+
+    radius = qdict.get("filter_near_radius") or 0
+    try:
+        radius = int(radius)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid filter_near_radius signal") from e
+    if not radius:
+        return None
+    if radius not in NEAR_ME_RADIUS_MILES:
+        raise ValueError("Invalid filter_near_radius signal")
+
+    coordinates = []
+    for signal, limit in [("filter_near_latitude", 90), ("filter_near_longitude", 180)]:
+        value = qdict.get(signal)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or abs(value) > limit:
+            raise ValueError(f"Invalid {signal} signal")
+        coordinates.append(float(value))
+    return [*coordinates, radius]
+
+
+def get_event_filters(qdict: dict, is_authenticated: bool = False) -> dict[str, list[str]]:
+    """
+    Read the selected facet values from a request datastar dictionary.
+    The events near me filter is only read for logged in users, since moving the point around would let anyone
+    work out the coordinates of the organizations' locations, which are only shown to logged in users.
+
+    :param qdict: request datastar dictionary
+    :param is_authenticated: whether the viewer is logged in
+    :return: dictionary of facet names to sorted lists of selected values, only for facets with a selection,
+        plus the get_near_filter list under NEAR_FILTER when the viewer is logged in and the events near me
+        filter is on
+    :raises ValueError: if a filter signal is not a list of valid values for its facet, or a near me signal is invalid
+    """
+
+    filters = {}
+    for facet, (heading, signal, enum, field, color) in event_facets.items():
+        selected = qdict.get(signal) or []
+        if not isinstance(selected, list) or any(value not in enum.values for value in selected):
+            raise ValueError(f"Invalid {signal} signal")
+        if selected:
+            filters[facet] = sorted(set(selected))
+    near = get_near_filter(qdict) if is_authenticated else None
+    if near is not None:
+        filters[NEAR_FILTER] = near
+    return filters
+
+
+def facet_q(facet: str, values: list[str]) -> Q:
+    """
+    Get a Q object matching Events that have any of the given values for a facet.
+    Descriptor tags use the Postgres array overlap (&&) operator, or contains (@>) for a single value,
+    so the GIN indexes can be used.
+
+    :param facet: facet name from event_facets
+    :param values: list of selected values
+    """
+
+    heading, signal, enum, field, color = event_facets[facet]
+    if field is None:
+        return time_of_day_q(values)
+    if len(values) == 1:
+        return Q(**{f"{field}__contains": values})
+    return Q(**{f"{field}__overlap": values})
+
+
+def event_filters_q(filters: dict[str, list[str]], exclude: str | None = None) -> Q:
+    """
+    Get a Q object matching Events that match every facet with a selection.
+    Values selected within one facet are alternatives, while separate facets must all match.
+
+    :param filters: dictionary created by get_event_filters
+    :param exclude: optional facet name to leave out, used when counting that facet's own values
+    :return: Q object, empty if nothing is selected
+    """
+
+    q = Q()
+    for facet, values in filters.items():
+        if facet == NEAR_FILTER:
+            q &= near_q(*values)
+        elif facet != exclude:
+            q &= facet_q(facet, values)
+    return q
+
+
+def get_facets(queryset, filters: dict[str, list[str]], series_queryset=None) -> list[dict]:
+    """
+    Get every facet with an event count for each of its values.
+    Each count applies the selections of every other facet, so it is the number of events the value would match
+    given the current filter. All counts are computed in a single aggregate query, plus one for the series.
+
+    :param queryset: unfiltered Event queryset to count over
+    :param filters: dictionary created by get_event_filters
+    :param series_queryset: optional Event queryset of recurring events outside of queryset that still have
+        occurrences to count, each series counting once (see core.recurrence)
+    :return: list of facet dictionaries ready for the event facets partial
+    """
+
+    # the events near me filter applies to every count, so it filters the rows once instead of in every count
+    if NEAR_FILTER in filters:
+        queryset = queryset.filter(near_q(*filters[NEAR_FILTER]))
+        if series_queryset is not None:
+            series_queryset = series_queryset.filter(near_q(*filters[NEAR_FILTER]))
+        filters = {facet: values for facet, values in filters.items() if facet != NEAR_FILTER}
+
+    aggregates = {
+        f"{facet}__{value}": Count("id", filter=event_filters_q(filters, exclude=facet) & facet_q(facet, [value]))
+        for facet, (heading, signal, enum, field, color) in event_facets.items()
+        for value in enum.values
+    }
+    counts = queryset.aggregate(**aggregates)
+    if series_queryset is not None:
+        for key, count in series_queryset.aggregate(**aggregates).items():
+            counts[key] += count
+
+    facets = []
+    for facet, (heading, signal, enum, field, color) in event_facets.items():
+        selected = filters.get(facet, [])
+        facets.append({
+            "heading": heading,
+            "signal": signal,
+            "color": color,
+            "options": [
+                {
+                    "value": value,
+                    "label": label,
+                    "count": counts[f"{facet}__{value}"],
+                    "selected": value in selected,
+                }
+                for value, label in enum.choices
+            ],
+        })
+    return facets
@@ -5,7 +5,15 @@ from django.core.exceptions import ValidationError
 from django.forms import Form
 from django.utils import timezone
 
-from core.models import Event, Organization, OrganizationContact, OrganizationAdministrator
+from core.cache import get_organization_choices
+from core.models import Event, EventRecurrence, Location, Organization, OrganizationContact, RecurrenceFrequency
+
+
+# values are the bits of EventRecurrence.weekdays
+WEEKDAY_CHOICES = [
+    ("0", "Mon"), ("1", "Tue"), ("2", "Wed"), ("3", "Thu"), ("4", "Fri"), ("5", "Sat"), ("6", "Sun"),
+]
+REPEAT_FIELDS = ["repeat_frequency", "repeat_interval", "repeat_weekdays", "repeat_until"]
 
 
 def add_invalid_class_to_form_error_fields(form: Form):
@@ -18,6 +26,43 @@ def add_invalid_class_to_form_error_fields(form: Form):
         form.fields[field].widget.attrs["class"] = current_class + " is-invalid"
 
 
+def load_organization_choices(organization_id: int) -> dict[str, list[tuple[int, str]]]:
+    """
+    Load the organization, primary_contact, and location choices of an organization's forms, in three queries.
+    Contacts and locations are joined to their organization, since their labels include the organization name.
+
+    :param organization_id: id of the organization
+    :return: dictionary of form field names to lists of (id, label) choices
+    """
+
+    contacts = OrganizationContact.objects.filter(organization_id=organization_id).select_related("organization")
+    locations = Location.objects.filter(organization_id=organization_id).select_related("organization").order_by("name")
+    return {
+        "organization": [(organization.id, str(organization)) for organization in Organization.objects.filter(id=organization_id)],
+        "primary_contact": [(contact.id, str(contact)) for contact in contacts],
+        "location": [(location.id, str(location)) for location in locations],
+    }
+
+
+def scope_form_to_organization(form: Form, organization_id: int, fields: list[str]):
+    """
+    Helper function to restrict the given model choice fields of a form to one organization.
+    The querysets are only used to validate submitted values, while the rendered choices come from the cache.
+    """
+
+    querysets = {
+        "organization": Organization.objects.filter(id=organization_id),
+        "primary_contact": OrganizationContact.objects.filter(organization_id=organization_id),
+        "location": Location.objects.filter(organization_id=organization_id),
+    }
+    choices = get_organization_choices(organization_id, load_organization_choices)
+    for field_name in fields:
+        field = form.fields[field_name]
+        field.queryset = querysets[field_name]
+        empty_choice = [("", field.empty_label)] if field.empty_label is not None else []
+        field.choices = empty_choice + choices[field_name]
+
+
 class FirstLastNameSignupForm(SignupForm):
     """
     Signup form containing first and last name.
@@ -36,6 +81,19 @@ class EventForm(forms.ModelForm):
     past_date_error = "Date must not be in the past"
     start_time_error = "Start time must be before end time"
     end_time_error = "End time must be after start time"
+    repeat_until_error = "Repeat until date must be after the event date"
+
+    # the recurrence rule of the event, saved to its EventRecurrence
+    repeat_frequency = forms.ChoiceField(
+        choices=[("", "Does not repeat")] + RecurrenceFrequency.choices, required=False, label="Repeats"
+    )
+    repeat_interval = forms.IntegerField(min_value=1, max_value=99, initial=1, required=False, label="Every")
+    repeat_weekdays = forms.MultipleChoiceField(
+        choices=WEEKDAY_CHOICES, required=False, label="On", widget=forms.CheckboxSelectMultiple
+    )
+    repeat_until = forms.DateField(
+        required=False, label="Until", widget=DatePickerInput(options={"format": "MM-DD-YYYY"})
+    )
 
     def clean(self):
         """
@@ -46,7 +104,7 @@ class EventForm(forms.ModelForm):
 
         start_time = cleaned_data.get("start_time")
         end_time = cleaned_data.get("end_time")
-        if end_time:
+        if start_time and end_time:
             if start_time > end_time:
                 self.add_error("start_time", self.start_time_error)
                 self.add_error("end_time", self.end_time_error)
@@ -54,12 +112,55 @@ class EventForm(forms.ModelForm):
         organization = cleaned_data.get("organization")
         primary_contact = cleaned_data.get("primary_contact")
         if primary_contact is not None:
-            if primary_contact.organization != organization:
+            if organization is None or primary_contact.organization_id != organization.id:
                 self.add_error("primary_contact", "Primary contact must belong to this event's organization")
+        location = cleaned_data.get("location")
+        if location is not None:
+            if organization is None or location.organization_id != organization.id:
+                self.add_error("location", "Location must belong to this event's organization")
+
+        date = cleaned_data.get("date")
+        repeat_until = cleaned_data.get("repeat_until")
+        if cleaned_data.get("repeat_frequency") and date and repeat_until and repeat_until <= date:
+            self.add_error("repeat_until", self.repeat_until_error)
 
         if self.errors:
             add_invalid_class_to_form_error_fields(self)
 
+    def save(self, commit=True):
+        """
+        Save the event, along with its recurrence rule when committing.
+        """
+
+        event = super().save(commit)
+        if commit:
+            self.save_recurrence(event)
+        return event
+
+    def save_recurrence(self, event: Event):
+        """
+        Create, update, or delete the EventRecurrence of a saved event from the repeat fields, if they changed.
+        """
+
+        if not set(REPEAT_FIELDS) & set(self.changed_data):
+            return
+
+        recurrence = getattr(event, "recurrence", None)
+        frequency = self.cleaned_data.get("repeat_frequency")
+        if not frequency:
+            if recurrence is not None:
+                recurrence.delete()
+            return
+
+        recurrence = recurrence or EventRecurrence(event=event)
+        recurrence.frequency = frequency
+        recurrence.interval = self.cleaned_data.get("repeat_interval") or 1
+        recurrence.weekdays = 0
+        if frequency == RecurrenceFrequency.WEEKLY:
+            recurrence.weekdays = sum(1 << int(weekday) for weekday in self.cleaned_data.get("repeat_weekdays", []))
+        recurrence.until = self.cleaned_data.get("repeat_until")
+        recurrence.save()
+
     def clean_date(self):
         """
         Clean method for the date field.
@@ -90,17 +191,9 @@ class EventForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user', None)
+        organization_id = kwargs.pop('organization_id', None)
         super(EventForm, self).__init__(*args, **kwargs)
 
-        # if user is org admin (not superuser), set possible organization and primary contact fields to allowed queryset
-        if user is not None:
-            queryset = OrganizationAdministrator.objects.filter(user=user)
-            if queryset.exists():
-                organization = queryset.first().organization
-                self.fields["organization"].queryset = Organization.objects.filter(id=organization.id)
-                self.fields["primary_contact"].queryset = OrganizationContact.objects.filter(organization=organization)
-
         self.label_suffix = ""
         for visible in self.visible_fields():
             visible.field.widget.attrs['class'] = 'form-control'
@@ -110,12 +203,34 @@ class EventForm(forms.ModelForm):
         self.fields["organization"].empty_label = None
         self.fields["primary_contact"].widget.attrs["class"] = "form-select"
         self.fields["primary_contact"].empty_label = "Unassigned"
+        self.fields["location"].widget.attrs["class"] = "form-select"
+        self.fields["location"].empty_label = "No saved location"
         self.fields["date"].widget.attrs["placeholder"] = "Date (DD-MM-YYYY)"
         self.fields["start_time"].widget.attrs["placeholder"] = "Start Time (hh:mm AM)"
         self.fields["end_time"].widget.attrs["placeholder"] = "End Time (hh:mm AM)"
         self.fields["event_descriptor_tags"].widget.attrs["data-bind"] = "event_descriptor_tags"
         self.fields["location_descriptor_tags"].widget.attrs["data-bind"] = "location_descriptor_tags"
         self.fields["description"].widget.attrs["style"] = "height: 130px"
+        self.fields["repeat_frequency"].widget.attrs["class"] = "form-select"
+        self.fields["repeat_frequency"].widget.attrs["data-bind"] = "repeat_frequency"
+        self.fields["repeat_weekdays"].widget.attrs["class"] = "form-check-input"
+        self.fields["repeat_until"].widget.attrs["placeholder"] = "Until (MM-DD-YYYY)"
+
+        recurrence = getattr(self.instance, "recurrence", None) if self.instance.pk else None
+        if recurrence is not None:
+            self.initial.update({
+                "repeat_frequency": recurrence.frequency,
+                "repeat_interval": recurrence.interval,
+                "repeat_weekdays": [value for value, label in WEEKDAY_CHOICES if recurrence.weekdays & (1 << int(value))],
+                "repeat_until": recurrence.until,
+            })
+
+        # if the user is an org admin (not superuser), limit the organization, primary contact, and location choices to their org
+        if organization_id is not None:
+            scope_form_to_organization(self, organization_id, ["organization", "primary_contact", "location"])
+        else:
+            self.fields["primary_contact"].queryset = OrganizationContact.objects.select_related("organization")
+            self.fields["location"].queryset = Location.objects.select_related("organization").order_by("name")
 
 
 class OrganizationForm(forms.ModelForm):
@@ -186,16 +301,9 @@ class OrganizationContactForm(forms.ModelForm):
 
 
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user', None)
+        organization_id = kwargs.pop('organization_id', None)
         super(OrganizationContactForm, self).__init__(*args, **kwargs)
 
-        # if user is org admin, set possible organizations to their org
-        if user is not None:
-            admins = OrganizationAdministrator.objects.filter(user=user)
-            if admins.exists():
-                organization = admins.first().organization
-                self.fields["organization"].queryset = Organization.objects.filter(id=organization.id)
-
         self.label_suffix = ""
         for visible in self.visible_fields():
             visible.field.widget.attrs['class'] = 'form-control'
@@ -203,3 +311,7 @@ class OrganizationContactForm(forms.ModelForm):
 
         self.fields["organization"].widget.attrs["class"] = "form-select"
         self.fields["organization"].empty_label = None
+
+        # if the user is an org admin, limit the organization choices to their org
+        if organization_id is not None:
+            scope_form_to_organization(self, organization_id, ["organization"])
@@ -0,0 +1,150 @@
+"""
+ical.py
+
+iCalendar (RFC 5545) feeds of upcoming events for calendar app subscriptions
+"""
+import datetime
+
+from django.urls import reverse
+from django.utils import timezone
+
+
+ICAL_CONTENT_TYPE = "text/calendar; charset=utf-8"
+PRODUCT_ID = "-//WeVolunteer//Events//EN"
+# how often calendar apps should refresh a subscribed feed
+REFRESH_INTERVAL = "PT1H"
+# content lines longer than this many octets must be folded
+MAX_LINE_OCTETS = 75
+# number of events rendered into each streamed chunk
+FEED_CHUNK_SIZE = 200
+FEED_EVENT_FIELDS = [
+    "id", "title", "date", "start_time", "end_time", "address", "description", "updated_at", "organization__name",
+]
+
+
+def escape_text(value: str) -> str:
+    """
+    Escape a TEXT property value.
+    """
+
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """
+    Fold a content line into lines of at most 75 octets, without splitting a multibyte character,
+    and terminate it with a CRLF.
+    """
+
+    if len(line.encode()) <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+
+    parts = []
+    part = ""
+    part_octets = 0
+    for character in line:
+        octets = len(character.encode())
+        # continuation lines start with a space, which counts toward their length
+        if part_octets + octets > MAX_LINE_OCTETS - (1 if parts else 0):
+            parts.append(part)
+            part, part_octets = "", 0
+        part += character
+        part_octets += octets
+    parts.append(part)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_utc(value: datetime.datetime) -> str:
+    return value.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def get_event_datetimes(event: dict) -> tuple[datetime.datetime, datetime.datetime | None]:
+    """
+    Get the aware start and end datetimes of an event, whose date and times are in settings.TIME_ZONE.
+    An end time before the start time ends on the next day.
+    """
+
+    start = timezone.make_aware(datetime.datetime.combine(event["date"], event["start_time"]))
+    if event["end_time"] is None:
+        return start, None
+    end_date = event["date"] + datetime.timedelta(days=1 if event["end_time"] < event["start_time"] else 0)
+    return start, timezone.make_aware(datetime.datetime.combine(end_date, event["end_time"]))
+
+
+def render_event(event: dict, request, include_address: bool) -> str:
+    """
+    Render the VEVENT component of one event.
+
+    :param event: dictionary of the event's FEED_EVENT_FIELDS, with is_occurrence set if it is an occurrence of
+        a recurring event, which shares the id of the series' first occurrence
+    :param request: HttpRequest of the feed, used for absolute urls
+    :param include_address: whether the viewer may see the event's address
+    :return: VEVENT string
+    """
+
+    start, end = get_event_datetimes(event)
+    description = event["organization__name"]
+    if event["description"]:
+        description += "\n\n" + event["description"]
+    uid = f"event-{event['id']}"
+    url = reverse('core:event-details', args=[event['id']])
+    if event.get("is_occurrence"):
+        uid += f"-{event['date']:%Y%m%d}"
+        url += f"?date={event['date']:%Y-%m-%d}"
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@{request.get_host()}",
+        # a feed's DTSTAMP is the time the event was last revised
+        f"DTSTAMP:{format_utc(event['updated_at'])}",
+        f"LAST-MODIFIED:{format_utc(event['updated_at'])}",
+        f"DTSTART:{format_utc(start)}",
+    ]
+    if end:
+        lines.append(f"DTEND:{format_utc(end)}")
+    lines += [
+        f"SUMMARY:{escape_text(event['title'])}",
+        f"DESCRIPTION:{escape_text(description)}",
+        f"URL:{request.build_absolute_uri(url)}",
+    ]
+    if include_address and event["address"]:
+        lines.append(f"LOCATION:{escape_text(event['address'])}")
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+def render_calendar(name: str, events, request):
+    """
+    Generate an iCalendar feed, rendering its events in chunks so it can be streamed.
+    Times are written in UTC, which every calendar app reads without a VTIMEZONE component,
+    and the feed names settings.TIME_ZONE as the time zone to display them in.
+    The address is only shown to logged in users, like on the event pages.
+
+    :param name: calendar name displayed by calendar apps
+    :param events: iterable of dictionaries of FEED_EVENT_FIELDS, see render_event
+    :param request: HttpRequest of the feed
+    :return: generator of iCalendar strings, each holding up to FEED_CHUNK_SIZE events
+    """
+
+    yield "".join(fold_line(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODUCT_ID}",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        f"X-WR-TIMEZONE:{timezone.get_default_timezone_name()}",
+        f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}",
+        f"X-PUBLISHED-TTL:{REFRESH_INTERVAL}",
+    ])
+    include_address = request.user.is_authenticated
+    chunk = []
+    for event in events:
+        chunk.append(render_event(event, request, include_address))
+        if len(chunk) == FEED_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append(fold_line("END:VCALENDAR"))
+    yield "".join(chunk)
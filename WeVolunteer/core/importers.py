@@ -0,0 +1,384 @@
+"""
+importers.py
+
+Bulk import of an organization's events from CSV and iCalendar files, and of its locations from CSV files.
+Files are read one row at a time, every row is validated by EventForm, and the valid events are written with
+bulk_create one chunk at a time, each chunk in its own transaction.
+"""
+import csv
+import datetime
+import zoneinfo
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from core.forms import EventForm
+from core.models import (
+    Event,
+    EventDescriptors,
+    EventLocationDescriptors,
+    Location,
+    OrganizationContact,
+    get_time_of_day_mask,
+)
+from core.signals import handle_bulk_created_events
+
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_BATCH_SIZE = 100
+CSV_COLUMNS = [
+    "title", "date", "start_time", "end_time", "address", "description",
+    "event_descriptor_tags", "location_descriptor_tags", "primary_contact", "location",
+]
+LOCATION_CSV_COLUMNS = ["name", "address", "notes", "latitude", "longitude"]
+# separates tags in a CSV cell, since commas separate the cells
+CSV_TAG_SEPARATOR = ";"
+
+
+def get_tag_values(enum) -> dict[str, str]:
+    """
+    Get a dictionary of the lowercase values and labels of a tag Enum to its values.
+    """
+
+    return {
+        **{label.lower(): value for value, label in enum.choices},
+        **{value.lower(): value for value in enum.values},
+    }
+
+
+event_tag_values = get_tag_values(EventDescriptors)
+location_tag_values = get_tag_values(EventLocationDescriptors)
+
+
+def read_csv_rows(file):
+    """
+    Read the events of a CSV file with a header row naming CSV_COLUMNS.
+    Tags are separated by semicolons and may be given by value or label, and the primary contact by name or email.
+
+    :param file: text file object
+    :return: generator of (line number, row dictionary) tuples
+    :raises ValueError: if the header is missing a required column
+    """
+
+    reader = csv.DictReader(file)
+    missing_columns = {"title", "date", "start_time"} - set(reader.fieldnames or [])
+    if missing_columns:
+        raise ValueError(f"CSV header is missing the {', '.join(sorted(missing_columns))} column(s)")
+
+    for row in reader:
+        row = {column: (row.get(column) or "").strip() for column in CSV_COLUMNS}
+        for column in ["event_descriptor_tags", "location_descriptor_tags"]:
+            row[column] = [tag.strip() for tag in row[column].split(CSV_TAG_SEPARATOR) if tag.strip()]
+        yield reader.line_num, row
+
+
+def unfold_ics_lines(file):
+    """
+    Unfold the content lines of an iCalendar file.
+
+    :return: generator of (line number, content line) tuples
+    """
+
+    line_number, content_line = 0, None
+    for number, line in enumerate(file, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and content_line is not None:
+            content_line += line[1:]
+            continue
+        if content_line is not None:
+            yield line_number, content_line
+        line_number, content_line = number, line
+    if content_line is not None:
+        yield line_number, content_line
+
+
+def unescape_ics_text(value: str) -> str:
+    characters = []
+    escaped = False
+    for character in value:
+        if escaped:
+            characters.append("\n" if character in "nN" else character)
+            escaped = False
+        elif character == "\\":
+            escaped = True
+        else:
+            characters.append(character)
+    return "".join(characters)
+
+
+def split_ics_list(value: str) -> list[str]:
+    """
+    Split a comma separated list property value, such as CATEGORIES, respecting escaped commas.
+    """
+
+    items, item, escaped = [], "", False
+    for character in value:
+        if escaped:
+            item += "\\" + character
+            escaped = False
+        elif character == "\\":
+            escaped = True
+        elif character == ",":
+            items.append(item)
+            item = ""
+        else:
+            item += character
+    items.append(item)
+    return [unescape_ics_text(item).strip() for item in items if item.strip()]
+
+
+def parse_ics_datetime(value: str, params: dict[str, str]) -> datetime.date | datetime.datetime:
+    """
+    Parse a DTSTART or DTEND value into a date, or a naive datetime in settings.TIME_ZONE.
+    UTC times and times with a TZID are converted, while floating times are taken as local.
+
+    :raises ValueError: if the value or its TZID is invalid
+    """
+
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.datetime.strptime(value, "%Y%m%d").date()
+
+    if value.endswith("Z"):
+        parsed = datetime.datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=datetime.timezone.utc)
+    else:
+        parsed = datetime.datetime.strptime(value, "%Y%m%dT%H%M%S")
+        if "TZID" in params:
+            try:
+                parsed = parsed.replace(tzinfo=zoneinfo.ZoneInfo(params["TZID"]))
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError) as e:
+                raise ValueError(f"Unknown TZID {params['TZID']}") from e
+    if timezone.is_aware(parsed):
+        parsed = timezone.make_naive(parsed)
+    return parsed
+
+
+def get_ics_row(properties: dict[str, tuple[dict, str]]) -> dict:
+    """
+    Get the row dictionary of a VEVENT from its properties.
+    CATEGORIES matching an event or location tag become tags, and other categories are ignored.
+    """
+
+    row = {column: "" for column in CSV_COLUMNS}
+    row["title"] = unescape_ics_text(properties.get("SUMMARY", ({}, ""))[1])
+    row["address"] = unescape_ics_text(properties.get("LOCATION", ({}, ""))[1])
+    row["description"] = unescape_ics_text(properties.get("DESCRIPTION", ({}, ""))[1])
+
+    for name, column in [("DTSTART", "start_time"), ("DTEND", "end_time")]:
+        if name not in properties:
+            continue
+        params, value = properties[name]
+        try:
+            parsed = parse_ics_datetime(value, params)
+        except ValueError:
+            row[column] = value
+            continue
+        if isinstance(parsed, datetime.datetime):
+            row[column] = parsed.time()
+            if name == "DTSTART":
+                row["date"] = parsed.date()
+        elif name == "DTSTART":
+            # an all day event has no start time, which the form reports
+            row["date"] = parsed
+
+    categories = split_ics_list(properties.get("CATEGORIES", ({}, ""))[1])
+    row["event_descriptor_tags"] = [category for category in categories if category.lower() in event_tag_values]
+    row["location_descriptor_tags"] = [category for category in categories if category.lower() in location_tag_values]
+    return row
+
+
+def read_ics_rows(file):
+    """
+    Read the VEVENT components of an iCalendar file.
+
+    :param file: text file object
+    :return: generator of (line number of BEGIN:VEVENT, row dictionary) tuples
+    """
+
+    properties = None
+    event_line_number = 0
+    for line_number, line in unfold_ics_lines(file):
+        name_and_params, _, value = line.partition(":")
+        name, *param_list = name_and_params.split(";")
+        name = name.upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            properties, event_line_number = {}, line_number
+        elif name == "END" and value.upper() == "VEVENT" and properties is not None:
+            yield event_line_number, get_ics_row(properties)
+            properties = None
+        elif properties is not None and name not in properties:
+            params = {}
+            for param in param_list:
+                key, _, param_value = param.partition("=")
+                params[key.upper()] = param_value.strip('"')
+            properties[name] = (params, value)
+
+
+READERS = {
+    "csv": read_csv_rows,
+    "ics": read_ics_rows,
+}
+
+
+def get_contact_ids(organization_id: int) -> dict[str, int]:
+    """
+    Get a dictionary of the lowercase names and emails of an organization's contacts to their ids.
+    """
+
+    contact_ids = {}
+    for contact_id, name, email in OrganizationContact.objects.filter(organization_id=organization_id).values_list("id", "name", "email"):
+        contact_ids.setdefault(name.lower(), contact_id)
+        if email:
+            contact_ids.setdefault(email.lower(), contact_id)
+    return contact_ids
+
+
+def get_location_ids(organization_id: int) -> dict[str, int]:
+    """
+    Get a dictionary of the lowercase names of an organization's locations to their ids.
+    """
+
+    location_ids = {}
+    for location_id, name in Location.objects.filter(organization_id=organization_id).values_list("id", "name"):
+        location_ids.setdefault(name.lower(), location_id)
+    return location_ids
+
+
+def get_form_data(row: dict, organization_id: int, contact_ids: dict[str, int], location_ids: dict[str, int]) -> dict:
+    """
+    Get the EventForm data of a row, resolving tag labels to values, contact names or emails to ids,
+    and location names to ids.
+    Values that cannot be resolved are passed on as they are, for the form to report.
+    """
+
+    contact = row["primary_contact"]
+    if contact and not str(contact).isdigit():
+        contact = contact_ids.get(contact.lower(), contact)
+    location = row["location"]
+    if location and not str(location).isdigit():
+        location = location_ids.get(location.lower(), location)
+    return {
+        "title": row["title"],
+        "organization": organization_id,
+        "primary_contact": contact,
+        "location": location,
+        "date": row["date"],
+        "start_time": row["start_time"],
+        "end_time": row["end_time"],
+        "address": row["address"],
+        "description": row["description"],
+        "event_descriptor_tags": [event_tag_values.get(tag.lower(), tag) for tag in row["event_descriptor_tags"]],
+        "location_descriptor_tags": [location_tag_values.get(tag.lower(), tag) for tag in row["location_descriptor_tags"]],
+    }
+
+
+def format_form_errors(form: EventForm) -> str:
+    return "; ".join(
+        f"{field}: {' '.join(messages)}" if field != "__all__" else " ".join(messages)
+        for field, messages in form.errors.items()
+    )
+
+
+def save_events(events: list[Event], batch_size: int):
+    """
+    Write one chunk of validated events in a transaction, along with the work their post_save receivers would do.
+    """
+
+    with transaction.atomic():
+        Event.objects.bulk_create(events, batch_size=batch_size)
+        handle_bulk_created_events(events)
+
+
+def import_events(rows, organization_id: int, report_error, chunk_size: int = IMPORT_CHUNK_SIZE,
+                  batch_size: int = IMPORT_BATCH_SIZE, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Validate rows with EventForm, scoped to the organization like the event form of its administrators,
+    and create the valid ones in chunks.
+    Every chunk is committed on its own, so an error while writing only loses the chunk it happened in.
+
+    :param rows: iterable of (row number, row dictionary) tuples from one of the READERS
+    :param organization_id: id of the organization the events belong to
+    :param report_error: function called with the row number and error message of every invalid row
+    :param chunk_size: number of events written in each transaction
+    :param batch_size: number of events in each bulk_create INSERT
+    :param dry_run: only validate the rows
+    :return: tuple of the number of rows read and the number of events created, or that would have been
+    """
+
+    contact_ids = get_contact_ids(organization_id)
+    location_ids = get_location_ids(organization_id)
+    row_count = 0
+    created_count = 0
+    chunk = []
+    for row_number, row in rows:
+        row_count += 1
+        form = EventForm(get_form_data(row, organization_id, contact_ids, location_ids), organization_id=organization_id)
+        if not form.is_valid():
+            report_error(row_number, format_form_errors(form))
+            continue
+
+        event = form.save(commit=False)
+        # bulk_create skips Event.save, which computes the mask
+        event.time_of_day_mask = get_time_of_day_mask(event.start_time, event.end_time)
+        chunk.append(event)
+        if len(chunk) == chunk_size:
+            if not dry_run:
+                save_events(chunk, batch_size)
+            created_count += len(chunk)
+            chunk = []
+
+    if chunk and not dry_run:
+        save_events(chunk, batch_size)
+    created_count += len(chunk)
+    return row_count, created_count
+
+
+def read_location_csv_rows(file):
+    """
+    Read the locations of a CSV file with a header row naming LOCATION_CSV_COLUMNS.
+    Coordinates are decimal degrees, with negative latitudes south of the equator and negative longitudes west of
+    the prime meridian.
+
+    :param file: text file object
+    :return: generator of (line number, row dictionary) tuples
+    :raises ValueError: if the header is missing a required column
+    """
+
+    reader = csv.DictReader(file)
+    missing_columns = {"name", "latitude", "longitude"} - set(reader.fieldnames or [])
+    if missing_columns:
+        raise ValueError(f"CSV header is missing the {', '.join(sorted(missing_columns))} column(s)")
+
+    for row in reader:
+        yield reader.line_num, {column: (row.get(column) or "").strip() for column in LOCATION_CSV_COLUMNS}
+
+
+def import_locations(rows, organization_id: int, report_error, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Validate rows as Locations of an organization and create the valid ones, in one transaction.
+    Locations are saved one at a time, so they get their grid cell and their post_save receivers run.
+
+    :param rows: iterable of (row number, row dictionary) tuples from read_location_csv_rows
+    :param organization_id: id of the organization the locations belong to
+    :param report_error: function called with the row number and error message of every invalid row
+    :param dry_run: only validate the rows
+    :return: tuple of the number of rows read and the number of locations created, or that would have been
+    """
+
+    row_count = 0
+    locations = []
+    for row_number, row in rows:
+        row_count += 1
+        location = Location(organization_id=organization_id, **{column: row[column] or None for column in LOCATION_CSV_COLUMNS})
+        try:
+            location.full_clean()
+        except ValidationError as e:
+            report_error(row_number, "; ".join(f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()))
+            continue
+        locations.append(location)
+
+    if not dry_run:
+        with transaction.atomic():
+            for location in locations:
+                location.save()
+    return row_count, len(locations)
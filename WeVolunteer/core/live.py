@@ -0,0 +1,285 @@
+"""
+live.py
+
+Live event updates pushed to open pages over Server-Sent Events.
+Event changes are published on a Postgres NOTIFY channel once their transaction commits,
+and every open live updates stream LISTENs for them on its own database connection.
+Streams are async, so they are only served under ASGI, where an idle stream holds no thread.
+"""
+import asyncio
+import datetime
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+
+from datastar_py.sse import ServerSentEventGenerator
+from django.conf import settings
+from django.db import connection
+
+from WeVolunteer.utils import remove_respond_via_sse
+from core.cache import render_event_cards
+from core.models import Event
+
+
+LIVE_UPDATES_CHANNEL = "core_event_updates"
+# SSE comment lines are ignored by the browser, but writing one detects pages that have been closed
+HEARTBEAT = ": heartbeat\n\n"
+
+EVENT_CREATED = "create"
+EVENT_UPDATED = "update"
+EVENT_DELETED = "delete"
+
+
+def publish_event_change(event_id: int, organization_id: int, action: str, previous_organization_id: int | None = None,
+                         series: bool = False, cancelled_date: datetime.date | None = None):
+    """
+    Notify every open live updates stream that an event was created, updated, or deleted.
+    Call after the change is committed, since the streams load the changed event from the database.
+
+    :param event_id: id of the changed event
+    :param organization_id: id of the event's organization
+    :param action: one of EVENT_CREATED, EVENT_UPDATED, or EVENT_DELETED
+    :param previous_organization_id: optional id of the organization the event was moved from
+    :param series: whether the event is, or was, the first occurrence of a series whose occurrences may have changed
+    :param cancelled_date: optional date of an occurrence of the event's series that was cancelled or replaced
+    """
+
+    change = {"event_id": event_id, "organization_id": organization_id, "action": action}
+    if previous_organization_id is not None and previous_organization_id != organization_id:
+        change["previous_organization_id"] = previous_organization_id
+    if series:
+        change["series"] = True
+    if cancelled_date is not None:
+        change["cancelled_dates"] = [cancelled_date.isoformat()]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [LIVE_UPDATES_CHANNEL, json.dumps(change)])
+
+
+def merge_event_changes(previous: dict | None, change: dict) -> dict:
+    """
+    Coalesce a change to an event into the change to it that has not been read yet, keeping what the page still
+    needs to be told about the earlier one.
+
+    :param previous: change payload that has not been read yet, or None
+    :param change: later change payload of the same event
+    :return: coalesced change payload
+    """
+
+    if previous is None:
+        return change
+    # an event keeps reporting as created until the page has been told about it
+    if previous["action"] == EVENT_CREATED and change["action"] == EVENT_UPDATED:
+        change["action"] = EVENT_CREATED
+    if previous.get("series"):
+        change["series"] = True
+    cancelled_dates = previous.get("cancelled_dates", []) + change.get("cancelled_dates", [])
+    if cancelled_dates:
+        change["cancelled_dates"] = cancelled_dates
+    if "previous_organization_id" in previous:
+        change.setdefault("previous_organization_id", previous["previous_organization_id"])
+    return change
+
+
+def get_organization_changes(changes: dict, organization_id: int) -> dict:
+    """
+    Get the changes shown on an organization's page: the changes to its events,
+    and the removal of the events that were moved to another organization.
+
+    :param changes: dictionary of event ids to change payloads
+    :param organization_id: id of the organization
+    :return: dictionary of event ids to change payloads
+    """
+
+    organization_changes = {}
+    for event_id, change in changes.items():
+        if change["organization_id"] == organization_id:
+            organization_changes[event_id] = change
+        elif change.get("previous_organization_id") == organization_id:
+            organization_changes[event_id] = {**change, "action": EVENT_DELETED}
+    return organization_changes
+
+
+class ConnectionLimiter:
+    """
+    Thread safe count of the open live updates streams in this worker process,
+    capped at settings.LIVE_UPDATES_MAX_CONNECTIONS.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """
+        Take a stream slot, returning False if every slot is taken.
+        """
+
+        with self.lock:
+            if self.count >= settings.LIVE_UPDATES_MAX_CONNECTIONS:
+                return False
+            self.count += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.count -= 1
+
+
+live_connections = ConnectionLimiter()
+
+
+def open_listen_connection():
+    """
+    Open a dedicated autocommit database connection that LISTENs on the live updates channel.
+    """
+
+    listen_connection = connection.get_new_connection(connection.get_connection_params())
+    try:
+        listen_connection.autocommit = True
+        with listen_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {LIVE_UPDATES_CHANNEL}")
+    except Exception:
+        listen_connection.close()
+        raise
+    return listen_connection
+
+
+async def listen_for_event_changes(heartbeat_seconds: float, max_pending: int):
+    """
+    LISTEN for event changes on a dedicated autocommit connection and yield them in batches.
+    The connection is watched by the event loop, so waiting for a change holds no thread.
+    The next batch is only read once the previous one has been consumed, so a slow page applies backpressure
+    and its changes pile up on the connection. Repeated changes to the same event are coalesced into the latest one.
+
+    :param heartbeat_seconds: seconds to wait for a change before yielding an empty batch
+    :param max_pending: maximum number of changed events in a batch
+    :return: async generator of dictionaries of event ids to change payloads, empty when the wait timed out,
+        ending with None if more than max_pending events changed before the batch was read
+    """
+
+    listen_connection = await sync_to_async(open_listen_connection, thread_sensitive=False)()
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+    loop.add_reader(listen_connection.fileno(), readable.set)
+    try:
+        # the first empty batch tells the caller that the stream is listening
+        yield {}
+
+        while True:
+            if not listen_connection.notifies:
+                try:
+                    await asyncio.wait_for(readable.wait(), heartbeat_seconds)
+                except TimeoutError:
+                    pass
+            readable.clear()
+            # only reads what has already arrived, so it does not block the event loop
+            listen_connection.poll()
+
+            changes = {}
+            while listen_connection.notifies:
+                change = json.loads(listen_connection.notifies.pop(0).payload)
+                changes[change["event_id"]] = merge_event_changes(changes.get(change["event_id"]), change)
+                if len(changes) > max_pending:
+                    yield None
+                    return
+            yield changes
+    finally:
+        loop.remove_reader(listen_connection.fileno())
+        listen_connection.close()
+
+
+def get_occurrence_cards_selector(event_id: int) -> str:
+    """
+    Get the selector of the cards of every other occurrence of a series, whose ids end with their date.
+    """
+
+    return f'[id^="event-card-{event_id}-"]'
+
+
+def render_event_changes(request, changes: dict) -> list[str]:
+    """
+    Get the SSEs that apply a batch of event changes to a page.
+    Updated event cards are morphed in place by their id and deleted ones are removed, along with the cards of their
+    other occurrences. Created events only set the live_new_events signal, since where a new card belongs depends on
+    what the page has loaded.
+    For the same reason, when a series changes its occurrence cards are removed and live_new_events is set,
+    since its new rule may put occurrences on other dates. The card of a cancelled occurrence is just removed.
+
+    :param request: HttpRequest of the viewer
+    :param changes: dictionary of event ids to change payloads
+    :return: list of SSE strings
+    """
+
+    sse_events = []
+    if any(change["action"] == EVENT_CREATED or change.get("series") for change in changes.values()):
+        sse_events.append(ServerSentEventGenerator.patch_signals({"live_new_events": True}))
+
+    updated_ids = [event_id for event_id, change in changes.items() if change["action"] == EVENT_UPDATED]
+    events = list(Event.objects.filter(id__in=updated_ids).select_related("organization", "primary_contact"))
+    for card in render_event_cards(events, request):
+        sse_events.append(ServerSentEventGenerator.patch_elements(card))
+
+    # events deleted before their update was read are removed as well
+    found_ids = {event.id for event in events}
+    for event_id, change in changes.items():
+        selectors = []
+        if change["action"] == EVENT_DELETED or (change["action"] == EVENT_UPDATED and event_id not in found_ids):
+            selectors += [f"#event-card-{event_id}", get_occurrence_cards_selector(event_id)]
+        elif change.get("series"):
+            selectors.append(get_occurrence_cards_selector(event_id))
+        else:
+            selectors += [
+                f"#event-card-{event_id}-{datetime.date.fromisoformat(date):%Y%m%d}"
+                for date in change.get("cancelled_dates", [])
+            ]
+        if selectors:
+            sse_events.append(remove_respond_via_sse(", ".join(selectors)).content.decode("utf-8"))
+
+    return sse_events
+
+
+class LiveEventUpdates:
+    """
+    Async iterable live updates stream for a StreamingHttpResponse served under ASGI.
+    It holds a live_connections slot, taken before it is created, until the stream ends or the response is closed,
+    even if the response is closed before streaming starts. When the page is closed, the ASGI handler cancels the
+    stream instead of closing the response, so the stream also releases the slot itself.
+    """
+
+    def __init__(self, request, organization_id: int | None = None):
+        self.request = request
+        self.organization_id = organization_id
+        self.stream = self.generate()
+        self.closed = False
+
+    def __aiter__(self):
+        return self.stream
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            live_connections.release()
+
+    async def generate(self):
+        try:
+            changes_batches = listen_for_event_changes(
+                settings.LIVE_UPDATES_HEARTBEAT_SECONDS, settings.LIVE_UPDATES_MAX_PENDING
+            )
+            try:
+                async for changes in changes_batches:
+                    if changes is None:
+                        yield ServerSentEventGenerator.patch_signals({"live_updates_stale": True})
+                        return
+
+                    if self.organization_id is not None:
+                        changes = get_organization_changes(changes, self.organization_id)
+                    if not changes:
+                        yield HEARTBEAT
+                        continue
+
+                    yield "".join(await sync_to_async(render_event_changes)(self.request, changes))
+            finally:
+                await changes_batches.aclose()
+        finally:
+            self.close()
@@ -0,0 +1,153 @@
+"""
+locations.py
+
+Spatial lookups of event locations for the events near me filter.
+A radius search first scans an index for the locations in the bounding box of the circle, then checks the exact
+great circle distance of only those candidates.
+The bounding box is searched with the earthdistance GiST index where the extension is installed
+(see core.migrations.0018_locations), and otherwise with the (grid_cell, latitude, longitude) index: the grid cells
+overlapping the box are listed in Python as one range of cell numbers per grid row.
+"""
+import math
+from functools import cache
+
+from django.db import connection
+from django.db.models import BooleanField, F, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+from core.models import GRID_CELL_DEGREES, GRID_COLUMNS, Location, get_grid_row
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_MILE = 1.609344
+# radius choices of the events near me filter, in miles
+NEAR_ME_RADIUS_MILES = [5, 10, 25, 50, 100]
+EARTH_INDEX_NAME = "location_earth_gist_idx"
+
+
+def get_bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, list[tuple[float, float]]]:
+    """
+    Get the bounding box of the circle around a point.
+    The box is split in two where it crosses the antimeridian, and spans every longitude when it reaches a pole.
+
+    :return: tuple of the southern and northern latitudes and a list of (western, eastern) longitude ranges
+    """
+
+    angle = radius_km / EARTH_RADIUS_KM
+    south = latitude - math.degrees(angle)
+    north = latitude + math.degrees(angle)
+    if south <= -90 or north >= 90 or math.sin(angle) >= math.cos(math.radians(latitude)):
+        return max(south, -90), min(north, 90), [(-180, 180)]
+
+    # the widest point of the circle is where a great circle through its center touches it, not on its own latitude
+    half_width = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+    west, east = longitude - half_width, longitude + half_width
+    if west < -180:
+        return south, north, [(west + 360, 180), (-180, east)]
+    if east > 180:
+        return south, north, [(west, 180), (-180, east - 360)]
+    return south, north, [(west, east)]
+
+
+def get_grid_column_bound(longitude: float) -> int:
+    return min(int(math.floor((longitude + 180) / GRID_CELL_DEGREES)), GRID_COLUMNS - 1)
+
+
+def get_grid_cell_ranges(south: float, north: float, longitude_ranges: list[tuple[float, float]]) -> list[tuple[int, int]]:
+    """
+    Get the ranges of grid cell numbers overlapping a bounding box, one per grid row and longitude range,
+    with adjacent ranges merged, so a box spanning every longitude is a single range.
+
+    :return: sorted list of inclusive (first cell, last cell) ranges
+    """
+
+    ranges = []
+    for row in range(get_grid_row(south), get_grid_row(north) + 1):
+        for west, east in longitude_ranges:
+            ranges.append((row * GRID_COLUMNS + get_grid_column_bound(west), row * GRID_COLUMNS + get_grid_column_bound(east)))
+
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def get_distance_km_expression(latitude: float, longitude: float):
+    """
+    Get an expression of the haversine distance from a point to a Location's coordinates, in kilometers.
+    """
+
+    latitude_radians = math.radians(latitude)
+    half_latitude_difference = (Radians(F("latitude")) - latitude_radians) / 2
+    half_longitude_difference = (Radians(F("longitude")) - math.radians(longitude)) / 2
+    haversine = (
+        Power(Sin(half_latitude_difference), 2)
+        + math.cos(latitude_radians) * Cos(Radians(F("latitude"))) * Power(Sin(half_longitude_difference), 2)
+    )
+    # rounding can push the haversine of antipodal points just past 1
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(haversine, Value(1.0))))
+
+
+@cache
+def has_earth_index() -> bool:
+    """
+    Check whether the database has the earthdistance index of the locations, which is only created where
+    the extension is available (see core.migrations.0018_locations).
+    Checked once per process, on the first radius search, since only migrations create or drop the index.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [EARTH_INDEX_NAME])
+        return cursor.fetchone() is not None
+
+
+def get_locations_within(latitude: float, longitude: float, radius_km: float):
+    """
+    Get a queryset of the locations within a radius of a point, annotated with their distance in kilometers.
+
+    :param latitude: latitude of the point, in degrees
+    :param longitude: longitude of the point, in degrees
+    :param radius_km: radius in kilometers
+    """
+
+    south, north, longitude_ranges = get_bounding_box(latitude, longitude, radius_km)
+    queryset = Location.objects.all()
+    if has_earth_index():
+        # earth() is the extension's earth radius in meters, so the box is scaled to the same angle as radius_km
+        queryset = queryset.filter(RawSQL(
+            "earth_box(ll_to_earth(%s, %s), %s * earth()) @> ll_to_earth(latitude, longitude)",
+            (latitude, longitude, radius_km / EARTH_RADIUS_KM),
+            output_field=BooleanField(),
+        ))
+    else:
+        cells_q = Q()
+        for first, last in get_grid_cell_ranges(south, north, longitude_ranges):
+            cells_q |= Q(grid_cell__range=(first, last))
+        queryset = queryset.filter(cells_q)
+
+    longitudes_q = Q()
+    for west, east in longitude_ranges:
+        longitudes_q |= Q(longitude__range=(west, east))
+    return (
+        queryset.filter(longitudes_q, latitude__range=(south, north))
+        .annotate(distance=get_distance_km_expression(latitude, longitude))
+        .filter(distance__lte=radius_km)
+    )
+
+
+def near_q(latitude: float, longitude: float, radius_miles: float) -> Q:
+    """
+    Get a Q object matching Events at a location within a radius of a point.
+    The locations are a subquery, but building the Q object runs has_earth_index, which queries the database once
+    per process, so async views build it in a thread.
+
+    :param latitude: latitude of the point, in degrees
+    :param longitude: longitude of the point, in degrees
+    :param radius_miles: radius in miles
+    """
+
+    return Q(location__in=get_locations_within(latitude, longitude, radius_miles * KM_PER_MILE).values("id"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """
+    Management command.
+    Run one of the performance benchmarks in the benchmarks package against a throwaway, seeded database.
+    """
+
+    help = "Run a performance benchmark against a throwaway, seeded database."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="benchmark", required=True)
+        for name, module in BENCHMARKS.items():
+            subparser = subparsers.add_parser(name, help=module.__doc__.strip().splitlines()[0])
+            module.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        BENCHMARKS[options["benchmark"]].run(options, self.stdout)
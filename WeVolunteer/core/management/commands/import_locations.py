@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import import_locations, read_location_csv_rows
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    """
+    Management command.
+    Import an organization's locations, with their coordinates, from a CSV file.
+    """
+
+    help = "Import an organization's locations from a CSV file with name, address, notes, latitude, and longitude columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument("--organization", type=int, required=True, help="Id of the organization the locations belong to")
+        parser.add_argument("--dry-run", action="store_true", help="Only validate the file")
+
+    def handle(self, *args, **options):
+        organization = Organization.objects.filter(id=options["organization"]).first()
+        if organization is None:
+            raise CommandError(f"Organization {options['organization']} does not exist")
+
+        error_count = 0
+
+        def report_error(row_number, message):
+            nonlocal error_count
+            error_count += 1
+            self.stdout.write(self.style.ERROR(f"Row {row_number}: {message}"))
+
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as file:
+                row_count, created_count = import_locations(
+                    read_location_csv_rows(file), organization.id, report_error, dry_run=options["dry_run"]
+                )
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            raise CommandError(str(e)) from e
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {created_count} of {row_count} locations for {organization}, {error_count} rows with errors"
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_alter_organization_website'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='organization',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.organization'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='primary_contact',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.organizationcontact'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'start_time', 'title'], name='event_date_start_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organization', '-date', 'start_time', 'title'], name='event_org_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('primary_contact__isnull', False)), fields=['primary_contact'], name='event_primary_contact_idx'),
+        ),
+    ]
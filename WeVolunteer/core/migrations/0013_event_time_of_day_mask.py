@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:51
+
+import datetime
+
+from django.db import migrations, models
+
+
+# frozen copy of the TimeOfDay blocks and bits at the time of this migration, so it does not depend on core.models
+TIME_OF_DAY_RANGES = [
+    (datetime.time(0, 0, 0), datetime.time(5, 59, 59)),
+    (datetime.time(6, 0, 0), datetime.time(9, 59, 59)),
+    (datetime.time(10, 0, 0), datetime.time(11, 59, 59)),
+    (datetime.time(12, 0, 0), datetime.time(13, 59, 59)),
+    (datetime.time(14, 0, 0), datetime.time(17, 59, 59)),
+    (datetime.time(18, 0, 0), datetime.time(19, 59, 59)),
+    (datetime.time(20, 0, 0), datetime.time(23, 59, 59)),
+]
+
+
+def get_time_of_day_mask(time_1, time_2=None):
+    """
+    Get the TimeOfDay bitmask for the range of given datetime.time objects, bit i set for the i-th block.
+    """
+
+    mask = 0
+    for bit, (start, end) in enumerate(TIME_OF_DAY_RANGES):
+        if (start <= time_1 <= end) if not time_2 else (time_1 <= end and time_2 >= start):
+            mask |= 1 << bit
+    return mask
+
+
+def backfill_time_of_day_mask(apps, schema_editor):
+    """
+    Compute the time of day mask for every existing Event.
+    """
+
+    Event = apps.get_model('core', 'Event')
+    batch = []
+    for event in Event.objects.only('id', 'start_time', 'end_time').iterator(chunk_size=2000):
+        event.time_of_day_mask = get_time_of_day_mask(event.start_time, event.end_time)
+        batch.append(event)
+        if len(batch) >= 2000:
+            Event.objects.bulk_update(batch, ['time_of_day_mask'])
+            batch = []
+    Event.objects.bulk_update(batch, ['time_of_day_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_event_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='time_of_day_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_time_of_day_mask, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['time_of_day_mask', 'date'], name='event_time_of_day_date_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:53
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_event_time_of_day_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['event_descriptor_tags'], name='event_descriptor_tags_gin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['location_descriptor_tags'], name='event_location_tags_gin_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Each trigger rebuilds the row's weighted search vector whenever a searched column is written.
+# search_vector is included in the column list so that a plain model save, which writes it as NULL, recomputes it.
+SEARCH_TRIGGERS = [
+    ('core_event', 'title', 'description'),
+    ('core_organization', 'name', 'about'),
+]
+
+
+def create_search_trigger_sql(table, heading_column, body_column):
+    return f"""
+        CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('pg_catalog.english', coalesce(NEW.{heading_column}, '')), 'A')
+                || setweight(to_tsvector('pg_catalog.english', coalesce(NEW.{body_column}, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER {table}_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF {heading_column}, {body_column}, search_vector ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+
+        -- fires the trigger for every existing row
+        UPDATE {table} SET search_vector = NULL;
+    """
+
+
+def drop_search_trigger_sql(table, heading_column, body_column):
+    return f"""
+        DROP TRIGGER {table}_search_vector_trigger ON {table};
+        DROP FUNCTION {table}_search_vector_update();
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_event_tag_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        *[
+            migrations.RunSQL(create_search_trigger_sql(*trigger), drop_search_trigger_sql(*trigger))
+            for trigger in SEARCH_TRIGGERS
+        ],
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='event_search_gin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='organization_search_gin_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly')], default='WEEKLY', max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('weekdays', models.PositiveSmallIntegerField(default=0)),
+                ('until', models.DateField(blank=True, null=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence', to='core.event')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventOccurrenceException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('replacement', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replaced_occurrence', to='core.event')),
+                ('recurrence', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='core.eventrecurrence')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('recurrence', 'date'), name='occurrence_exception_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:03
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import DatabaseError, migrations, models, transaction
+
+
+# ll_to_earth() points of the locations, indexed with the cube GiST operator class so that an earth_box() around
+# a point can be searched directly. The earthdistance extension ships with Postgres' contrib modules, which are
+# not always installed, so the index is only created where the extension can be, and core.locations falls back
+# to location_grid_idx without it.
+EARTH_INDEX_SQL = """
+    CREATE INDEX location_earth_gist_idx ON core_location USING gist (ll_to_earth(latitude, longitude));
+"""
+
+
+def create_earth_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_available_extensions WHERE name IN ('cube', 'earthdistance')")
+        if cursor.fetchone()[0] < 2:
+            return
+        try:
+            # a savepoint, so a role that may not create extensions only skips the index
+            with transaction.atomic(using=connection.alias):
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS cube")
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+        except DatabaseError:
+            return
+        cursor.execute(EARTH_INDEX_SQL)
+
+
+def drop_earth_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS location_earth_gist_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('address', models.TextField(blank=True, max_length=255, null=True)),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='address notes')),
+                ('latitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)])),
+                ('longitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)])),
+                ('grid_cell', models.PositiveIntegerField(default=0, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.organization')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='location',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.location'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('location__isnull', False)), fields=['location'], name='event_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['grid_cell', 'latitude', 'longitude'], name='location_grid_idx'),
+        ),
+        migrations.RunPython(create_earth_index, drop_earth_index),
+    ]
@@ -1,8 +1,12 @@
 import datetime
+import math
 from random import choices
 
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from django.db.models import TextChoices
@@ -103,6 +107,58 @@ def point_in_range(point, range_start, range_end):
     return range_start <= point <= range_end
 
 
+# TimeOfDay bitmask, bit i is set for the i-th TimeOfDay block
+time_of_day_bits = {time_of_day: 1 << i for i, time_of_day in enumerate(TimeOfDay)}
+
+# every mask a stored Event can have: no blocks, or one contiguous run of blocks
+possible_time_of_day_masks = [0] + [
+    sum(1 << bit for bit in range(first, last + 1))
+    for first in range(len(TimeOfDay))
+    for last in range(first, len(TimeOfDay))
+]
+
+# TimeOfDay Enum lists for every 7 bit mask, precomputed so decoding a stored mask is a lookup
+time_of_day_mask_enum_lists = [
+    [time_of_day for time_of_day, bit in time_of_day_bits.items() if mask & bit]
+    for mask in range(1 << len(TimeOfDay))
+]
+
+
+def get_minute_of_day(time: datetime.time) -> int:
+    return time.hour * 60 + time.minute
+
+
+# Every TimeOfDay block starts on a whole minute and ends on the last second of a minute, so whether a block
+# starts before or ends after a time only depends on the minute of the time.
+# For every minute of the day, the mask of the blocks ending at or after it, and of the blocks starting at or before it.
+# A range overlaps the blocks ending after its start and starting before its end.
+time_of_day_ending_masks = [
+    sum(time_of_day_bits[time_of_day] for time_of_day, (start, end) in time_of_day_ranges.items()
+        if get_minute_of_day(end) >= minute)
+    for minute in range(24 * 60)
+]
+time_of_day_starting_masks = [
+    sum(time_of_day_bits[time_of_day] for time_of_day, (start, end) in time_of_day_ranges.items()
+        if get_minute_of_day(start) <= minute)
+    for minute in range(24 * 60)
+]
+
+
+def get_time_of_day_mask(time_1: datetime.time, time_2: datetime.time=None) -> int:
+    """
+    Get the TimeOfDay bitmask for the range of given datetime.time objects.
+    Accepts the same arguments as get_time_of_day_enum_list.
+
+    :param time_1: start of the range
+    :param time_2: end of the range
+    :return: bitmask with a bit set for each TimeOfDay block the range overlaps
+    """
+
+    if not time_2:
+        time_2 = time_1
+    return time_of_day_ending_masks[get_minute_of_day(time_1)] & time_of_day_starting_masks[get_minute_of_day(time_2)]
+
+
 def get_time_of_day_enum_list(time_1 : datetime.time, time_2 : datetime.time=None) -> list[TimeOfDay]:
     """
     Get a list of TimeOfDay Enum objects that the range of given datetime.time objects overlap with.
@@ -113,18 +169,64 @@ def get_time_of_day_enum_list(time_1 : datetime.time, time_2 : datetime.time=Non
     :return: list of TimeOfDay Enum objects
     """
 
-    if not time_2:
-        time = time_1
-        for key, value in time_of_day_ranges.items():
-            if point_in_range(time, value[0], value[1]):
-                return [key]
-    else:
-        enum_list = []
-        for key, value in time_of_day_ranges.items():
-            if ranges_overlap(time_1, time_2, value[0], value[1]):
-                enum_list.append(key)
+    return list(time_of_day_mask_enum_lists[get_time_of_day_mask(time_1, time_2)])
+
 
-        return enum_list
+def get_time_of_day_masks(start_minutes, end_minutes):
+    """
+    Get the TimeOfDay bitmasks of many time ranges at once with NumPy, for reports and backfills over many events.
+    The ranges are given as minutes of the day, as from get_minute_of_day or computed by the database,
+    so no datetime.time objects are created.
+
+    :param start_minutes: array-like of the minute of the day each range starts
+    :param end_minutes: array-like of the minute of the day each range ends, which is the start minute for a range
+        without an end time
+    :return: NumPy array of the bitmask of each range, in the same order
+    """
+
+    import numpy
+
+    ending_masks = numpy.array(time_of_day_ending_masks, dtype=numpy.uint8)
+    starting_masks = numpy.array(time_of_day_starting_masks, dtype=numpy.uint8)
+    return ending_masks[numpy.asarray(start_minutes, dtype=numpy.intp)] & starting_masks[numpy.asarray(end_minutes, dtype=numpy.intp)]
+
+
+def time_of_day_q(times_of_day) -> models.Q:
+    """
+    Get a Q object matching Events that overlap any of the given TimeOfDay blocks.
+    Stored masks can only take a few values, so the match is an IN list that the time_of_day_mask index can serve.
+
+    :param times_of_day: iterable of TimeOfDay Enum objects or values
+    :return: Q object filtering on Event.time_of_day_mask
+    """
+
+    wanted = 0
+    for time_of_day in times_of_day:
+        wanted |= time_of_day_bits[TimeOfDay(time_of_day)]
+    return models.Q(time_of_day_mask__in=[mask for mask in possible_time_of_day_masks if mask & wanted])
+
+
+# Locations are bucketed into a grid of GRID_CELL_DEGREES square cells, numbered row by row from the south west corner,
+# so the cells around a point can be listed in Python and looked up with the Location grid index (see core.locations)
+GRID_CELL_DEGREES = 0.25
+GRID_ROWS = round(180 / GRID_CELL_DEGREES)
+GRID_COLUMNS = round(360 / GRID_CELL_DEGREES)
+
+
+def get_grid_row(latitude: float) -> int:
+    return min(int(math.floor((latitude + 90) / GRID_CELL_DEGREES)), GRID_ROWS - 1)
+
+
+def get_grid_column(longitude: float) -> int:
+    return int(math.floor((longitude + 180) / GRID_CELL_DEGREES)) % GRID_COLUMNS
+
+
+def get_grid_cell(latitude: float, longitude: float) -> int:
+    """
+    Get the number of the grid cell containing the given coordinates, in degrees.
+    """
+
+    return get_grid_row(latitude) * GRID_COLUMNS + get_grid_column(longitude)
 
 
 class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
@@ -159,6 +261,17 @@ class Organization(models.Model):
     name = models.CharField(max_length=255, unique=True)
     website = models.URLField(blank=True, null=True)
     about = models.TextField(null=True, blank=True)
+    # weighted full text of name and about, maintained by a database trigger (see core.migrations.0015)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # also touched whenever one of the organization's events or contacts changes (see core.signals)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='organization_search_gin_idx'),
+            # the latest change across every organization validates the site wide pages (see core.conditional)
+            models.Index(fields=['updated_at'], name='organization_updated_at_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -172,6 +285,7 @@ class OrganizationContact(models.Model):
     email = models.EmailField(null=True, blank=True)
     phone = models.CharField(max_length=50, null=True, blank=True, verbose_name='phone number')
     notes = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name + " (" + self.organization.name + ")"
@@ -186,17 +300,55 @@ class OrganizationAdministrator(models.Model):
 
 
 
+class Location(models.Model):
+    """
+    A place where an organization holds events, with the coordinates used to find events near a point.
+    Coordinates are entered or imported along with the location, so displaying and filtering never geocodes.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+    address = models.TextField(max_length=255, null=True, blank=True)
+    notes = models.TextField(null=True, blank=True, verbose_name='address notes')
+    latitude = models.FloatField(validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    # cell of the grid containing the coordinates, computed on save
+    grid_cell = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # radius searches list the grid cells overlapping the circle's bounding box, then check the coordinates
+            models.Index(fields=['grid_cell', 'latitude', 'longitude'], name='location_grid_idx'),
+        ]
+
+    def __str__(self):
+        return self.name + " (" + self.organization.name + ")"
+
+    def save(self, *args, **kwargs):
+        self.grid_cell = get_grid_cell(self.latitude, self.longitude)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            extra_fields = {'updated_at'}
+            if {'latitude', 'longitude'} & set(update_fields):
+                extra_fields.add('grid_cell')
+            kwargs['update_fields'] = {*update_fields, *extra_fields}
+
+        super().save(*args, **kwargs)
+
+
 class Event(models.Model):
     """
     A single Volunteer event.
     """
     title = models.CharField(max_length=255)
-    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
-    primary_contact = models.ForeignKey(OrganizationContact, blank=True, null=True, on_delete=models.SET_NULL)
+    # foreign key lookups are served by the composite and partial indexes in Meta.indexes
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, db_index=False)
+    primary_contact = models.ForeignKey(OrganizationContact, blank=True, null=True, on_delete=models.SET_NULL, db_index=False)
     date = models.DateField()
     start_time = models.TimeField(verbose_name='start time')
     end_time = models.TimeField(verbose_name='end time', null=True, blank=True)
-    # TODO: add Location model foreign key with location name, address, and address notes - can do active search for locations when choosing, or maybe just google maps api integration
+    location = models.ForeignKey(Location, blank=True, null=True, on_delete=models.SET_NULL, db_index=False)
     address = models.TextField(max_length=255, null=True, blank=True)
     event_descriptor_tags = MultipleChoiceArrayField(
         models.CharField(max_length=50, choices=EventDescriptors),
@@ -209,10 +361,110 @@ class Event(models.Model):
         blank=True,
     )
     description = models.TextField(null=True, blank=True)
+    # TimeOfDay bitmask computed from start_time and end_time on save
+    time_of_day_mask = models.PositiveSmallIntegerField(default=0, editable=False)
+    # weighted full text of title and description, maintained by a database trigger (see core.migrations.0015)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # set on the unsaved copies made for the occurrences of a recurring event (see core.recurrence)
+    is_occurrence = False
+
+    class Meta:
+        indexes = [
+            # date range scans sorted the way every event list is displayed
+            models.Index(fields=['date', 'start_time', 'title'], name='event_date_start_title_idx'),
+            # per organization lists, sorted the way past events are displayed
+            models.Index(fields=['organization', '-date', 'start_time', 'title'], name='event_org_date_idx'),
+            # events are only looked up by a given contact, never by a missing one, so events without a contact are left out
+            models.Index(
+                fields=['primary_contact'],
+                condition=models.Q(primary_contact__isnull=False),
+                name='event_primary_contact_idx',
+            ),
+            # likewise for locations, which the events near me filter looks events up by
+            models.Index(
+                fields=['location'],
+                condition=models.Q(location__isnull=False),
+                name='event_location_idx',
+            ),
+            # time of day filters, usually combined with a date range
+            models.Index(fields=['time_of_day_mask', 'date'], name='event_time_of_day_date_idx'),
+            # descriptor tag filters and facet counts use the array operators (&&, @>)
+            GinIndex(fields=['event_descriptor_tags'], name='event_descriptor_tags_gin_idx'),
+            GinIndex(fields=['location_descriptor_tags'], name='event_location_tags_gin_idx'),
+            GinIndex(fields=['search_vector'], name='event_search_gin_idx'),
+        ]
 
     def __str__(self):
         return self.title + ' - ' + self.organization.__str__() + ' - ' + self.date.strftime('%m/%d/%Y')
 
+    def save(self, *args, **kwargs):
+        start_time = self._meta.get_field('start_time').to_python(self.start_time)
+        end_time = self._meta.get_field('end_time').to_python(self.end_time)
+        self.time_of_day_mask = get_time_of_day_mask(start_time, end_time)
+
+        update_fields = kwargs.get('update_fields')
+        # auto_now fields are only written when they are in update_fields, and an empty update_fields saves nothing
+        if update_fields:
+            extra_fields = {'updated_at'}
+            if {'start_time', 'end_time'} & set(update_fields):
+                extra_fields.add('time_of_day_mask')
+            kwargs['update_fields'] = {*update_fields, *extra_fields}
+
+        super().save(*args, **kwargs)
+
     def time_of_day(self):
-        return get_time_of_day_enum_list(self.start_time, self.end_time)
+        return list(time_of_day_mask_enum_lists[self.time_of_day_mask])
+
 
+class RecurrenceFrequency(TextChoices):
+    """
+    Enumeration for how often a recurring event repeats.
+    """
+
+    DAILY = "DAILY", "Daily"
+    WEEKLY = "WEEKLY", "Weekly"
+    MONTHLY = "MONTHLY", "Monthly"
+
+
+class EventRecurrence(models.Model):
+    """
+    An RRULE style rule repeating an Event, which is stored as the first occurrence of the series.
+    The other occurrences are not stored, they are expanded for the date window being displayed (see core.recurrence).
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='recurrence')
+    frequency = models.CharField(max_length=10, choices=RecurrenceFrequency, default=RecurrenceFrequency.WEEKLY)
+    # repeats every interval days, weeks, or months
+    interval = models.PositiveSmallIntegerField(default=1)
+    # weekly rules only: bitmask of the weekdays to repeat on, bit 0 is Monday, or 0 for the weekday of the event
+    weekdays = models.PositiveSmallIntegerField(default=0)
+    # last date an occurrence may fall on, or None to repeat indefinitely
+    until = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_frequency_display()} - {self.event}"
+
+
+class EventOccurrenceException(models.Model):
+    """
+    A change to a single occurrence of a recurring event. Only changed occurrences are stored:
+    an exception without a replacement cancels its occurrence, and one with a replacement moves it to a stored Event.
+    """
+    # foreign key lookups are served by the unique constraint in Meta.constraints
+    recurrence = models.ForeignKey(EventRecurrence, on_delete=models.CASCADE, related_name='exceptions', db_index=False)
+    # date the occurrence would have fallen on
+    date = models.DateField()
+    # deleting the replacement leaves the occurrence cancelled
+    replacement = models.OneToOneField(
+        Event, null=True, blank=True, on_delete=models.SET_NULL, related_name='replaced_occurrence'
+    )
+
+    class Meta:
+        constraints = [
+            # also serves the lookups of the exceptions in a date window
+            models.UniqueConstraint(fields=['recurrence', 'date'], name='occurrence_exception_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.recurrence.event.title} - {self.date.strftime('%m/%d/%Y')}"
@@ -0,0 +1,486 @@
+"""
+recurrence.py
+
+Lazy expansion of recurring events.
+A recurring event is stored once, as the first occurrence of its series, along with an EventRecurrence rule.
+Its other occurrences are never stored: they are expanded only for the date window being displayed, as unsaved copies
+of the first occurrence with their own date. Changed occurrences are stored sparsely, as EventOccurrenceExceptions.
+Occurrence dates are computed as ranges of date ordinals, so expanding a window costs a few arithmetic operations per
+series no matter how many occurrences fall in it, and only the occurrences that are displayed become Event instances.
+"""
+import calendar
+import datetime
+import heapq
+import operator
+
+from asgiref.sync import sync_to_async
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.base import ModelState
+from django.utils import timezone
+
+from core.cache import get_series_count
+from core.models import Event, EventOccurrenceException, EventRecurrence, RecurrenceFrequency
+
+
+# occurrences are listed in the current month and the months after it up to the horizon,
+# so series without an end date do not make the upcoming event lists endless
+RECURRENCE_HORIZON_MONTHS = 12
+# values() lookups of a series' first occurrence date and rule, in get_occurrence_ordinals argument order
+SERIES_RULE_FIELDS = ['date', 'recurrence__frequency', 'recurrence__interval', 'recurrence__weekdays', 'recurrence__until']
+# the (date, start_time, title, id) order of every event list, for values() rows
+values_sort_key = operator.itemgetter('date', 'start_time', 'title', 'id')
+
+
+def get_recurrence_horizon(today: datetime.date) -> datetime.date:
+    """
+    Get the first day of the first month in which occurrences are no longer listed.
+    """
+
+    return today.replace(day=1) + relativedelta(months=+RECURRENCE_HORIZON_MONTHS)
+
+
+def has_series() -> bool:
+    """
+    Check whether any recurring event series exists, with the cached series count,
+    so the event lists of a site without recurring events make no extra queries.
+    """
+
+    return get_series_count(EventRecurrence.objects.count) > 0
+
+
+async def ahas_series() -> bool:
+    """
+    Async version of has_series.
+    """
+
+    return await sync_to_async(has_series)()
+
+
+def get_occurrence_ordinals(first_date: datetime.date, frequency: str, interval: int, weekdays: int,
+                            until: datetime.date | None, start: int, end: int) -> list:
+    """
+    Get the date ordinals of a series' occurrences within a window, leaving out the first occurrence,
+    which is the stored event itself.
+    Daily and weekly rules give one range per weekday, so their cost does not depend on the length of the window,
+    while monthly rules list their few dates.
+
+    :param first_date: datetime.date of the first occurrence
+    :param frequency: RecurrenceFrequency value
+    :param interval: number of days, weeks, or months between occurrences
+    :param weekdays: weekday bitmask of a weekly rule, bit 0 is Monday, or 0 for the weekday of the first occurrence
+    :param until: optional datetime.date of the last possible occurrence
+    :param start: ordinal of the first day of the window
+    :param end: ordinal of the day after the window
+    :return: list of ascending sequences of ordinals, ranges or lists, that together hold every occurrence
+    """
+
+    first = first_date.toordinal()
+    start = max(start, first + 1)
+    if until is not None:
+        end = min(end, until.toordinal() + 1)
+    if start >= end:
+        return []
+
+    if frequency == RecurrenceFrequency.DAILY:
+        return [range(first + -(-(start - first) // interval) * interval, end, interval)]
+
+    if frequency == RecurrenceFrequency.WEEKLY:
+        step = 7 * interval
+        # weeks start on Monday, like the RRULE default, and are counted from the week of the first occurrence
+        week_start = first - first_date.weekday()
+        weekdays = weekdays or 1 << first_date.weekday()
+        sequences = []
+        for weekday in range(7):
+            if weekdays & (1 << weekday):
+                origin = week_start + weekday
+                sequences.append(range(origin + max(0, -(-(start - origin) // step)) * step, end, step))
+        return sequences
+
+    # monthly rules repeat on the day of the month of the first occurrence, skipping months without that day
+    day = first_date.day
+    first_month = first_date.year * 12 + first_date.month - 1
+    start_date = datetime.date.fromordinal(start)
+    month = start_date.year * 12 + start_date.month - 1
+    month = first_month + max(0, -(-(month - first_month) // interval)) * interval
+    ordinals = []
+    while True:
+        year, month_index = divmod(month, 12)
+        if year > datetime.MAXYEAR or datetime.date(year, month_index + 1, 1).toordinal() >= end:
+            break
+        if day <= calendar.monthrange(year, month_index + 1)[1]:
+            ordinal = datetime.date(year, month_index + 1, day).toordinal()
+            if start <= ordinal < end:
+                ordinals.append(ordinal)
+        month += interval
+    return [ordinals]
+
+
+def get_series_queryset(start: datetime.date, end: datetime.date, filter_q: Q = Q()):
+    """
+    Get a queryset of the first occurrences of the series matching filter_q that may have occurrences in a window.
+
+    :param start: datetime.date of the first day of the window
+    :param end: datetime.date of the day after the window
+    :param filter_q: optional Q object of Event filters
+    """
+
+    return (
+        Event.objects.filter(filter_q, recurrence__isnull=False, date__lt=end)
+        .filter(Q(recurrence__until__isnull=True) | Q(recurrence__until__gte=start))
+    )
+
+
+def get_exceptions_queryset(series_queryset, start: datetime.date, end: datetime.date):
+    """
+    Get a values_list() queryset of the (first occurrence id, date) pairs of the changed occurrences of the series
+    in a series queryset within a window.
+    """
+
+    return EventOccurrenceException.objects.filter(
+        recurrence__event__in=series_queryset.values('id'), date__gte=start, date__lt=end
+    ).values_list('recurrence__event_id', 'date')
+
+
+def group_exceptions(rows) -> dict[int, set[int]]:
+    exceptions = {}
+    for event_id, date in rows:
+        exceptions.setdefault(event_id, set()).add(date.toordinal())
+    return exceptions
+
+
+def remove_exceptions(sequences: list, excepted: set[int] | None, limit: int | None = None, latest: bool = False) -> list:
+    """
+    Remove the changed occurrences from the sequences of get_occurrence_ordinals,
+    keeping only the earliest or latest limit occurrences of each sequence when a limit is given.
+    """
+
+    if limit is not None:
+        # a sequence can lose at most len(excepted) of the occurrences kept
+        keep = limit + len(excepted or ())
+        sequences = [sequence[-keep:] if latest else sequence[:keep] for sequence in sequences]
+    if not excepted:
+        return sequences
+    return [[ordinal for ordinal in sequence if ordinal not in excepted] for sequence in sequences]
+
+
+def make_occurrence(event: Event, ordinal: int) -> Event:
+    """
+    Get a copy of a series' first occurrence for another of its occurrences.
+    The copy keeps the id of the first occurrence, so it is only for display and is never saved,
+    and shares its loaded organization, primary contact, and recurrence.
+    """
+
+    # copies the instance like Model.__getstate__ does, without the pickling round trip of copy.copy,
+    # which costs several times more than the rest of the expansion
+    occurrence = Event.__new__(Event)
+    occurrence.__dict__.update(event.__dict__)
+    occurrence._state = ModelState()
+    occurrence._state.__dict__.update(event._state.__dict__)
+    occurrence._state.fields_cache = event._state.fields_cache.copy()
+    occurrence.date = datetime.date.fromordinal(ordinal)
+    occurrence.is_occurrence = True
+    return occurrence
+
+
+def expand_occurrences(series: list[Event], exceptions: dict[int, set[int]], start: datetime.date, end: datetime.date,
+                       limit: int | None = None, latest: bool = False) -> list[Event]:
+    """
+    Get the occurrences of loaded series within a window.
+
+    :param series: list of first occurrences, with their recurrence loaded
+    :param exceptions: dictionary of first occurrence ids to the ordinals of their changed occurrences
+    :param start: datetime.date of the first day of the window
+    :param end: datetime.date of the day after the window
+    :param limit: optional number of occurrences to expand per series, the earliest ones, or the latest if latest is set
+    :param latest: keep the latest occurrences of each series instead of the earliest
+    :return: list of occurrences, unordered
+    """
+
+    start_ordinal, end_ordinal = start.toordinal(), end.toordinal()
+    occurrences = []
+    for event in series:
+        recurrence = event.recurrence
+        sequences = get_occurrence_ordinals(
+            event.date, recurrence.frequency, recurrence.interval, recurrence.weekdays, recurrence.until,
+            start_ordinal, end_ordinal,
+        )
+        sequences = remove_exceptions(sequences, exceptions.get(event.id), limit, latest)
+        ordinals = sorted(ordinal for sequence in sequences for ordinal in sequence)
+        if limit is not None:
+            ordinals = ordinals[-limit:] if latest else ordinals[:limit]
+        occurrences += [make_occurrence(event, ordinal) for ordinal in ordinals]
+    return occurrences
+
+
+def clamp_to_horizon(end: datetime.date) -> datetime.date:
+    return min(end, get_recurrence_horizon(timezone.now().date()))
+
+
+def get_occurrences(start: datetime.date, end: datetime.date, filter_q: Q = Q(), limit: int | None = None,
+                    latest: bool = False) -> list[Event]:
+    """
+    Load and expand the occurrences of every series matching filter_q within a window, in two queries.
+    The window ends at the recurrence horizon at the latest.
+
+    :param start: datetime.date of the first day of the window
+    :param end: datetime.date of the day after the window
+    :param filter_q: optional Q object of Event filters
+    :param limit: optional number of occurrences to expand per series, see expand_occurrences
+    :param latest: keep the latest occurrences of each series instead of the earliest
+    :return: list of occurrences, unordered, with their organization and primary contact loaded
+    """
+
+    end = clamp_to_horizon(end)
+    if start >= end or not has_series():
+        return []
+
+    series_queryset = get_series_queryset(start, end, filter_q)
+    series = list(series_queryset.select_related('organization', 'primary_contact', 'recurrence'))
+    if not series:
+        return []
+    exceptions = group_exceptions(get_exceptions_queryset(series_queryset, start, end))
+    return expand_occurrences(series, exceptions, start, end, limit, latest)
+
+
+async def aget_occurrences(start: datetime.date, end: datetime.date, filter_q: Q = Q(), limit: int | None = None,
+                           latest: bool = False) -> list[Event]:
+    """
+    Async version of get_occurrences.
+    """
+
+    end = clamp_to_horizon(end)
+    if start >= end or not await ahas_series():
+        return []
+
+    series_queryset = get_series_queryset(start, end, filter_q)
+    series = [event async for event in series_queryset.select_related('organization', 'primary_contact', 'recurrence')]
+    if not series:
+        return []
+    exceptions = group_exceptions([row async for row in get_exceptions_queryset(series_queryset, start, end)])
+    return expand_occurrences(series, exceptions, start, end, limit, latest)
+
+
+def find_first_occurrence(rules, exceptions: dict[int, set[int]], start: datetime.date, end: datetime.date) -> datetime.date | None:
+    """
+    Find the earliest occurrence of any series within a window.
+    The window shrinks to end at the earliest occurrence found so far, so later series are cheaper to check.
+
+    :param rules: iterable of (first occurrence id, *SERIES_RULE_FIELDS) rows
+    :param exceptions: dictionary of first occurrence ids to the ordinals of their changed occurrences
+    :return: datetime.date of the earliest occurrence, or None if there are none
+    """
+
+    start_ordinal, end_ordinal = start.toordinal(), end.toordinal()
+    for event_id, *rule in rules:
+        excepted = exceptions.get(event_id, ())
+        for sequence in get_occurrence_ordinals(*rule, start_ordinal, end_ordinal):
+            ordinal = next((ordinal for ordinal in sequence if ordinal not in excepted), None)
+            if ordinal is not None:
+                end_ordinal = min(end_ordinal, ordinal)
+    return datetime.date.fromordinal(end_ordinal) if end_ordinal < end.toordinal() else None
+
+
+def get_next_occurrence_date(cursor_date: datetime.date, end: datetime.date, filter_q: Q = Q()) -> datetime.date | None:
+    """
+    Get the date of the first occurrence of any series matching filter_q on or after the cursor and before end,
+    loading only the series' rules.
+
+    :param cursor_date: datetime.date of the first day that may be included
+    :param end: datetime.date of the day after the last day that may be included, clamped to the horizon
+    :param filter_q: optional Q object of Event filters
+    :return: datetime.date of the occurrence, or None if there is none
+    """
+
+    end = clamp_to_horizon(end)
+    if cursor_date >= end or not has_series():
+        return None
+
+    series_queryset = get_series_queryset(cursor_date, end, filter_q)
+    rules = list(series_queryset.values_list('id', *SERIES_RULE_FIELDS))
+    if not rules:
+        return None
+    exceptions = group_exceptions(get_exceptions_queryset(series_queryset, cursor_date, end))
+    return find_first_occurrence(rules, exceptions, cursor_date, end)
+
+
+async def aget_next_occurrence_date(cursor_date: datetime.date, end: datetime.date, filter_q: Q = Q()) -> datetime.date | None:
+    """
+    Async version of get_next_occurrence_date.
+    """
+
+    end = clamp_to_horizon(end)
+    if cursor_date >= end or not await ahas_series():
+        return None
+
+    series_queryset = get_series_queryset(cursor_date, end, filter_q)
+    rules = [row async for row in series_queryset.values_list('id', *SERIES_RULE_FIELDS)]
+    if not rules:
+        return None
+    exceptions = group_exceptions([row async for row in get_exceptions_queryset(series_queryset, cursor_date, end)])
+    return find_first_occurrence(rules, exceptions, cursor_date, end)
+
+
+def count_occurrences(rules, exceptions: dict[int, set[int]], start: datetime.date, end: datetime.date) -> dict[int, int]:
+    """
+    Count the occurrences of each series within a window without expanding them.
+
+    :param rules: iterable of (first occurrence id, *SERIES_RULE_FIELDS) rows
+    :param exceptions: dictionary of first occurrence ids to the ordinals of their changed occurrences
+    :return: dictionary of first occurrence ids to their number of occurrences
+    """
+
+    start_ordinal, end_ordinal = start.toordinal(), end.toordinal()
+    counts = {}
+    for event_id, *rule in rules:
+        sequences = get_occurrence_ordinals(*rule, start_ordinal, end_ordinal)
+        count = sum(len(sequence) for sequence in sequences)
+        excepted = exceptions.get(event_id)
+        if excepted:
+            count -= sum(1 for ordinal in excepted if any(ordinal in sequence for sequence in sequences))
+        counts[event_id] = count
+    return counts
+
+
+def count_occurrences_by_organization(organization_ids: list[int], start: datetime.date) -> dict[int, int]:
+    """
+    Count the occurrences of the organizations' series from the start date up to the recurrence horizon.
+
+    :param organization_ids: list of organization ids
+    :param start: datetime.date of the first day to count
+    :return: dictionary of organization ids to their number of occurrences, leaving out organizations without any
+    """
+
+    end = clamp_to_horizon(datetime.date.max)
+    if start >= end or not has_series():
+        return {}
+
+    series_queryset = get_series_queryset(start, end, Q(organization_id__in=organization_ids))
+    rows = list(series_queryset.values_list('organization_id', 'id', *SERIES_RULE_FIELDS))
+    if not rows:
+        return {}
+    exceptions = group_exceptions(get_exceptions_queryset(series_queryset, start, end))
+    counts = count_occurrences([row[1:] for row in rows], exceptions, start, end)
+
+    organization_counts = {}
+    for organization_id, event_id, *rule in rows:
+        organization_counts[organization_id] = organization_counts.get(organization_id, 0) + counts[event_id]
+    return organization_counts
+
+
+def get_occurrence(event: Event, date: datetime.date) -> Event | None:
+    """
+    Get the occurrence of a series on a date.
+
+    :param event: first occurrence of the series
+    :param date: datetime.date of the occurrence
+    :return: the occurrence, or None if the event does not repeat on that date or the occurrence was changed
+    """
+
+    recurrence = getattr(event, 'recurrence', None)
+    if recurrence is None:
+        return None
+
+    ordinal = date.toordinal()
+    sequences = get_occurrence_ordinals(
+        event.date, recurrence.frequency, recurrence.interval, recurrence.weekdays, recurrence.until,
+        ordinal, ordinal + 1,
+    )
+    if not any(ordinal in sequence for sequence in sequences):
+        return None
+    if recurrence.exceptions.filter(date=date).exists():
+        return None
+    return make_occurrence(event, ordinal)
+
+
+def cancel_occurrence(occurrence: Event) -> EventOccurrenceException:
+    """
+    Cancel an occurrence of a recurring event, by storing an exception without a replacement.
+
+    :param occurrence: occurrence created by make_occurrence
+    :return: the stored exception
+    """
+
+    return EventOccurrenceException.objects.create(recurrence=occurrence.recurrence, date=occurrence.date)
+
+
+def replace_occurrence(occurrence: Event) -> Event:
+    """
+    Replace an occurrence of a recurring event with a stored Event of its own, which can then be edited like any
+    other event, along with the exception that hides the occurrence.
+
+    :param occurrence: occurrence created by make_occurrence
+    :return: the stored replacement
+    """
+
+    replacement = Event(**{
+        field.attname: getattr(occurrence, field.attname)
+        for field in Event._meta.concrete_fields
+        if not field.primary_key
+    })
+    with transaction.atomic():
+        replacement.save()
+        EventOccurrenceException.objects.create(
+            recurrence=occurrence.recurrence, date=occurrence.date, replacement=replacement
+        )
+    return replacement
+
+
+def event_sort_key(event: Event) -> tuple:
+    return event.date, event.start_time, event.title, event.id
+
+
+def past_event_sort_key(event: Event) -> tuple:
+    return -event.date.toordinal(), event.start_time, event.title, event.id
+
+
+def merge_occurrences(events: list[Event], occurrences: list[Event], latest_first: bool = False) -> list[Event]:
+    """
+    Merge occurrences into a list of stored events, keeping the order the events were loaded in.
+
+    :param events: list of stored events ordered by (date, start_time, title), or by (-date, start_time, title, id)
+        if latest_first is set
+    :param occurrences: list of occurrences, unordered
+    :param latest_first: whether the events are ordered newest first
+    :return: merged list of events
+    """
+
+    if not occurrences:
+        return events
+    key = past_event_sort_key if latest_first else event_sort_key
+    return list(heapq.merge(events, sorted(occurrences, key=key), key=key))
+
+
+def get_occurrence_values(occurrence: Event, lookups: list[str]) -> dict:
+    """
+    Get a values() row of an occurrence, following the related objects loaded with it,
+    so occurrences can be listed along with values() rows of stored events.
+
+    :param occurrence: occurrence from get_occurrences
+    :param lookups: values() lookups, such as "title" or "organization__name"
+    :return: dictionary of the lookups, with is_occurrence set
+    """
+
+    row = {"is_occurrence": True}
+    for lookup in lookups:
+        value = occurrence
+        for part in lookup.split("__"):
+            value = getattr(value, part) if value is not None else None
+        row[lookup] = value
+    return row
+
+
+def merge_occurrence_values(rows, occurrence_rows: list[dict]):
+    """
+    Lazily merge values() rows of occurrences into values() rows of stored events, so a stream of rows
+    is never loaded at once.
+
+    :param rows: iterable of values() rows ordered by (date, start_time, title, id)
+    :param occurrence_rows: list of values() rows of occurrences, unordered
+    :return: iterable of merged rows
+    """
+
+    if not occurrence_rows:
+        return rows
+    return heapq.merge(rows, sorted(occurrence_rows, key=values_sort_key), key=values_sort_key)
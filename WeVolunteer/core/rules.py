@@ -3,17 +3,36 @@ from django.contrib.auth.models import User
 from core.models import Event, OrganizationAdministrator, Organization, OrganizationContact
 
 
+ADMINISTERED_ORGANIZATION_ID_ATTR = '_administered_organization_id'
+
+
+def get_administered_organization_id(user: User) -> int | None:
+    """
+    Get the id of the organization the given user administers, or None if they are not an organization administrator.
+    A user administers at most one organization, so the membership is looked up once and memoized on the user
+    instance. request.user lives for a single request, so every predicate and template has_perm check in a
+    request shares one query.
+    """
+    if not user.is_authenticated:
+        return None
+
+    organization_id = getattr(user, ADMINISTERED_ORGANIZATION_ID_ATTR, False)
+    if organization_id is False:
+        organization_id = (
+            OrganizationAdministrator.objects.filter(user=user).values_list('organization_id', flat=True).first()
+        )
+        setattr(user, ADMINISTERED_ORGANIZATION_ID_ATTR, organization_id)
+    return organization_id
+
+
 @rules.predicate
 def is_organization_admin_for_event(user: User, event: Event):
     """
     Django Rules Predicate.
     Check if the given user is an organization administrator and if the given event belongs to the org.
     """
-    org_user = OrganizationAdministrator.objects.filter(user=user, organization=event.organization)
-    if org_user.exists():
-        return event.organization == org_user.first().organization
-    else:
-        return False
+    organization_id = get_administered_organization_id(user)
+    return organization_id is not None and organization_id == event.organization_id
 rules.add_perm('events.change_event', is_organization_admin_for_event)
 rules.add_perm('events.delete_event', is_organization_admin_for_event)
 
@@ -23,7 +42,7 @@ def is_organization_admin(user: User):
     Django Rules Predicate.
     Check if the given user is an organization administrator.
     """
-    return OrganizationAdministrator.objects.filter(user=user).exists()
+    return get_administered_organization_id(user) is not None
 rules.add_perm('events.add_event', is_organization_admin)
 rules.add_perm('organizationcontacts.add_organizationcontact', is_organization_admin)
 
@@ -33,7 +52,8 @@ def is_organization_admin_for_organization(user: User, organization: Organizatio
     Django Rules Predicate.
     Check if the given user is an organization administrator for the given organization.
     """
-    return OrganizationAdministrator.objects.filter(user=user, organization=organization).exists()
+    organization_id = get_administered_organization_id(user)
+    return organization_id is not None and organization_id == organization.id
 rules.add_perm('organizations.change_organization', is_organization_admin_for_organization)
 
 @rules.predicate
@@ -42,6 +62,7 @@ def is_organization_admin_for_organization_contact(user: User, org_contact: Orga
         Django Rules Predicate.
         Check if the given user is an organization administrator for the given organization contact.
         """
-    return OrganizationAdministrator.objects.filter(user=user, organization=org_contact.organization).exists()
+    organization_id = get_administered_organization_id(user)
+    return organization_id is not None and organization_id == org_contact.organization_id
 rules.add_perm('organizationcontacts.change_organizationcontact', is_organization_admin_for_organization_contact)
-rules.add_perm('organizationcontacts.delete_organizationcontact', is_organization_admin_for_organization_contact)
\ No newline at end of file
+rules.add_perm('organizationcontacts.delete_organizationcontact', is_organization_admin_for_organization_contact)
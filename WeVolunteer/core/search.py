@@ -0,0 +1,178 @@
+"""
+search.py
+
+Postgres full text search over Events and Organizations
+"""
+import datetime
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core.models import Event, Organization
+from core.recurrence import (
+    expand_occurrences,
+    get_exceptions_queryset,
+    get_recurrence_horizon,
+    get_series_queryset,
+    group_exceptions,
+    has_series,
+)
+
+
+SEARCH_CONFIG = "english"
+SEARCH_RESULTS_LIMIT = 20
+# only the soonest matching upcoming events are ranked, which bounds the cost of common search terms
+SEARCH_EVENT_CANDIDATES = 500
+MAX_QUERY_LENGTH = 200
+
+# ts_headline marks matches with control characters, which are swapped for <mark> tags after html escaping
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+
+def get_search_query(text: str) -> SearchQuery:
+    """
+    Get a SearchQuery for user entered text, which supports quoted phrases, "or", and -exclusions.
+    """
+
+    return SearchQuery(text[:MAX_QUERY_LENGTH], config=SEARCH_CONFIG, search_type="websearch")
+
+
+def headline(field: str, query: SearchQuery, **options) -> SearchHeadline:
+    """
+    Get a SearchHeadline of a field with its matches marked by HIGHLIGHT_START and HIGHLIGHT_STOP.
+    """
+
+    return SearchHeadline(
+        field,
+        query,
+        config=SEARCH_CONFIG,
+        start_sel=HIGHLIGHT_START,
+        stop_sel=HIGHLIGHT_STOP,
+        **options,
+    )
+
+
+def highlight(snippet: str | None) -> str:
+    """
+    Html escape a search headline and wrap its marked matches in <mark> tags.
+
+    :param snippet: headline created by the headline function
+    :return: safe html string
+    """
+
+    if not snippet:
+        return ""
+    return mark_safe(
+        escape(snippet).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+def annotate_event_matches(queryset, query: SearchQuery):
+    """
+    Annotate an Event queryset with the rank and the title and description headlines of a search query.
+    """
+
+    return queryset.select_related("organization").annotate(
+        rank=SearchRank(F("search_vector"), query),
+        title_headline=headline("title", query, highlight_all=True),
+        description_headline=headline("description", query, max_words=30, min_words=15),
+    )
+
+
+def search_series_occurrences(query: SearchQuery, today: datetime.date, limit: int) -> list[Event]:
+    """
+    Search the recurring events that started before today, which are only upcoming through their occurrences.
+    Each matching series is listed once, by its next occurrence up to the recurrence horizon,
+    and only the most recently started SEARCH_EVENT_CANDIDATES of them are ranked.
+
+    :param query: SearchQuery of the user entered search text
+    :param today: datetime.date of today
+    :param limit: maximum number of series to return
+    :return: list of occurrences with rank, title_headline, and description_headline attributes
+    """
+
+    end = get_recurrence_horizon(today)
+    candidates = (
+        get_series_queryset(today, end, Q(search_vector=query, date__lt=today))
+        .order_by("-date")
+        .values("id")[:SEARCH_EVENT_CANDIDATES]
+    )
+    series_queryset = Event.objects.filter(id__in=Subquery(candidates))
+    series = list(
+        annotate_event_matches(series_queryset.select_related("recurrence"), query).order_by("-rank", "id")[:limit]
+    )
+    if not series:
+        return []
+    exceptions = group_exceptions(get_exceptions_queryset(series_queryset, today, end))
+    return expand_occurrences(series, exceptions, today, end, limit=1)
+
+
+def search_sort_key(event: Event) -> tuple:
+    """
+    Get the key of the ranked event results order, best match first, for merging in the occurrences.
+    """
+
+    return -event.rank, event.date, event.start_time, event.id
+
+
+def search_events(text: str, limit: int = SEARCH_RESULTS_LIMIT) -> list[Event]:
+    """
+    Search the upcoming events by title and description, best match first.
+    Matches come from the GIN index on the trigger maintained search_vector column, or from the date index for
+    common terms, and only the soonest SEARCH_EVENT_CANDIDATES of them are ranked.
+    Recurring events that started before today are found by search_series_occurrences.
+    Headlines are only generated for the returned rows.
+
+    :param text: user entered search text
+    :param limit: maximum number of events to return
+    :return: list of events with rank, title_snippet, and description_snippet attributes
+    """
+
+    query = get_search_query(text)
+    today = timezone.now().date()
+    candidates = (
+        Event.objects.filter(search_vector=query, date__gte=today)
+        .order_by("date")
+        .values("id")[:SEARCH_EVENT_CANDIDATES]
+    )
+    events = list(
+        annotate_event_matches(Event.objects.filter(id__in=Subquery(candidates)), query)
+        .order_by("-rank", "date", "start_time", "id")[:limit]
+    )
+    if has_series():
+        occurrences = search_series_occurrences(query, today, limit)
+        if occurrences:
+            events = sorted(events + occurrences, key=search_sort_key)[:limit]
+    for event in events:
+        event.title_snippet = highlight(event.title_headline)
+        event.description_snippet = highlight(event.description_headline)
+    return events
+
+
+def search_organizations(text: str, limit: int = SEARCH_RESULTS_LIMIT) -> list[Organization]:
+    """
+    Search the organizations by name and about, best match first.
+
+    :param text: user entered search text
+    :param limit: maximum number of organizations to return
+    :return: list of organizations with rank, name_snippet, and about_snippet attributes
+    """
+
+    query = get_search_query(text)
+    organizations = list(
+        Organization.objects.filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F("search_vector"), query),
+            name_headline=headline("name", query, highlight_all=True),
+            about_headline=headline("about", query, max_words=30, min_words=15),
+        )
+        .order_by("-rank", "name")[:limit]
+    )
+    for organization in organizations:
+        organization.name_snippet = highlight(organization.name_headline)
+        organization.about_snippet = highlight(organization.about_headline)
+    return organizations
@@ -0,0 +1,199 @@
+"""
+signals.py
+
+Signal receivers that invalidate cached html fragments when the data they were rendered from changes,
+touch the updated_at of organizations whose events, contacts, or locations change, and publish event changes to the open live updates streams.
+Connected in CoreConfig.ready().
+Queryset update() and bulk operations do not send these signals, so code using them must bump the versions itself.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import bump_month_versions, bump_organization_version, bump_series_version
+from core.live import EVENT_CREATED, EVENT_DELETED, EVENT_UPDATED, publish_event_change
+from core.models import Event, EventOccurrenceException, EventRecurrence, Location, Organization, OrganizationContact
+from core.recurrence import has_series
+
+
+def get_displayed_event_months(**filters) -> list:
+    """
+    Get the months of the matching events that can still be displayed in the monthly event lists,
+    which start at the current month.
+    """
+    first_month = timezone.now().date().replace(day=1)
+    return list(Event.objects.filter(date__gte=first_month, **filters).dates('date', 'month'))
+
+
+def invalidate_series_of(**filters):
+    """
+    Invalidate the occurrences of recurring events, which can be displayed in any month,
+    if any of the matching events is the first occurrence of a series.
+    """
+    if has_series() and EventRecurrence.objects.filter(**{f"event__{key}": value for key, value in filters.items()}).exists():
+        bump_series_version()
+
+
+@receiver([post_save, post_delete], sender=Event)
+@receiver([post_save, post_delete], sender=OrganizationContact)
+@receiver([post_save, post_delete], sender=Location)
+def invalidate_organization_child_fragments(sender, instance, **kwargs):
+    """
+    Invalidate the cached fragments of the organization an event, contact, or location belongs to.
+    """
+    bump_organization_version(instance.organization_id)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_fragments(sender, instance, **kwargs):
+    """
+    Invalidate the cached fragments of an organization and all of its events.
+    """
+    bump_organization_version(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Event)
+@receiver([post_save, post_delete], sender=OrganizationContact)
+@receiver([post_save, post_delete], sender=Location)
+def touch_organization(sender, instance, **kwargs):
+    """
+    Mark the organization an event, contact, or location belongs to as modified, along with the organization an event was
+    moved from, so that Organization.updated_at covers everything shown on the organization and event pages.
+    An update query skips the organization's own signals and search trigger.
+    """
+    organization_ids = {instance.organization_id, getattr(instance, '_previous_organization_id', None)} - {None}
+    Organization.objects.filter(id__in=organization_ids).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Event)
+def remember_previous_event_date(sender, instance, **kwargs):
+    """
+    Remember the stored date and organization of an event that is about to be updated,
+    in case the update moves it to another month or organization, and whether it is the first occurrence of a series.
+    """
+    if not instance._state.adding:
+        previous = Event.objects.filter(pk=instance.pk).values_list('date', 'organization_id', 'recurrence__id').first()
+        instance._previous_date, instance._previous_organization_id, instance._previous_recurrence_id = previous or (None, None, None)
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_months(sender, instance, **kwargs):
+    """
+    Invalidate the cached event lists of the month an event is in, and the month it was moved from,
+    along with every month if it is the first occurrence of a series.
+    Deleted series are covered by the delete of their EventRecurrence.
+    """
+    date = Event._meta.get_field('date').to_python(instance.date)
+    previous_date = getattr(instance, '_previous_date', None)
+    bump_month_versions([date] + ([previous_date] if previous_date else []))
+    if getattr(instance, '_previous_recurrence_id', None):
+        bump_series_version()
+
+
+@receiver([post_save, post_delete], sender=EventRecurrence)
+@receiver([post_save, post_delete], sender=EventOccurrenceException)
+def invalidate_series(sender, instance, **kwargs):
+    """
+    Invalidate the occurrences of recurring events when a series rule or one of its exceptions changes,
+    and mark the organization of the series as modified.
+    """
+    bump_series_version()
+    if sender is EventRecurrence:
+        organizations = Organization.objects.filter(event__id=instance.event_id)
+    else:
+        organizations = Organization.objects.filter(event__recurrence__id=instance.recurrence_id)
+    organizations.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Organization)
+def invalidate_organization_event_months(sender, instance, created, **kwargs):
+    """
+    Invalidate the cached event lists of every month showing one of an organization's events or occurrences.
+    Deleted organizations are covered by the deletes of their events.
+    """
+    if not created:
+        bump_month_versions(get_displayed_event_months(organization=instance))
+        invalidate_series_of(organization=instance)
+
+
+@receiver(post_save, sender=OrganizationContact)
+@receiver(pre_delete, sender=OrganizationContact)
+def invalidate_contact_event_months(sender, instance, **kwargs):
+    """
+    Invalidate the cached event lists of every month showing an event or occurrence with the contact as its
+    primary contact.
+    Deletes are handled before the contact is removed from its events.
+    """
+    if not kwargs.get('created'):
+        bump_month_versions(get_displayed_event_months(primary_contact=instance))
+        invalidate_series_of(primary_contact=instance)
+
+
+@receiver(post_save, sender=Event)
+def publish_event_save(sender, instance, created, **kwargs):
+    """
+    Push a saved event to the open live updates streams once the save is committed, along with the organization
+    it was moved from and whether it is the first occurrence of a series, whose occurrences changed with it.
+    """
+    action = EVENT_CREATED if created else EVENT_UPDATED
+    transaction.on_commit(partial(
+        publish_event_change, instance.id, instance.organization_id, action,
+        previous_organization_id=getattr(instance, '_previous_organization_id', None),
+        series=bool(getattr(instance, '_previous_recurrence_id', None)),
+    ))
+
+
+@receiver(post_delete, sender=Event)
+def publish_event_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted event from the open live updates streams once the delete is committed.
+    """
+    transaction.on_commit(partial(publish_event_change, instance.id, instance.organization_id, EVENT_DELETED))
+
+
+@receiver([post_save, post_delete], sender=EventRecurrence)
+@receiver([post_save, post_delete], sender=EventOccurrenceException)
+def publish_series_change(sender, instance, created=False, **kwargs):
+    """
+    Push a change of a series rule or one of its exceptions to the open live updates streams once it is committed,
+    as an update of the series' first occurrence.
+    A new exception cancels or replaces a single occurrence, while any other change may move every occurrence.
+    """
+    if sender is EventRecurrence:
+        series = Event.objects.filter(id=instance.event_id)
+    else:
+        series = Event.objects.filter(recurrence__id=instance.recurrence_id)
+    # the first occurrence is already gone when its series is deleted along with it
+    series = series.values_list('id', 'organization_id').first()
+    if series is None:
+        return
+    if sender is EventOccurrenceException and created:
+        date = EventOccurrenceException._meta.get_field('date').to_python(instance.date)
+        change = partial(publish_event_change, *series, EVENT_UPDATED, cancelled_date=date)
+    else:
+        change = partial(publish_event_change, *series, EVENT_UPDATED, series=True)
+    transaction.on_commit(change)
+
+
+def handle_bulk_created_events(events: list[Event]):
+    """
+    Do the work of the Event post_save receivers for events created with bulk_create, which sends no signals.
+    Invalidates the cached fragments and months of the events, touches their organizations, and, once the
+    transaction commits, tells the open live updates streams about one new event per organization,
+    which is all they need to show their new events notice.
+
+    :param events: list of the created events, with their ids set
+    """
+    if not events:
+        return
+
+    latest_events = {event.organization_id: event for event in events}
+    for organization_id in latest_events:
+        bump_organization_version(organization_id)
+    bump_month_versions({event.date for event in events})
+    Organization.objects.filter(id__in=latest_events).update(updated_at=timezone.now())
+    for organization_id, event in latest_events.items():
+        transaction.on_commit(partial(publish_event_change, event.id, organization_id, EVENT_CREATED))
@@ -1,22 +1,72 @@
 from django import template
-from ..models import EventDescriptors, TimeOfDay, EventLocationDescriptors
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from ..models import EventDescriptors, TimeOfDay, EventLocationDescriptors, time_of_day_mask_enum_lists
 
 register = template.Library()
 
+# labels of every Enum value, so a label is a dictionary lookup
+event_descriptor_labels = dict(EventDescriptors.choices)
+event_location_descriptor_labels = dict(EventLocationDescriptors.choices)
+time_of_day_labels = dict(TimeOfDay.choices)
+
+BADGE_HTML = '<span class="badge rounded-pill bg-wv-{} text-black fs-6 fw-light py-2 px-3 my-1 me-1">{}</span>'
+
+
+def get_badge_html(color: str, label: str) -> str:
+    """
+    Get the html of a tag badge.
+
+    :param color: wv color name of the badge background
+    :param label: label of the tag, escaped
+    """
+    return format_html(BADGE_HTML, color, label)
+
+
+# badge html of every Enum value, and of the TimeOfDay badges of every time_of_day_mask
+event_descriptor_badges = {value: get_badge_html("yellow", label) for value, label in event_descriptor_labels.items()}
+event_location_descriptor_badges = {
+    value: get_badge_html("green", label) for value, label in event_location_descriptor_labels.items()
+}
+time_of_day_mask_badges = [
+    "\n".join(get_badge_html("pink", time_of_day_labels[time_of_day]) for time_of_day in times_of_day)
+    for times_of_day in time_of_day_mask_enum_lists
+]
+
+
 @register.filter
 def event_descriptor_label(value):
     """
     Given an EventDescriptors Enum object, return its human readable label.
     """
-    return EventDescriptors(value).label if value in EventDescriptors.values else value
+    return event_descriptor_labels.get(value, value)
 
 @register.filter
 def event_location_descriptor_label(value):
     """
     Given an EventLocationDescriptors Enum object, return its human readable label.
     """
-    return EventLocationDescriptors(value).label if value in EventLocationDescriptors.values else value
+    return event_location_descriptor_labels.get(value, value)
 
 @register.filter
 def time_of_day_label(value):
-    return TimeOfDay(value).label if value in TimeOfDay.values else value
\ No newline at end of file
+    return time_of_day_labels.get(value, value)
+
+@register.simple_tag
+def event_badges(event):
+    """
+    Render the event descriptor, time of day, and location descriptor badges of an event in one pass,
+    from the precomputed badge html of each tag value.
+    Used as {% event_badges event %}.
+    """
+    badges = [
+        event_descriptor_badges.get(tag) or get_badge_html("yellow", tag)
+        for tag in event.event_descriptor_tags or ()
+    ]
+    badges.append(time_of_day_mask_badges[event.time_of_day_mask])
+    badges.extend(
+        event_location_descriptor_badges.get(tag) or get_badge_html("green", tag)
+        for tag in event.location_descriptor_tags or ()
+    )
+    return mark_safe("\n".join(badge for badge in badges if badge))
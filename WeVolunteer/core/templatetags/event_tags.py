@@ -0,0 +1,14 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.cache import render_event_cards
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def event_cards(context, event_list):
+    """
+    Get the rendered event card of each event in the list, served from the fragment cache when possible.
+    Used as {% event_cards event_list as cards %}.
+    """
+    return [mark_safe(card) for card in render_event_cards(event_list, context["request"])]
@@ -7,13 +7,22 @@ app_name = 'core'
 urlpatterns = [
     path('', views.events, name='events'),
     path('about/', views.about, name='about'),
+    path('search/', views.search, name='search'),
+    path('search/results', views.search_results_as_sse, name='search-results'),
+    path('events/filter', views.events_filter_as_sse, name='filter-events'),
     path('events/get_next_month', views.events_get_next_month_events_as_sse, name='get-next-month-events'),
+    path('events/live', views.events_live_updates_as_sse, name='event-live-updates'),
+    path('events/feed.ics', views.events_ical_feed, name='event-feed'),
     path('events/<event_id>', views.event_details, name='event-details'),
     path('events/add/', views.event_add, name='event-add'),
     path('events/edit/<event_id>', views.event_edit, name='event-edit'),
     path('events/delete/<event_id>', views.event_delete, name='event-delete'),
+    path('events/<event_id>/occurrences/<occurrence_date>/cancel', views.event_occurrence_cancel, name='event-occurrence-cancel'),
+    path('events/<event_id>/occurrences/<occurrence_date>/edit', views.event_occurrence_edit, name='event-occurrence-edit'),
+    path('api/v1/events', views.api_events, name='api-events'),
     path('organizations/', views.organizations, name='organizations'),
     path('organizations/<org_id>', views.organization_details, name='org-details'),
+    path('organizations/<org_id>/feed.ics', views.organization_ical_feed, name='org-event-feed'),
     path('organizations/get_next_past_events/<org_id>', views.organization_details_get_next_past_events_as_sse, name='get-next-past-events'),
     path('organizations/edit/<org_id>', views.organization_edit, name='org-edit'),
     path('organization_contacts/add', views.organization_contact_add, name='org-contact-add'),
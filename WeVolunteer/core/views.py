@@ -1,28 +1,503 @@
 import json
-from datetime import datetime
+import datetime
 
+from asgiref.sync import sync_to_async
 from datastar_py.consts import ElementPatchMode
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import BadRequest
-from django.http import Http404
+from django.core.paginator import Paginator
+from django.db.models import Count, DateField, Func, Q, Subquery
+from django.db.models.functions import TruncMonth
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 from rules.contrib.views import permission_required, objectgetter
 
-from WeVolunteer.utils import respond_via_sse, patch_signals_respond_via_sse
+from WeVolunteer.utils import (
+    allow_shared_caching,
+    is_asgi_request,
+    patch_signals_respond_via_sse,
+    respond_via_sse,
+    stream_respond_via_sse,
+)
+from core.api import ApiError, get_api_events_page
+from core.cache import feed_key, get_cached_stream, render_monthly_event_lists
+from core.conditional import (
+    conditional_page,
+    get_event_page_state,
+    get_memoized_page_state,
+    get_organization_page_state,
+    get_site_page_state,
+)
+from core.cursors import decode_event_cursor, decode_month_cursor, encode_event_cursor, encode_month_cursor
+from core.filters import event_filters_q, get_event_filters, get_facets
+from core.locations import NEAR_ME_RADIUS_MILES
 from core.forms import EventForm, OrganizationForm, OrganizationContactForm
+from core.ical import FEED_EVENT_FIELDS, ICAL_CONTENT_TYPE, render_calendar
+from core.live import LiveEventUpdates, live_connections
 from core.models import Event, EventDescriptors, EventLocationDescriptors, Organization, OrganizationContact
+from core.recurrence import (
+    aget_next_occurrence_date,
+    aget_occurrences,
+    cancel_occurrence,
+    count_occurrences_by_organization,
+    get_next_occurrence_date,
+    get_occurrence,
+    get_occurrence_values,
+    get_occurrences,
+    get_recurrence_horizon,
+    get_series_queryset,
+    has_series,
+    merge_occurrence_values,
+    merge_occurrences,
+    past_event_sort_key,
+    replace_occurrence,
+)
+from core.rules import get_administered_organization_id
+from core.search import search_events, search_organizations
+
+
+ORGANIZATIONS_PER_PAGE = 24
+PAST_EVENTS_PER_PAGE = 3
+STREAMED_EVENTS_CHUNK_SIZE = 12
+ICAL_FEED_QUERY_CHUNK_SIZE = 2000
+# occurrences of each recurring event listed on an organization's page, the rest are only counted
+ORGANIZATION_OCCURRENCES_PER_SERIES = 4
 
 
 def get_events_by_month_and_year(month_year: datetime.date):
     """
     Get a queryset of events by the given month and year.
+    The month is filtered as a half-open date range so the date index can be used.
 
     :param month_year: datetime.date containing the desired month and year, day is ignored
     """
 
-    return Event.objects.filter(date__month=month_year.month, date__year=month_year.year).order_by('date', 'start_time', 'title')
+    month_start = month_year.replace(day=1)
+    return (
+        Event.objects.filter(date__gte=month_start, date__lt=month_start + relativedelta(months=+1))
+        .select_related('organization', 'primary_contact')
+        .order_by('date', 'start_time', 'title')
+    )
+
+
+def get_monthly_events(start_date: datetime.date, num_months: int, filter_q: Q = Q()) -> dict[str, list[Event]]:
+    """
+    Get the events for a window of consecutive months, grouped by month, along with the occurrences of recurring
+    events in the window.
+    The stored events of the whole window are loaded with a single date range query that joins in the organization
+    and primary contact.
+
+    :param start_date: datetime.date of the first day to include, its month is the first month of the window
+    :param num_months: number of months in the window
+    :param filter_q: optional Q object of facet filters the events must match
+    :return: dictionary of "Month Year" labels to lists of events, in month order, including months without events
+    """
+
+    first_month = start_date.replace(day=1)
+    end_date = first_month + relativedelta(months=+num_months)
+
+    monthly_events = {}
+    for i in range(num_months):
+        month_date = first_month + relativedelta(months=+i)
+        monthly_events[f"{month_date.strftime('%B')} {month_date.year}"] = []
+
+    queryset = (
+        Event.objects.filter(filter_q, date__gte=start_date, date__lt=end_date)
+        .select_related('organization', 'primary_contact')
+        .order_by('date', 'start_time', 'title')
+    )
+    for event in merge_occurrences(list(queryset), get_occurrences(start_date, end_date, filter_q)):
+        monthly_events[f"{event.date.strftime('%B')} {event.date.year}"].append(event)
+
+    return monthly_events
+
+
+def get_next_month_events_queryset(cursor_date: datetime.date, filter_q: Q = Q()):
+    """
+    Get a queryset of the events for the first month on or after the given date that has any events, skipping empty
+    months. The month is located and loaded in a single statement: a subquery finds the month of the next event,
+    and the outer query range scans that month on the date column.
+
+    :param cursor_date: datetime.date of the first day that may be included
+    :param filter_q: optional Q object of facet filters the events must match
+    """
+
+    next_month_start = (
+        Event.objects.filter(filter_q, date__gte=cursor_date)
+        .order_by('date')
+        .annotate(month=TruncMonth('date'))
+        .values('month')[:1]
+    )
+    next_month_end = Func(Subquery(next_month_start), template="(%(expressions)s + interval '1 month')", output_field=DateField())
+
+    return (
+        Event.objects.filter(filter_q, date__gte=Subquery(next_month_start), date__lt=next_month_end)
+        .select_related('organization', 'primary_contact')
+        .order_by('date', 'start_time', 'title')
+    )
+
+
+def pick_next_month(event_list: list[Event], occurrence_date: datetime.date | None) -> tuple[datetime.date | None, list[Event]]:
+    """
+    Pick the month of the next stored events or the month of the next occurrence of a recurring event,
+    whichever is first.
+    Occurrences are only looked up before the month of the next stored events, so the month of an occurrence
+    has no stored events.
+    """
+
+    if occurrence_date is not None:
+        return occurrence_date.replace(day=1), []
+    if event_list:
+        return event_list[0].date.replace(day=1), event_list
+    return None, []
+
+
+def get_next_month_events(cursor_date: datetime.date, filter_q: Q = Q()) -> tuple[datetime.date | None, list[Event]]:
+    """
+    Get the events for the first month on or after the given date that has any events or occurrences of recurring
+    events. The stored events are located and loaded with a single query.
+
+    :param cursor_date: datetime.date of the first day that may be included
+    :param filter_q: optional Q object of facet filters the events must match
+    :return: tuple of the first day of the located month and its events, or (None, []) if there are no more events
+    """
+
+    event_list = list(get_next_month_events_queryset(cursor_date, filter_q))
+    stored_month = event_list[0].date.replace(day=1) if event_list else datetime.date.max
+    month_start, event_list = pick_next_month(
+        event_list, get_next_occurrence_date(cursor_date, stored_month, filter_q)
+    )
+    if month_start is None:
+        return None, []
+    occurrences = get_occurrences(max(cursor_date, month_start), month_start + relativedelta(months=+1), filter_q)
+    return month_start, merge_occurrences(event_list, occurrences)
+
+
+async def aget_next_month_events(cursor_date: datetime.date, filter_q: Q = Q()) -> tuple[datetime.date | None, list[Event]]:
+    """
+    Async version of get_next_month_events.
+    """
+
+    event_list = [event async for event in get_next_month_events_queryset(cursor_date, filter_q)]
+    stored_month = event_list[0].date.replace(day=1) if event_list else datetime.date.max
+    month_start, event_list = pick_next_month(
+        event_list, await aget_next_occurrence_date(cursor_date, stored_month, filter_q)
+    )
+    if month_start is None:
+        return None, []
+    occurrences = await aget_occurrences(max(cursor_date, month_start), month_start + relativedelta(months=+1), filter_q)
+    return month_start, merge_occurrences(event_list, occurrences)
+
+
+def get_past_events_page_queryset(organization: Organization | int, after: tuple | None = None):
+    """
+    Get a queryset of one page of an organization's past events, newest first, using keyset pagination.
+    Rows are ordered by (-date, start_time, title, id) and the page starts right after the given sort key,
+    so the cost of each page does not depend on how many pages have already been displayed.
+    The queryset includes one extra row to find out whether there is another page.
+
+    :param organization: Organization, or id of the organization, to get the past events for
+    :param after: optional (date, start_time, title, id) sort key of the last event already displayed
+    """
+
+    queryset = (
+        Event.objects.filter(organization=organization, date__lt=timezone.now().date())
+        .select_related('organization', 'primary_contact')
+        .order_by('-date', 'start_time', 'title', 'id')
+    )
+    if after is not None:
+        date, start_time, title, event_id = after
+        queryset = queryset.filter(
+            Q(date__lt=date)
+            | Q(date=date, start_time__gt=start_time)
+            | Q(date=date, start_time=start_time, title__gt=title)
+            | Q(date=date, start_time=start_time, title=title, id__gt=event_id)
+        )
+
+    return queryset[:PAST_EVENTS_PER_PAGE + 1]
+
+
+def get_past_occurrences_window(past_events: list[Event], after: tuple | None) -> tuple[datetime.date, datetime.date]:
+    """
+    Get the date window of the occurrences of recurring events that may be on a page of past events:
+    up to the cursor, and back to the extra stored event loaded after the page, if there is one.
+
+    :param past_events: events loaded by a get_past_events_page_queryset queryset
+    :param after: optional (date, start_time, title, id) sort key of the last event already displayed
+    :return: tuple of the first day of the window and the day after it
+    """
+
+    end = after[0] + datetime.timedelta(days=1) if after is not None else timezone.now().date()
+    start = past_events[-1].date if len(past_events) > PAST_EVENTS_PER_PAGE else datetime.date.min
+    return start, end
+
+
+def add_past_occurrences(past_events: list[Event], occurrences: list[Event], after: tuple | None) -> list[Event]:
+    """
+    Merge the occurrences after the cursor into the events loaded by a get_past_events_page_queryset queryset,
+    keeping the page and the one extra row.
+    """
+
+    if after is not None:
+        date, start_time, title, event_id = after
+        after_key = (-date.toordinal(), start_time, title, event_id)
+        occurrences = [occurrence for occurrence in occurrences if past_event_sort_key(occurrence) > after_key]
+    return merge_occurrences(past_events, occurrences, latest_first=True)[:PAST_EVENTS_PER_PAGE + 1]
+
+
+def split_past_events_page(past_events: list[Event]) -> tuple[list[Event], str | None]:
+    """
+    Split the rows loaded by a get_past_events_page_queryset queryset into the page and the cursor for the next page.
+    """
+
+    if len(past_events) > PAST_EVENTS_PER_PAGE:
+        past_events = past_events[:PAST_EVENTS_PER_PAGE]
+        return past_events, encode_event_cursor(past_events[-1])
+    return past_events, None
+
+
+def get_past_events_page(organization: Organization | int, after: tuple | None = None) -> tuple[list[Event], str | None]:
+    """
+    Get one page of an organization's past events, newest first, using keyset pagination.
+    The occurrences of recurring events are merged in, expanding only the latest few of each series that could be
+    on the page.
+
+    :param organization: Organization, or id of the organization, to get the past events for
+    :param after: optional (date, start_time, title, id) sort key of the last event already displayed
+    :return: tuple of the events on the page and the cursor for the next page, or None if there are no more
+    """
+
+    past_events = list(get_past_events_page_queryset(organization, after))
+    start, end = get_past_occurrences_window(past_events, after)
+    # one more per series, in case an occurrence on the cursor date was already displayed
+    occurrences = get_occurrences(start, end, Q(organization=organization), PAST_EVENTS_PER_PAGE + 2, latest=True)
+    return split_past_events_page(add_past_occurrences(past_events, occurrences, after))
+
+
+async def aget_past_events_page(organization: Organization | int, after: tuple | None = None) -> tuple[list[Event], str | None]:
+    """
+    Async version of get_past_events_page.
+    """
+
+    past_events = [event async for event in get_past_events_page_queryset(organization, after)]
+    start, end = get_past_occurrences_window(past_events, after)
+    occurrences = await aget_occurrences(start, end, Q(organization=organization), PAST_EVENTS_PER_PAGE + 2, latest=True)
+    return split_past_events_page(add_past_occurrences(past_events, occurrences, after))
+
+
+def get_events_by_month(month_starts: list[datetime.date], cutoff: datetime.date) -> dict[datetime.date, list[Event]]:
+    """
+    Get the events for any set of months, grouped by month, with a single query,
+    along with the occurrences of recurring events in the months.
+    Events before the cutoff are left out of the month containing the cutoff.
+
+    :param month_starts: list of the first days of the desired months
+    :param cutoff: datetime.date of the earliest event to include from the month containing it
+    :return: dictionary of the given month starts to lists of events
+    """
+
+    months_q = Q()
+    month_start_dates = {}
+    for month_start in month_starts:
+        month_end = month_start + relativedelta(months=+1)
+        month_start_dates[month_start] = max(month_start, cutoff) if cutoff < month_end else month_start
+        months_q |= Q(date__gte=month_start_dates[month_start], date__lt=month_end)
+
+    queryset = (
+        Event.objects.filter(months_q)
+        .select_related('organization', 'primary_contact')
+        .order_by('date', 'start_time', 'title')
+    )
+    # the months are usually consecutive, so the occurrences are expanded for the window spanning all of them
+    occurrences = [
+        occurrence
+        for occurrence in get_occurrences(min(month_start_dates.values()), max(month_starts) + relativedelta(months=+1))
+        if occurrence.date >= month_start_dates.get(occurrence.date.replace(day=1), datetime.date.max)
+    ]
+
+    monthly_events = {month_start: [] for month_start in month_starts}
+    for event in merge_occurrences(list(queryset), occurrences):
+        monthly_events[event.date.replace(day=1)].append(event)
+
+    return monthly_events
+
+
+def get_next_event_month(cursor_date: datetime.date) -> datetime.date | None:
+    """
+    Get the first month on or after the given date that has any events, with a single index only query,
+    or any occurrences of recurring events.
+
+    :param cursor_date: datetime.date of the first day that may be included
+    :return: datetime.date of the first day of the month, or None if there are no more events
+    """
+
+    next_event_date = Event.objects.filter(date__gte=cursor_date).order_by('date').values_list('date', flat=True).first()
+    next_event_date = get_next_occurrence_date(cursor_date, next_event_date or datetime.date.max) or next_event_date
+    return next_event_date.replace(day=1) if next_event_date else None
+
+
+async def aget_next_event_month(cursor_date: datetime.date) -> datetime.date | None:
+    """
+    Async version of get_next_event_month.
+    """
+
+    next_event_date = await Event.objects.filter(date__gte=cursor_date).order_by('date').values_list('date', flat=True).afirst()
+    next_event_date = await aget_next_occurrence_date(cursor_date, next_event_date or datetime.date.max) or next_event_date
+    return next_event_date.replace(day=1) if next_event_date else None
+
+
+def render_cached_monthly_event_lists(request, month_starts: list[datetime.date]) -> str:
+    """
+    Get the rendered, unfiltered monthly-event-list partial of the given months, from the per-month cache when possible.
+
+    :param request: HttpRequest of the viewer
+    :param month_starts: list of the first days of the months to render, in display order
+    :return: html of all the months
+    """
+
+    cutoff = timezone.now().date()
+    return render_monthly_event_lists(
+        month_starts, cutoff, request, lambda missing: get_events_by_month(missing, cutoff),
+        horizon=get_recurrence_horizon(cutoff),
+    )
+
+
+async def arender_to_string(template_name: str, context: dict, request) -> str:
+    """
+    Render a template in a thread from an async view, since template rendering, the fragment cache,
+    and the lazy request.user are synchronous.
+    """
+
+    return await sync_to_async(render_to_string)(template_name, context, request)
+
+
+def stream_monthly_event_list(request, month_date: datetime.date, event_list: list[Event]):
+    """
+    Generate the element patches that append one month of events to the event feed.
+    The empty month is appended first, then its event cards are rendered and appended in chunks,
+    so the browser can display the first events while the rest are still rendering.
+
+    :param request: HttpRequest of the viewer
+    :param month_date: datetime.date of the first day of the month
+    :param event_list: list of the month's events
+    :return: generator of (html, selector, patch_mode) tuples for stream_respond_via_sse
+    """
+
+    month_list_id = f"month-events-{month_date:%Y-%m}"
+    context = {"month_year": f"{month_date.strftime('%B')} {month_date.year}", "month_list_id": month_list_id}
+    yield (
+        render_to_string("partials/monthly_event_list.html#streamed-month", context, request),
+        '#appended-monthly-event-list',
+        ElementPatchMode.APPEND,
+    )
+    for i in range(0, len(event_list), STREAMED_EVENTS_CHUNK_SIZE):
+        chunk = event_list[i:i + STREAMED_EVENTS_CHUNK_SIZE]
+        yield (
+            render_to_string("partials/event_list.html#event-list", {"event_list": chunk}, request),
+            f"#{month_list_id}",
+            ElementPatchMode.APPEND,
+        )
+
+
+def get_ical_feed_events(filter_q: Q):
+    """
+    Get the upcoming events of a feed along with the occurrences of its recurring events up to the recurrence
+    horizon, including those of series that started before today.
+    The stored events are streamed from the database and the occurrences are merged into them as they go.
+
+    :param filter_q: Q object of the feed's Event filters
+    :return: iterable of dictionaries of FEED_EVENT_FIELDS, see core.ical.render_event
+    """
+
+    today = timezone.now().date()
+    events = (
+        Event.objects.filter(filter_q, date__gte=today)
+        .order_by('date', 'start_time', 'title', 'id')
+        .values(*FEED_EVENT_FIELDS)
+        .iterator(chunk_size=ICAL_FEED_QUERY_CHUNK_SIZE)
+    )
+    occurrences = get_occurrences(today, get_recurrence_horizon(today), filter_q)
+    return merge_occurrence_values(
+        events, [get_occurrence_values(occurrence, FEED_EVENT_FIELDS) for occurrence in occurrences]
+    )
+
+
+def respond_with_ical_feed(request, page_state: tuple, scope: str, name: str, filter_q: Q) -> HttpResponse:
+    """
+    Respond with an iCalendar feed of upcoming events from the feed cache, or stream it while caching it.
+    The feed is cached under its page state, so it is rendered again after every event change,
+    and is shared by every viewer who sees the same feed.
+
+    :param request: HttpRequest of the feed
+    :param page_state: state of the feed from core.conditional
+    :param scope: feed cache scope, see feed_key
+    :param name: calendar name displayed by calendar apps
+    :param filter_q: Q object of the feed's Event filters
+    :return: HttpResponse with the cached feed, or StreamingHttpResponse rendering it
+    """
+
+    host = f"{request.scheme}://{request.get_host()}"
+    content = get_cached_stream(
+        feed_key(scope, page_state, request.user.is_authenticated, host),
+        lambda: render_calendar(name, get_ical_feed_events(filter_q), request),
+    )
+    if isinstance(content, str):
+        return HttpResponse(content, content_type=ICAL_CONTENT_TYPE)
+    return StreamingHttpResponse(content, content_type=ICAL_CONTENT_TYPE)
+
+
+def get_requested_occurrence(event: Event, date_param: str) -> Event | None:
+    """
+    Get the occurrence of an event on the date given in a URL, which is the event itself on its own date.
+
+    :param event: stored event, the first occurrence of its series if it is recurring
+    :param date_param: date in YYYY-MM-DD format
+    :return: the occurrence, or None if the date is invalid or the event does not occur on it
+    """
+
+    try:
+        date = datetime.date.fromisoformat(date_param)
+    except ValueError:
+        return None
+    return event if date == event.date else get_occurrence(event, date)
+
+
+def get_filtered_events_context(request, filters: dict[str, list[str]]) -> dict:
+    """
+    Get the facets and the rendered first months of upcoming events for the given facet filters.
+    Without any filters the months come from the per-month cache.
+
+    :param request: HttpRequest of the viewer
+    :param filters: dictionary created by get_event_filters
+    :return: context dictionary for the event facets and event feed partials
+    """
+
+    now = timezone.now().date()
+    num_months = 3
+
+    if filters:
+        monthly_events = get_monthly_events(now, num_months, event_filters_q(filters))
+        monthly_event_list_html = render_to_string(
+            "partials/monthly_event_list.html#monthly-event-list", {'monthly_events': monthly_events}, request
+        )
+    else:
+        month_starts = [now.replace(day=1) + relativedelta(months=+i) for i in range(num_months)]
+        monthly_event_list_html = render_cached_monthly_event_lists(request, month_starts)
+
+    # series that started before today still have upcoming occurrences
+    series_queryset = get_series_queryset(now, get_recurrence_horizon(now)).filter(date__lt=now) if has_series() else None
+    return {
+        'facets': get_facets(Event.objects.filter(date__gte=now), filters, series_queryset),
+        'near_me_radius_miles': NEAR_ME_RADIUS_MILES,
+        'monthly_event_list_html': monthly_event_list_html,
+        'next_month_cursor': encode_month_cursor(now + relativedelta(months=+num_months)),
+    }
 
 
 def about(request):
@@ -33,83 +508,172 @@ def about(request):
     return render(request, "about.html")
 
 
-def events(request):
+def search(request):
     """
     Django view.
-    Render the events page.
+    Render the search page, with results if a query was given in the URL.
     """
 
-    monthly_events = {}
-    now = timezone.now().date()
-    events_date = now
+    search_query = request.GET.get("q", "").strip()
+    context = {
+        'search_query': search_query,
+        'events': search_events(search_query) if search_query else [],
+        'organizations': search_organizations(search_query) if search_query else [],
+    }
 
-    num_months = 3
-    for i in range(num_months):
-        events_date = now + relativedelta(months=+i)
-        queryset = get_events_by_month_and_year(events_date)
-        if i == 0:
-            queryset = queryset.filter(date__gte=now)
+    return render(request, "search.html", context)
 
-        monthly_events[f"{events_date.strftime('%B')} {events_date.year}"] = queryset
+
+def search_results_as_sse(request):
+    """
+    Datastar SSE Django View. Called from the Search page.
+
+    Read the search query from the request datastar dictionary, search the upcoming events and organizations,
+    generate the ranked and highlighted results html, and return as an SSE.
+    Also save the query in the page URL.
+    """
+
+    try:
+        qdict = json.loads(request.GET.get("datastar"))
+        search_query = str(qdict.get("search_query", "")).strip()
+    except (TypeError, ValueError, AttributeError):
+        return patch_signals_respond_via_sse({"search_error": True})
 
     context = {
-        'monthly_events': monthly_events,
-        'current_month': events_date.month,
-        'current_year': events_date.year,
+        'search_query': search_query,
+        'events': search_events(search_query) if search_query else [],
+        'organizations': search_organizations(search_query) if search_query else [],
     }
 
-    return render(request, 'events.html', context)
+    html_response = render(
+        request,
+        "search.html#search-results",
+        context
+    )
+    url = f"{reverse('core:search')}?{urlencode({'q': search_query})}" if search_query else reverse('core:search')
+    return respond_via_sse(html_response, signals={"search_error": False}, url=url)
+
+
+@conditional_page(get_site_page_state)
+def events(request):
+    """
+    Django view.
+    Render the events page.
+    """
 
+    return render(request, 'events.html', get_filtered_events_context(request, {}))
 
 
-def events_get_next_month_events_as_sse(request):
+def events_filter_as_sse(request):
     """
     Datastar SSE Django View. Called from the Events page.
 
-    Locate the currently displayed month and year from the request datastar dictionary,
-    calculate the subsequent month and year, generate the corresponding events html,
-    and return as an SSE.
-    Also send the incremented month/year back to the frontend as patch signals.
+    Read the selected facet filters from the request datastar dictionary, and return the updated facet counts
+    and the first months of matching events as an SSE, morphed into place by element id.
+    Also reset the next month cursor and load more signals for the new filter.
     """
 
-    today = timezone.now()
     signals = {"next_month_events_error": False}
 
-    # get current month and year from datastar signals dict
     try:
         qdict = json.loads(request.GET.get("datastar"))
-        month = qdict.get("current_month", today.month)
-        year = qdict.get("current_year", today.year)
-    except TypeError:
+        filters = get_event_filters(qdict, request.user.is_authenticated)
+    except (TypeError, ValueError, AttributeError):
         signals["next_month_events_error"] = True
         return patch_signals_respond_via_sse(signals)
 
-    # increment month by using relative delta in case the year rolls over
-    events_date = datetime(year=year, month=month, day=1)
-    events_date = events_date + relativedelta(months=+1)
+    context = get_filtered_events_context(request, filters)
+    signals["next_month_cursor"] = context["next_month_cursor"]
+    signals["more_events"] = True
+
+    html_response = HttpResponse(
+        render_to_string("partials/event_facets.html#event-facets", context, request)
+        + render_to_string("partials/event_feed.html#event-feed", context, request)
+    )
+    return respond_via_sse(html_response, signals=signals)
+
+
+
+async def events_get_next_month_events_as_sse(request):
+    """
+    Async Datastar SSE Django View. Called from the Events page.
+
+    Decode the next month cursor and facet filters from the request datastar dictionary, jump straight to
+    the next month that has matching events, generate the corresponding events html, and return as an SSE.
+    Unfiltered months come from the per-month cache, while filtered months are streamed in chunks as they render.
+    Also send the cursor for the month after it back to the frontend as a patch signal.
+    The response only depends on the signals, so it may be stored by shared caches.
+    """
+
+    signals = {"next_month_events_error": False}
+    # the lazy request.user loads the user synchronously
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+
+    # get the next month cursor from datastar signals dict
+    try:
+        qdict = json.loads(request.GET.get("datastar"))
+        cursor_date = decode_month_cursor(qdict.get("next_month_cursor"))
+        filters = get_event_filters(qdict, is_authenticated)
+    except (TypeError, ValueError, AttributeError):
+        signals["next_month_events_error"] = True
+        return patch_signals_respond_via_sse(signals)
 
-    # check and see if any future events
-    if not Event.objects.filter(date__gte=events_date).exists():
+    if filters:
+        # the near me filter may look up the location index the first time, which is a synchronous query
+        filter_q = await sync_to_async(event_filters_q)(filters)
+        events_date, event_list = await aget_next_month_events(cursor_date, filter_q)
+    else:
+        events_date = await aget_next_event_month(cursor_date)
+    if events_date is None:
         signals["more_events"] = False
         return patch_signals_respond_via_sse(signals)
 
-    queryset = get_events_by_month_and_year(events_date)
+    signals["next_month_cursor"] = encode_month_cursor(events_date + relativedelta(months=+1))
 
-    monthly_events = {f"{events_date.strftime('%B')} {events_date.year}": queryset}
-    signals["current_month"] = events_date.month
-    signals["current_year"] = events_date.year
-    context = {
-        'monthly_events': monthly_events,
-    }
+    if filters:
+        response = stream_respond_via_sse(
+            stream_monthly_event_list(request, events_date, event_list), signals=signals,
+            asynchronous=is_asgi_request(request),
+        )
+    else:
+        html_response = HttpResponse(await sync_to_async(render_cached_monthly_event_lists)(request, [events_date]))
+        response = respond_via_sse(html_response, signals=signals, selector='#appended-monthly-event-list', patch_mode=ElementPatchMode.APPEND)
+    return allow_shared_caching(response, request)
 
-    html_response = render(
-        request,
-        "partials/monthly_event_list.html#monthly-event-list",
-        context
-    )
-    return respond_via_sse(html_response, signals=signals, selector='#appended-monthly-event-list', patch_mode=ElementPatchMode.APPEND)
 
+def events_live_updates_as_sse(request):
+    """
+    Long-lived Datastar SSE Django View. Opened by the Events and Organization Details pages when they load.
+
+    Push the event card patches, removals, and new event signals of every event change as it is committed.
+    The optional organization query parameter limits the changes to one organization's events.
+    The stream is async, so it is only served under ASGI. Under WSGI it would hold a whole worker for as long as
+    the page is open, so it responds with 204 and the page goes without live updates.
+    Responds with 503 when this worker already has LIVE_UPDATES_MAX_CONNECTIONS open streams,
+    so the browser retries later.
+    """
+
+    try:
+        organization_id = int(request.GET["organization"]) if "organization" in request.GET else None
+    except ValueError:
+        raise BadRequest("Invalid organization id.")
+
+    if not is_asgi_request(request):
+        return HttpResponse(status=204)
+
+    if not live_connections.acquire():
+        response = HttpResponse("Too many live update connections", status=503)
+        response["Retry-After"] = str(int(settings.LIVE_UPDATES_HEARTBEAT_SECONDS))
+        return response
+
+    response = StreamingHttpResponse(LiveEventUpdates(request, organization_id))
+    response["Content-Type"] = "text/event-stream"
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
+
+@conditional_page(get_event_page_state)
 def event_details(request, event_id):
     """
     Django view.
@@ -117,8 +681,10 @@ def event_details(request, event_id):
     """
 
     event = Event.objects.filter(id=event_id).first()
+    if event and request.GET.get("date"):
+        event = get_requested_occurrence(event, request.GET["date"])
     if event:
-        context = {"event": event}
+        context = {"event": event, "recurrence": getattr(event, "recurrence", None)}
         if event.primary_contact:
             context["contact_event_count"] = len(Event.objects.filter(primary_contact=event.primary_contact))
         return render(request, "event_details.html", context)
@@ -126,6 +692,33 @@ def event_details(request, event_id):
         raise Http404("Event does not exist")
 
 
+@conditional_page(get_site_page_state)
+def events_ical_feed(request):
+    """
+    Django view.
+    Stream an iCalendar feed of every upcoming event, for calendar app subscriptions.
+    """
+
+    page_state = get_memoized_page_state(request, get_site_page_state)
+    return respond_with_ical_feed(request, page_state, "events", "WeVolunteer Events", Q())
+
+
+@conditional_page(get_site_page_state)
+def api_events(request):
+    """
+    JSON API Django view, version 1.
+    Respond with one page of events, filtered by the start and end dates, organization ids, and the event_descriptors,
+    times_of_day, and location_descriptors facet values, with only the fields listed in the fields parameter.
+    The next page is requested with the returned next_cursor.
+    Contact fields and the address are only available to logged in users.
+    """
+
+    try:
+        return JsonResponse(get_api_events_page(request))
+    except ApiError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+
 @login_required()
 @permission_required("events.add_event", raise_exception=True)
 def event_add(request):
@@ -135,12 +728,12 @@ def event_add(request):
     """
 
     if request.method == "POST":
-        form = EventForm(request.POST, user=request.user)
+        form = EventForm(request.POST, organization_id=get_administered_organization_id(request.user))
         if form.is_valid():
             event = form.save()
             return redirect('core:event-details', event.id)
     else:
-        form = EventForm(user=request.user)
+        form = EventForm(organization_id=get_administered_organization_id(request.user))
 
     context = {
         'form': form,
@@ -163,12 +756,12 @@ def event_edit(request, event_id: int):
     event = Event.objects.filter(id=event_id).first()
 
     if request.method == "POST":
-        form = EventForm(request.POST, instance=event, user=request.user)
+        form = EventForm(request.POST, instance=event, organization_id=get_administered_organization_id(request.user))
         if form.is_valid():
             form.save()
             return redirect('core:event-details', event.id)
     else:
-        form = EventForm(instance=event, user=request.user)
+        form = EventForm(instance=event, organization_id=get_administered_organization_id(request.user))
 
     context = {
         'form': form,
@@ -195,22 +788,73 @@ def event_delete(request, event_id: int):
     return redirect('core:org-details', org_id)
 
 
+@login_required()
+@permission_required("events.change_event", fn=objectgetter(Event, "event_id"), raise_exception=True)
+def event_occurrence_cancel(request, event_id: int, occurrence_date: str):
+    """
+    Django view.
+    Handle cancellation of a single occurrence of a recurring Event.
+    """
+    if request.method != "POST":
+        raise BadRequest("Only POST requests are allowed to cancel an occurrence.")
+
+    event = Event.objects.filter(id=event_id).first()
+    occurrence = get_requested_occurrence(event, occurrence_date)
+    if occurrence is None or not occurrence.is_occurrence:
+        raise Http404("Event does not occur on this date")
+
+    cancel_occurrence(occurrence)
+    return redirect('core:event-details', event.id)
+
+
+@login_required()
+@permission_required("events.change_event", fn=objectgetter(Event, "event_id"), raise_exception=True)
+def event_occurrence_edit(request, event_id: int, occurrence_date: str):
+    """
+    Django view.
+    Replace a single occurrence of a recurring Event with an Event of its own, and redirect to its edit form.
+    """
+    if request.method != "POST":
+        raise BadRequest("Only POST requests are allowed to edit an occurrence.")
+
+    event = Event.objects.filter(id=event_id).first()
+    occurrence = get_requested_occurrence(event, occurrence_date)
+    if occurrence is None or not occurrence.is_occurrence:
+        raise Http404("Event does not occur on this date")
+
+    replacement = replace_occurrence(occurrence)
+    return redirect('core:event-edit', replacement.id)
+
+
+@conditional_page(get_site_page_state)
 def organizations(request):
     """
     Django view.
-    Render the organizations page.
+    Render the organizations page, one page of organizations at a time.
     """
-    upcoming_events = Event.objects.filter(date__gte=timezone.now().date())
-    orgs = Organization.objects.all()
-    org_event_counts = {org.id: len(upcoming_events.filter(organization=org)) for org in orgs}
+
+    paginator = Paginator(Organization.objects.order_by('name'), ORGANIZATIONS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+
+    # count upcoming events for only the organizations on this page, in one GROUP BY query
+    today = timezone.now().date()
+    page.object_list = list(
+        Organization.objects.filter(id__in=page.object_list.values('id'))
+        .annotate(upcoming_events_count=Count('event', filter=Q(event__date__gte=today)))
+        .order_by('name')
+    )
+    occurrence_counts = count_occurrences_by_organization([org.id for org in page.object_list], today)
+    for org in page.object_list:
+        org.upcoming_events_count += occurrence_counts.get(org.id, 0)
 
     context = {
-        "org_list": orgs,
-        "org_event_counts": org_event_counts,
+        "org_list": page.object_list,
+        "page_obj": page,
     }
     return render(request, "organizations.html", context=context)
 
 
+@conditional_page(get_organization_page_state)
 def organization_details(request, org_id: int):
     """
     Django view.
@@ -220,67 +864,82 @@ def organization_details(request, org_id: int):
     if not org:
         raise Http404("Organization does not exist")
 
-    now = timezone.now().date()
-    org_events = Event.objects.filter(organization=org)
-    upcoming_events = org_events.filter(date__gte=now)
-
-    # display and load 3 past events at a time
-    past_events_count = 3
-    all_past_events = org_events.filter(date__lt=now).order_by('-date', 'start_time', 'title')
-    past_events = all_past_events[:past_events_count] if len(all_past_events) > past_events_count else all_past_events
-    past_events_shown = [event.id for event in past_events]
+    today = timezone.now().date()
+    upcoming_events = (
+        Event.objects.filter(organization=org, date__gte=today)
+        .select_related('organization', 'primary_contact')
+        .order_by('date', 'start_time', 'title')
+    )
+    # the next occurrences of each recurring event, and the count of every occurrence up to the recurrence horizon
+    occurrences = get_occurrences(today, datetime.date.max, Q(organization=org), limit=ORGANIZATION_OCCURRENCES_PER_SERIES)
+    upcoming_events = list(upcoming_events)
+    upcoming_events_count = len(upcoming_events) + count_occurrences_by_organization([org.id], today).get(org.id, 0)
+    upcoming_events = merge_occurrences(upcoming_events, occurrences)
+    past_events, past_events_cursor = get_past_events_page(org)
 
     context = {
         "org": org,
         "upcoming_events": upcoming_events,
+        "upcoming_events_count": upcoming_events_count,
         "past_events": past_events,
-        "past_events_count": past_events_count,
-        "past_events_shown": past_events_shown,
+        "past_events_cursor": past_events_cursor,
     }
     return render(request, "organization_details.html", context)
 
 
-def organization_details_get_next_past_events_as_sse(request, org_id):
+async def organization_details_get_next_past_events_as_sse(request, org_id):
     """
-    Datastar SSE Django View. Called from an Organization Details page.
+    Async Datastar SSE Django View. Called from an Organization Details page.
 
-    Locate the currently displayed past events and the count to load from the request datastar dictionary,
-    calculate the slice of additional past events to show, generate the html response, and return as an SSE.
-    Also send the new list of displayed past event ids back as a patched signal.
+    Decode the past events cursor from the request datastar dictionary, load the next page of past events
+    after it, generate the html response, and return as an SSE.
+    Also send the cursor for the following page back as a patched signal.
+    The response only depends on the signals, so it may be stored by shared caches.
     """
 
-    org = Organization.objects.filter(id=org_id).first()
-    if not org:
+    if not await Organization.objects.filter(id=org_id).aexists():
         raise Http404("Organization does not exist")
 
     signals = {"past_events_error": False}
     try:
         qdict = json.loads(request.GET.get("datastar"))
-        past_events_count = qdict.get("past_events_count", 0)
-        past_events_shown = qdict.get("past_events_shown", 0)
-    except TypeError:
+        after = decode_event_cursor(qdict.get("past_events_cursor"))
+    except (TypeError, ValueError):
         signals["past_events_error"] = True
         return patch_signals_respond_via_sse(signals)
 
-    now = timezone.now().date()
-    all_past_events = Event.objects.filter(organization=org, date__lt=now).order_by('-date', 'start_time', 'title')
-
-    # exclude events which are already shown
-    past_events = all_past_events.exclude(id__in=past_events_shown)
-    if len(past_events) > past_events_count:
-        past_events = past_events[:past_events_count]
-    else:
+    past_events, past_events_cursor = await aget_past_events_page(org_id, after=after)
+    if past_events_cursor is None:
         signals["more_events"] = False
+    signals["past_events_cursor"] = past_events_cursor or ""
 
-    signals["past_events_shown"] = past_events_shown + [event.id for event in past_events]
     context = { "event_list": past_events, }
-    html_response = render(request, "partials/event_list.html#event-list", context)
-    return respond_via_sse(
+    html_response = HttpResponse(await arender_to_string("partials/event_list.html#event-list", context, request))
+    response = respond_via_sse(
         html_response,
         signals=signals,
         selector='#appended-past-events',
         patch_mode=ElementPatchMode.APPEND
     )
+    return allow_shared_caching(response, request)
+
+
+@conditional_page(get_organization_page_state)
+def organization_ical_feed(request, org_id: int):
+    """
+    Django view.
+    Stream an iCalendar feed of an organization's upcoming events, for calendar app subscriptions.
+    """
+
+    page_state = get_memoized_page_state(request, get_organization_page_state, org_id)
+    if page_state is None:
+        raise Http404("Organization does not exist")
+
+    org_name = Organization.objects.values_list('name', flat=True).get(id=org_id)
+    return respond_with_ical_feed(
+        request, page_state, f"organization:{org_id}", f"{org_name} - WeVolunteer", Q(organization_id=org_id)
+    )
+
 
 @login_required()
 @permission_required("organizations.change_organization", fn=objectgetter(Organization, "org_id"), raise_exception=True)
@@ -316,12 +975,12 @@ def organization_contact_add(request):
     """
 
     if request.method == "POST":
-        form = OrganizationContactForm(request.POST, user=request.user)
+        form = OrganizationContactForm(request.POST, organization_id=get_administered_organization_id(request.user))
         if form.is_valid():
             org_contact = form.save()
             return redirect('core:org-details', org_contact.organization.id)
     else:
-        form = OrganizationContactForm(user=request.user)
+        form = OrganizationContactForm(organization_id=get_administered_organization_id(request.user))
 
     context = {
         'form': form,
@@ -340,12 +999,12 @@ def organization_contact_edit(request, org_contact_id: int):
     contact = OrganizationContact.objects.filter(id=org_contact_id).first()
 
     if request.method == "POST":
-        form = OrganizationContactForm(request.POST, instance=contact, user=request.user)
+        form = OrganizationContactForm(request.POST, instance=contact, organization_id=get_administered_organization_id(request.user))
         if form.is_valid():
             form.save()
             return redirect('core:org-details', contact.organization.id)
     else:
-        form = OrganizationContactForm(instance=contact, user=request.user)
+        form = OrganizationContactForm(instance=contact, organization_id=get_administered_organization_id(request.user))
 
     contact_event_count = len(Event.objects.filter(primary_contact=contact))
 
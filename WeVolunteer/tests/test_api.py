@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.api import ApiError, get_api_fields
+from core.models import Event, EventDescriptors, EventRecurrence, Organization, OrganizationContact, RecurrenceFrequency
+
+
+class ApiFieldsTests(SimpleTestCase):
+    """
+    Test class for the fields parameter of the events API.
+    """
+
+    def test_default_fields_depend_on_authentication(self):
+        self.assertNotIn("address", get_api_fields(None, False))
+        self.assertNotIn("primary_contact.name", get_api_fields(None, False))
+        self.assertIn("primary_contact.name", get_api_fields(None, True))
+
+    def test_nested_object_selects_its_fields(self):
+        self.assertEqual(
+            get_api_fields("organization,title", False),
+            ["title", "organization.id", "organization.name", "organization.website"],
+        )
+
+    def test_invalid_fields(self):
+        with self.assertRaises(ApiError):
+            get_api_fields("title,venue", True)
+        with self.assertRaises(ApiError) as context:
+            get_api_fields("primary_contact.email", False)
+        self.assertEqual(context.exception.status, 403)
+
+
+class ApiEventsViewTests(TestCase):
+    """
+    Test class for the events API view.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org", website="https://example.org")
+        self.other_org = Organization.objects.create(name="Other Org")
+        self.contact = OrganizationContact.objects.create(organization=self.org, name="Casey", email="casey@example.org")
+        self.tomorrow = date.today() + timedelta(days=1)
+        self.events = [
+            Event.objects.create(
+                title=f"Event {i}",
+                organization=self.org,
+                primary_contact=self.contact if i == 0 else None,
+                date=self.tomorrow + timedelta(days=i // 2),
+                start_time="10:00" if i % 2 else "08:00",
+                address="123 Main St",
+                event_descriptor_tags=[EventDescriptors.PAINTING] if i < 3 else [],
+            )
+            for i in range(5)
+        ]
+        self.other_event = Event.objects.create(
+            title="Other Event", organization=self.other_org, date=self.tomorrow, start_time="19:00"
+        )
+        Event.objects.create(title="Past Event", organization=self.org, date=date.today() - timedelta(days=3), start_time="10:00")
+        self.url = reverse("core:api-events")
+
+    def get_events(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_default_response(self):
+        data = self.get_events()
+        self.assertIsNone(data["next_cursor"])
+        self.assertEqual(
+            [event["title"] for event in data["events"]],
+            ["Event 0", "Event 1", "Other Event", "Event 2", "Event 3", "Event 4"],
+        )
+        event = data["events"][0]
+        self.assertEqual(event["date"], self.tomorrow.isoformat())
+        self.assertEqual(event["start_time"], "08:00:00")
+        self.assertEqual(event["times_of_day"], ["MORNING"])
+        self.assertEqual(event["organization"], {"id": self.org.id, "name": "Org", "website": "https://example.org"})
+        self.assertEqual(event["url"], f"http://testserver/events/{self.events[0].id}")
+        self.assertNotIn("address", event)
+        self.assertNotIn("primary_contact", event)
+
+    def test_contact_fields_for_logged_in_users(self):
+        self.client.force_login(User.objects.create_user(username="john", password="password"))
+        events = self.get_events(fields="title,address,primary_contact")["events"]
+        self.assertEqual(events[0], {
+            "title": "Event 0",
+            "address": "123 Main St",
+            "primary_contact": {"name": "Casey", "email": "casey@example.org", "phone": None, "notes": None},
+        })
+        self.assertIsNone(events[1]["primary_contact"])
+
+    def test_sparse_fields_skip_joins(self):
+        # caches the number of recurring event series, which is zero
+        self.get_events()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "title,organization.id"})
+        self.assertEqual(response.json()["events"][0], {"title": "Event 0", "organization": {"id": self.org.id}})
+        # the page state aggregate, then the events without a join
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("JOIN", queries[1]["sql"])
+        self.assertNotIn("description", queries[1]["sql"])
+
+    def test_filters(self):
+        titles = lambda **params: [event["title"] for event in self.get_events(fields="title", **params)["events"]]
+        self.assertEqual(titles(organization=self.other_org.id), ["Other Event"])
+        self.assertEqual(titles(event_descriptors="PAINTING"), ["Event 0", "Event 1", "Event 2"])
+        self.assertEqual(titles(times_of_day="EVENING,NIGHT"), ["Other Event"])
+        self.assertEqual(titles(start=(self.tomorrow + timedelta(days=1)).isoformat(), end=(self.tomorrow + timedelta(days=1)).isoformat()), ["Event 2", "Event 3"])
+        self.assertIn("Past Event", titles(start=(date.today() - timedelta(days=7)).isoformat()))
+
+    def test_cursor_pagination(self):
+        titles = []
+        cursor = ""
+        pages = 0
+        while cursor is not None:
+            data = self.get_events(fields="title", limit=4, cursor=cursor)
+            titles += [event["title"] for event in data["events"]]
+            cursor = data["next_cursor"]
+            pages += 1
+        self.assertEqual(pages, 2)
+        self.assertEqual(titles, ["Event 0", "Event 1", "Other Event", "Event 2", "Event 3", "Event 4"])
+
+    def test_occurrences_of_series_started_before_today(self):
+        series = Event.objects.create(
+            title="Weekly Shift", organization=self.other_org, date=self.tomorrow - timedelta(days=14), start_time="12:00"
+        )
+        EventRecurrence.objects.create(event=series, frequency=RecurrenceFrequency.WEEKLY)
+        params = {"fields": "id,title,date", "organization": self.other_org.id, "end": (self.tomorrow + timedelta(days=14)).isoformat()}
+        events = self.get_events(**params)["events"]
+        self.assertEqual(
+            [(event["title"], event["date"]) for event in events],
+            [
+                ("Weekly Shift", self.tomorrow.isoformat()),
+                ("Other Event", self.tomorrow.isoformat()),
+                ("Weekly Shift", (self.tomorrow + timedelta(days=7)).isoformat()),
+                ("Weekly Shift", (self.tomorrow + timedelta(days=14)).isoformat()),
+            ],
+        )
+        self.assertEqual(events[0]["id"], series.id)
+        self.assertTrue(events[0]["url"].endswith(f"/{series.id}?date={self.tomorrow.isoformat()}"))
+
+        # paging through the occurrences gives the same events
+        titles = []
+        cursor = ""
+        while cursor is not None:
+            data = self.get_events(**params, limit=1, cursor=cursor)
+            titles += [(event["title"], event["date"]) for event in data["events"]]
+            cursor = data["next_cursor"]
+        self.assertEqual(titles, [(event["title"], event["date"]) for event in events])
+
+    def test_invalid_parameters(self):
+        for params in [
+            {"fields": "venue"},
+            {"start": "tomorrow"},
+            {"organization": "abc"},
+            {"event_descriptors": "JUGGLING"},
+            {"limit": "1000"},
+            {"cursor": "abc"},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("error", response.json())
+        self.assertEqual(self.client.get(self.url, {"fields": "primary_contact"}).status_code, 403)
@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase
+
+from benchmarks.views import find_regressions, get_route_names, get_view_requests
+
+
+def get_result(p50=10.0, queries=3, size=1000, status=200) -> dict:
+    return {"p50": p50, "p95": p50, "p99": p50, "max": p50, "queries": queries, "bytes": size, "status": status}
+
+
+class ViewBenchmarkTests(SimpleTestCase):
+    """
+    Test class for the route coverage and the baseline comparison of the views benchmark.
+    """
+
+    def test_every_route_has_a_request(self):
+        view_requests = get_view_requests({
+            "organization": 1, "contact": 2, "event": 3, "recurring_event": 4, "occurrence_date": "2026-01-01",
+            "next_month_cursor": "cursor", "past_events_cursor": "cursor",
+        })
+        routes = [view_request["route"] for view_request in view_requests]
+        self.assertEqual(len(routes), len(set(routes)))
+        self.assertEqual(set(routes), get_route_names())
+
+    def test_find_regressions(self):
+        baseline = {"a (anonymous)": get_result(), "b (anonymous)": get_result(p50=0.2)}
+        # within the tolerance, too small a slowdown, and routes missing from the baseline are not flagged
+        results = {
+            "a (anonymous)": get_result(p50=12.0, size=1200),
+            "b (anonymous)": get_result(p50=0.8),
+            "c (anonymous)": get_result(),
+        }
+        self.assertEqual(find_regressions(results, baseline, tolerance=0.25, min_slowdown=1.0), [])
+
+        results = {"a (anonymous)": get_result(p50=20.0, queries=4, size=2000, status=302)}
+        self.assertEqual(find_regressions(results, baseline, tolerance=0.25, min_slowdown=1.0), [
+            "a (anonymous): status 200 -> 302",
+            "a (anonymous): p50 10.00ms -> 20.00ms",
+            "a (anonymous): 3 -> 4 queries",
+            "a (anonymous): 1000 -> 2000 bytes",
+        ])
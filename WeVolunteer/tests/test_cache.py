@@ -0,0 +1,224 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from core.cache import (
+    bump_version,
+    get_versions,
+    organization_version_key,
+    render_event_cards,
+    render_monthly_event_lists,
+)
+from core.models import Event, Organization, OrganizationContact
+
+
+class VersionTests(TestCase):
+    """
+    Test class for the cache version keys.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_version_is_started(self):
+        versions = get_versions(["core:version:test"])
+        self.assertEqual(get_versions(["core:version:test"]), versions)
+
+    def test_bump_version_changes_version(self):
+        before = get_versions(["core:version:test"])["core:version:test"]
+        bump_version("core:version:test")
+        self.assertEqual(get_versions(["core:version:test"])["core:version:test"], before + 1)
+
+    def test_bump_missing_version_does_not_repeat_evicted_version(self):
+        before = get_versions(["core:version:test"])["core:version:test"]
+        cache.delete("core:version:test")
+        bump_version("core:version:test")
+        self.assertGreater(get_versions(["core:version:test"])["core:version:test"], before)
+
+
+class EventCardCacheTests(TestCase):
+    """
+    Test class for the event card fragment cache and its signal based invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.contact = OrganizationContact.objects.create(organization=self.org, name="Casey", email="casey@example.org")
+        self.event = Event.objects.create(
+            title="Cached Event",
+            organization=self.org,
+            primary_contact=self.contact,
+            date=date.today(),
+            start_time="10:00",
+            address="123 Main St",
+        )
+        self.user = User.objects.create_user(username="john", password="password")
+
+    def render(self, user=None):
+        request = RequestFactory().get("/")
+        request.user = user or AnonymousUser()
+        events = Event.objects.select_related("organization", "primary_contact").order_by("id")
+        return "".join(render_event_cards(events, request))
+
+    def test_cards_are_served_from_cache(self):
+        self.assertIn("Cached Event", self.render())
+        # queryset updates do not send signals, so the cached card is still used
+        Event.objects.filter(pk=self.event.pk).update(title="Changed Event")
+        self.assertIn("Cached Event", self.render())
+
+    def test_anonymous_and_authenticated_cards_are_separate(self):
+        anonymous_html = self.render()
+        user_html = self.render(self.user)
+        self.assertNotIn("123 Main St", anonymous_html)
+        self.assertNotIn("casey@example.org", anonymous_html)
+        self.assertIn("123 Main St", user_html)
+        self.assertIn("casey@example.org", user_html)
+        self.assertNotIn("123 Main St", self.render())
+
+    def test_event_save_invalidates_card(self):
+        self.render()
+        self.event.title = "Renamed Event"
+        self.event.save()
+        self.assertIn("Renamed Event", self.render())
+
+    def test_organization_save_invalidates_card(self):
+        self.render()
+        self.org.name = "Renamed Org"
+        self.org.save()
+        self.assertIn("Renamed Org", self.render())
+
+    def test_contact_save_and_delete_invalidate_card(self):
+        self.render(self.user)
+        self.contact.email = "casey@example.com"
+        self.contact.save()
+        self.assertIn("casey@example.com", self.render(self.user))
+
+        self.contact.delete()
+        self.assertNotIn("Casey", self.render(self.user))
+
+    def test_event_delete_invalidates_organization_version(self):
+        key = organization_version_key(self.org.id)
+        before = get_versions([key])[key]
+        self.event.delete()
+        self.assertNotEqual(get_versions([key])[key], before)
+
+    def test_cached_render_makes_no_queries(self):
+        for i in range(5):
+            Event.objects.create(title=f"Event {i}", organization=self.org, date=date.today(), start_time="10:00")
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        events = list(Event.objects.select_related("organization", "primary_contact"))
+
+        cards = render_event_cards(events, request)
+        self.assertEqual(len(cards), 6)
+        with self.assertNumQueries(0):
+            self.assertEqual(render_event_cards(events, request), cards)
+
+    def test_render_no_events(self):
+        self.assertEqual(render_event_cards([], RequestFactory().get("/")), [])
+
+
+class MonthListCacheTests(TestCase):
+    """
+    Test class for the per-month event list cache and its signal based invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.contact = OrganizationContact.objects.create(organization=self.org, name="Casey")
+        self.month = timezone.now().date().replace(day=1) + relativedelta(months=+1)
+        self.event = Event.objects.create(
+            title="Month Event",
+            organization=self.org,
+            primary_contact=self.contact,
+            date=self.month.replace(day=10),
+            start_time="10:00",
+        )
+        self.loaded = []
+
+    def load_events(self, month_starts):
+        self.loaded.append(month_starts)
+        events = Event.objects.select_related("organization", "primary_contact").order_by("date")
+        return {
+            month_start: [event for event in events if event.date.replace(day=1) == month_start]
+            for month_start in month_starts
+        }
+
+    def render(self, month_starts=None, cutoff=None, user=None):
+        request = RequestFactory().get("/")
+        request.user = user or AnonymousUser()
+        return render_monthly_event_lists(
+            month_starts or [self.month], cutoff or timezone.now().date(), request, self.load_events
+        )
+
+    def test_months_are_served_from_cache(self):
+        self.assertIn("Month Event", self.render())
+        self.assertIn("Month Event", self.render())
+        self.assertEqual(self.loaded, [[self.month]])
+
+    def test_only_missing_months_are_loaded(self):
+        next_month = self.month + relativedelta(months=+1)
+        self.render()
+        html = self.render([self.month, next_month])
+        self.assertEqual(self.loaded, [[self.month], [next_month]])
+        self.assertLess(html.index(self.month.strftime("%B")), html.index(next_month.strftime("%B")))
+
+    def test_cutoff_month_is_keyed_by_cutoff(self):
+        self.render(cutoff=self.month + relativedelta(days=1))
+        self.render(cutoff=self.month + relativedelta(days=1))
+        self.render(cutoff=self.month + relativedelta(days=2))
+        self.assertEqual(len(self.loaded), 2)
+
+    def test_authenticated_lists_are_separate(self):
+        self.render()
+        self.render(user=User.objects.create_user(username="john", password="password"))
+        self.assertEqual(len(self.loaded), 2)
+
+    def test_event_save_invalidates_month(self):
+        self.render()
+        self.event.title = "Renamed Event"
+        self.event.save()
+        self.assertIn("Renamed Event", self.render())
+
+    def test_event_moved_to_another_month_invalidates_both_months(self):
+        next_month = self.month + relativedelta(months=+1)
+        self.render([self.month, next_month])
+        self.event.date = next_month.replace(day=3)
+        self.event.save()
+        html = self.render([self.month, next_month])
+        self.assertEqual(self.loaded[-1], [self.month, next_month])
+        self.assertIn("Month Event", html)
+
+    def test_event_delete_invalidates_month(self):
+        self.render()
+        self.event.delete()
+        self.assertNotIn("Month Event", self.render())
+
+    def test_organization_save_invalidates_months_of_its_events(self):
+        self.render()
+        self.org.name = "Renamed Org"
+        self.org.save()
+        self.assertIn("Renamed Org", self.render())
+
+    def test_contact_save_and_delete_invalidate_months_of_its_events(self):
+        user = User.objects.create_user(username="john", password="password")
+        self.render(user=user)
+        self.contact.name = "Jordan"
+        self.contact.save()
+        self.assertIn("Jordan", self.render(user=user))
+
+        self.contact.delete()
+        self.assertNotIn("Jordan", self.render(user=user))
+
+    def test_unrelated_changes_keep_month_cached(self):
+        self.render()
+        Organization.objects.create(name="Other Org")
+        Event.objects.create(title="Other Event", organization=self.org, date=self.month + relativedelta(months=+3), start_time="10:00")
+        self.render()
+        self.assertEqual(len(self.loaded), 1)
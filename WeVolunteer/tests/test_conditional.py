@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Event, Organization, OrganizationAdministrator, OrganizationContact
+
+
+class ConditionalPageTests(TestCase):
+    """
+    Test class for the conditional GET handling of the event and organization pages.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.contact = OrganizationContact.objects.create(organization=self.org, name="Casey")
+        self.event = Event.objects.create(
+            title="Event", organization=self.org, date=date.today() + timedelta(days=1), start_time="10:00"
+        )
+        self.other_event = Event.objects.create(
+            title="Other Event", organization=self.org, date=date.today() + timedelta(days=2), start_time="10:00"
+        )
+        self.event_url = reverse("core:event-details", args=[self.event.id])
+        self.org_url = reverse("core:org-details", args=[self.org.id])
+
+    def assertNotModified(self, url, response):
+        self.assertEqual(self.client.get(url, headers={"if-none-match": response["ETag"]}).status_code, 304)
+
+    def assertModified(self, url, response):
+        self.assertEqual(self.client.get(url, headers={"if-none-match": response["ETag"]}).status_code, 200)
+
+    def test_repeat_visit_is_not_modified(self):
+        for url in [self.event_url, self.org_url, reverse("core:events"), reverse("core:organizations")]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("Last-Modified", response)
+            with self.assertNumQueries(1), self.assertTemplateNotUsed("base_head.html"):
+                not_modified = self.client.get(url, headers={"if-none-match": response["ETag"]})
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified.content, b"")
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.event_url)
+        not_modified = self.client.get(self.event_url, headers={"if-modified-since": response["Last-Modified"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_event_page_changes_with_its_organization(self):
+        response = self.client.get(self.event_url)
+        self.contact.name = "Jordan"
+        self.contact.save()
+        self.assertModified(self.event_url, response)
+
+        response = self.client.get(self.event_url)
+        self.other_event.delete()
+        self.assertModified(self.event_url, response)
+
+    def test_organization_page_changes_with_its_events(self):
+        response = self.client.get(self.org_url)
+        self.event.title = "Renamed Event"
+        self.event.save(update_fields=["title"])
+        self.assertModified(self.org_url, response)
+
+        other_org = Organization.objects.create(name="Other Org")
+        response = self.client.get(self.org_url)
+        Event.objects.create(title="Other Org Event", organization=other_org, date=date.today(), start_time="10:00")
+        self.assertNotModified(self.org_url, response)
+
+    def test_site_pages_change_with_deleted_organizations(self):
+        other_org = Organization.objects.create(name="Other Org")
+        for url in [reverse("core:events"), reverse("core:organizations")]:
+            response = self.client.get(url)
+            Organization.objects.filter(id=other_org.id).delete()
+            self.assertModified(url, response)
+            other_org = Organization.objects.create(name="Other Org")
+
+    def test_viewer_changes_etag(self):
+        response = self.client.get(self.event_url)
+        user = User.objects.create_user(username="john", password="password")
+        self.client.force_login(user)
+        self.assertModified(self.event_url, response)
+
+        response = self.client.get(self.event_url)
+        OrganizationAdministrator.objects.create(user=user, organization=self.org)
+        self.assertModified(self.event_url, response)
+
+    def test_missing_pages_are_not_found(self):
+        response = self.client.get(reverse("core:event-details", args=[0]), headers={"if-none-match": "*"})
+        self.assertEqual(response.status_code, 404)
+
+
+class OrganizationTouchTests(TestCase):
+    """
+    Test class for keeping Organization.updated_at current with its events and contacts.
+    """
+
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.other_org = Organization.objects.create(name="Other Org")
+        self.event = Event.objects.create(title="Event", organization=self.org, date=date.today(), start_time="10:00")
+        self.past = timezone.now() - timedelta(days=1)
+        Organization.objects.update(updated_at=self.past)
+
+    def updated_at(self, organization):
+        organization.refresh_from_db()
+        return organization.updated_at
+
+    def test_moved_event_touches_both_organizations(self):
+        self.event.organization = self.other_org
+        self.event.save()
+        self.assertGreater(self.updated_at(self.org), self.past)
+        self.assertGreater(self.updated_at(self.other_org), self.past)
+
+    def test_contact_delete_touches_organization(self):
+        contact = OrganizationContact.objects.create(organization=self.org, name="Casey")
+        Organization.objects.update(updated_at=self.past)
+        contact.delete()
+        self.assertGreater(self.updated_at(self.org), self.past)
+        self.assertEqual(self.updated_at(self.other_org), self.past)
+
+    def test_save_with_update_fields_updates_updated_at(self):
+        updated_at = self.event.updated_at
+        self.event.title = "Renamed Event"
+        self.event.save(update_fields=["title"])
+        self.event.refresh_from_db()
+        self.assertGreater(self.event.updated_at, updated_at)
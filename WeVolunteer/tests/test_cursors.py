@@ -0,0 +1,48 @@
+from datetime import date, time
+
+from django.test import SimpleTestCase
+
+from core.cursors import encode_month_cursor, decode_month_cursor, encode_event_cursor, decode_event_cursor
+from core.models import Event
+
+
+class MonthCursorTests(SimpleTestCase):
+    """
+    Test class for the month cursor helpers.
+    """
+
+    def test_round_trip_normalizes_to_first_of_month(self):
+        cursor = encode_month_cursor(date(2025, 11, 17))
+        self.assertEqual(decode_month_cursor(cursor), date(2025, 11, 1))
+
+    def test_cursor_is_opaque(self):
+        cursor = encode_month_cursor(date(2025, 11, 1))
+        self.assertNotIn("2025-11-01", cursor)
+
+    def test_decode_rejects_tampered_cursor(self):
+        cursor = encode_month_cursor(date(2025, 11, 1))
+        with self.assertRaises(ValueError):
+            decode_month_cursor(cursor[:-1] + ("A" if cursor[-1] != "A" else "B"))
+
+    def test_decode_rejects_missing_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_month_cursor(None)
+
+
+class EventCursorTests(SimpleTestCase):
+    """
+    Test class for the event keyset cursor helpers.
+    """
+
+    def test_round_trip(self):
+        event = Event(id=42, title="Toy Drive", date=date(2025, 12, 25), start_time=time(9, 30))
+        cursor = encode_event_cursor(event)
+        self.assertEqual(decode_event_cursor(cursor), (date(2025, 12, 25), time(9, 30), "Toy Drive", 42))
+
+    def test_decode_rejects_month_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_event_cursor(encode_month_cursor(date(2025, 11, 1)))
+
+    def test_decode_rejects_missing_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_event_cursor(None)
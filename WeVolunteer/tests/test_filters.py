@@ -0,0 +1,98 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase
+
+from core.filters import event_filters_q, get_event_filters, get_facets
+from core.models import Event, EventDescriptors, EventLocationDescriptors, Organization, TimeOfDay
+
+
+class EventFiltersTests(TestCase):
+    """
+    Test class for the faceted Event filters.
+    """
+
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        today = date.today()
+        Event.objects.create(
+            title="Indoor Moving",
+            organization=self.org,
+            date=today,
+            start_time="10:00",
+            event_descriptor_tags=[EventDescriptors.MOVING],
+            location_descriptor_tags=[EventLocationDescriptors.INDOOR],
+        )
+        Event.objects.create(
+            title="Outdoor Moving Yard Work",
+            organization=self.org,
+            date=today + relativedelta(days=1),
+            start_time="19:00",
+            event_descriptor_tags=[EventDescriptors.MOVING, EventDescriptors.YARD_WORK],
+            location_descriptor_tags=[EventLocationDescriptors.OUTDOOR],
+        )
+        Event.objects.create(
+            title="Outdoor Painting",
+            organization=self.org,
+            date=today + relativedelta(days=2),
+            start_time="10:00",
+            event_descriptor_tags=[EventDescriptors.PAINTING],
+            location_descriptor_tags=[EventLocationDescriptors.OUTDOOR],
+        )
+
+    def filtered_titles(self, filters):
+        return sorted(Event.objects.filter(event_filters_q(filters)).values_list("title", flat=True))
+
+    def test_get_event_filters_reads_signals(self):
+        filters = get_event_filters({
+            "filter_event_descriptors": ["YARD_WORK", "MOVING", "MOVING"],
+            "filter_times_of_day": [],
+            "next_month_cursor": "ignored",
+        })
+        self.assertEqual(filters, {"event_descriptors": ["MOVING", "YARD_WORK"]})
+
+    def test_get_event_filters_rejects_unknown_values(self):
+        with self.assertRaises(ValueError):
+            get_event_filters({"filter_location_descriptors": ["UNDERWATER"]})
+        with self.assertRaises(ValueError):
+            get_event_filters({"filter_times_of_day": "MORNING"})
+
+    def test_no_filters_match_everything(self):
+        self.assertEqual(len(self.filtered_titles({})), 3)
+
+    def test_values_within_a_facet_match_any(self):
+        self.assertEqual(
+            self.filtered_titles({"event_descriptors": ["YARD_WORK", "PAINTING"]}),
+            ["Outdoor Moving Yard Work", "Outdoor Painting"],
+        )
+
+    def test_separate_facets_must_all_match(self):
+        self.assertEqual(
+            self.filtered_titles({"event_descriptors": ["MOVING"], "location_descriptors": ["OUTDOOR"]}),
+            ["Outdoor Moving Yard Work"],
+        )
+        self.assertEqual(
+            self.filtered_titles({"location_descriptors": ["OUTDOOR"], "times_of_day": [TimeOfDay.MID_MORNING]}),
+            ["Outdoor Painting"],
+        )
+
+    def test_get_facets_counts_in_one_query(self):
+        filters = {"location_descriptors": ["OUTDOOR"]}
+        with self.assertNumQueries(1):
+            facets = get_facets(Event.objects.all(), filters)
+
+        counts = {
+            facet["signal"]: {option["value"]: option["count"] for option in facet["options"]}
+            for facet in facets
+        }
+        # other facets are counted within the current filter
+        self.assertEqual(counts["filter_event_descriptors"]["MOVING"], 1)
+        self.assertEqual(counts["filter_event_descriptors"]["PAINTING"], 1)
+        self.assertEqual(counts["filter_times_of_day"]["EVENING"], 1)
+        # a facet's own selection does not narrow its counts
+        self.assertEqual(counts["filter_location_descriptors"], {"INDOOR": 1, "OUTDOOR": 2, "VIRTUAL": 0})
+
+    def test_get_facets_marks_selected_options(self):
+        facets = get_facets(Event.objects.all(), {"event_descriptors": ["PAINTING"]})
+        selected = [option["value"] for facet in facets for option in facet["options"] if option["selected"]]
+        self.assertEqual(selected, ["PAINTING"])
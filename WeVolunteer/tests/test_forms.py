@@ -2,7 +2,7 @@ from datetime import timedelta
 from unittest.mock import patch
 
 from django import forms
-from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.utils import timezone
@@ -12,8 +12,7 @@ from core.forms import (
     EventForm,
     FirstLastNameSignupForm, OrganizationForm, OrganizationContactForm,
 )
-from core.models import Organization, OrganizationContact, OrganizationAdministrator, EventDescriptors, \
-    EventLocationDescriptors
+from core.models import Location, Organization, OrganizationContact, EventDescriptors, EventLocationDescriptors
 
 
 class FormHelperTests(TestCase):
@@ -218,18 +217,58 @@ class EventFormTests(TestCase):
             self.assertTrue(mock_func.called)
         self.assertIn("primary_contact", form.errors)
 
-    def test_widget_configuration_and_user_queryset_restriction(self):
-        user = User.objects.create_user(username='user', password='password123')
-        OrganizationAdministrator.objects.create(user=user, organization=self.organization)
-        form = EventForm(user=user)
+    def test_widget_configuration_and_organization_restriction(self):
+        cache.clear()
+        form = EventForm(organization_id=self.organization.id)
 
         self.assertEqual(list(form.fields["organization"].queryset), [self.organization])
         self.assertEqual(list(form.fields["primary_contact"].queryset), list(self.organization.organizationcontact_set.all()))
+        self.assertEqual(list(form.fields["organization"].choices), [(self.organization.id, "Org A")])
+        self.assertEqual(list(form.fields["primary_contact"].choices), [("", "Unassigned"), (self.contact.id, "John (Org A)")])
         self.assertEqual(form.fields["organization"].widget.attrs["class"], "form-select")
         self.assertEqual(form.fields["primary_contact"].widget.attrs["class"], "form-select")
         self.assertIn("placeholder", form.fields["date"].widget.attrs)
         self.assertEqual(form.fields["description"].widget.attrs["style"], "height: 130px")
 
+    def test_organization_form_renders_in_fixed_queries(self):
+        cache.clear()
+        for i in range(10):
+            OrganizationContact.objects.create(name=f"Contact {i}", organization=self.organization)
+            Location.objects.create(name=f"Location {i}", organization=self.organization, latitude=41.2, longitude=-111.9)
+        # the organization, its contacts, and its locations
+        with self.assertNumQueries(3):
+            html = str(EventForm(organization_id=self.organization.id)["primary_contact"])
+        self.assertIn("Contact 9 (Org A)", html)
+        self.assertNotIn("Jane", html)
+
+        with self.assertNumQueries(0):
+            form = EventForm(organization_id=self.organization.id)
+            str(form["organization"])
+            str(form["primary_contact"])
+            self.assertIn("Location 9 (Org A)", str(form["location"]))
+
+    def test_unscoped_form_joins_contact_organizations(self):
+        for i in range(10):
+            OrganizationContact.objects.create(name=f"Contact {i}", organization=self.other_org)
+        with self.assertNumQueries(1):
+            str(EventForm()["primary_contact"])
+
+    def test_contact_changes_invalidate_cached_choices(self):
+        cache.clear()
+        str(EventForm(organization_id=self.organization.id)["primary_contact"])
+        contact = OrganizationContact.objects.create(name="Added", organization=self.organization)
+        self.assertIn("Added (Org A)", str(EventForm(organization_id=self.organization.id)["primary_contact"]))
+
+        contact.delete()
+        self.assertNotIn("Added (Org A)", str(EventForm(organization_id=self.organization.id)["primary_contact"]))
+
+    def test_organization_form_rejects_other_organization_contact(self):
+        data = self.make_cleaned_data()
+        data.update(organization=self.organization.id, primary_contact=self.other_contact.id)
+        form = EventForm(data=data, organization_id=self.organization.id)
+        self.assertFalse(form.is_valid())
+        self.assertIn("primary_contact", form.errors)
+
 
 class OrganizationFormTests(TestCase):
     """
@@ -315,8 +354,6 @@ class OrganizationContactFormTests(TestCase):
     def setUpTestData(cls):
         cls.org_a = Organization.objects.create(name="Org A")
         cls.org_b = Organization.objects.create(name="Org B")
-        cls.admin = User.objects.create_user(username="admin")
-        OrganizationAdministrator.objects.create(user=cls.admin, organization=cls.org_a)
 
         cls.contact = OrganizationContact.objects.create(
             name="Contact A", email="contact@example.com", organization=cls.org_a
@@ -368,8 +405,11 @@ class OrganizationContactFormTests(TestCase):
         self.assertEqual(result, self.org_a)
 
     def test_init_restricts_organization_queryset_for_org_admin(self):
-        form = OrganizationContactForm(user=self.admin)
+        cache.clear()
+        form = OrganizationContactForm(organization_id=self.org_a.id)
         self.assertEqual(list(form.fields["organization"].queryset), [self.org_a])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(form.fields["organization"].choices), [(self.org_a.id, "Org A")])
 
     def test_widget_attrs_set_correctly(self):
         form = OrganizationContactForm()
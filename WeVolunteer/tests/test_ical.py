@@ -0,0 +1,151 @@
+import datetime
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.ical import escape_text, fold_line, get_event_datetimes
+from core.models import Event, EventOccurrenceException, EventRecurrence, Organization, RecurrenceFrequency
+
+
+class ICalFormatTests(SimpleTestCase):
+    """
+    Test class for the iCalendar formatting helpers.
+    """
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a, b; c\\d\r\ne"), "a\\, b\\; c\\\\d\\ne")
+
+    def test_fold_line(self):
+        self.assertEqual(fold_line("SUMMARY:short"), "SUMMARY:short\r\n")
+        folded = fold_line("DESCRIPTION:" + "é" * 100)
+        lines = folded.removesuffix("\r\n").split("\r\n")
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(all(line.startswith(" ") for line in lines[1:]))
+        self.assertEqual("".join(line.removeprefix(" ") for line in lines[1:]), "é" * (100 - (75 - 12) // 2))
+
+    def test_event_datetimes_use_time_zone(self):
+        event = {"date": date(2026, 1, 15), "start_time": datetime.time(10, 0), "end_time": datetime.time(1, 30)}
+        start, end = get_event_datetimes(event)
+        self.assertEqual(start, datetime.datetime(2026, 1, 15, 17, 0, tzinfo=datetime.timezone.utc))
+        self.assertEqual(end, datetime.datetime(2026, 1, 16, 8, 30, tzinfo=datetime.timezone.utc))
+
+        # daylight saving time
+        summer_start, summer_end = get_event_datetimes({**event, "date": date(2026, 7, 15), "end_time": None})
+        self.assertEqual(summer_start, datetime.datetime(2026, 7, 15, 16, 0, tzinfo=datetime.timezone.utc))
+        self.assertIsNone(summer_end)
+
+
+class ICalFeedViewTests(TestCase):
+    """
+    Test class for the iCalendar feed views.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.other_org = Organization.objects.create(name="Other Org")
+        self.event = Event.objects.create(
+            title="Park Cleanup, Day 1",
+            organization=self.org,
+            date=date.today() + timedelta(days=1),
+            start_time="10:00",
+            end_time="12:00",
+            address="123 Main St",
+            description="Bring gloves",
+        )
+        self.other_event = Event.objects.create(
+            title="Food Drive", organization=self.other_org, date=date.today() + timedelta(days=2), start_time="09:00"
+        )
+        Event.objects.create(title="Past Event", organization=self.org, date=date.today() - timedelta(days=2), start_time="09:00")
+        self.url = reverse("core:event-feed")
+        self.org_url = reverse("core:org-event-feed", args=[self.org.id])
+
+    def get_content(self, response) -> str:
+        if response.streaming:
+            return b"".join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def test_site_feed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertTrue(response.streaming)
+        content = self.get_content(response)
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"))
+        self.assertTrue(content.endswith("END:VCALENDAR\r\n"))
+        self.assertIn("X-WR-TIMEZONE:America/Denver", content)
+        self.assertEqual(content.count("BEGIN:VEVENT"), 2)
+        self.assertIn(f"UID:event-{self.event.id}@testserver", content)
+        self.assertIn("SUMMARY:Park Cleanup\\, Day 1", content)
+        self.assertIn("DESCRIPTION:Org\\n\\nBring gloves", content)
+        self.assertIn("SUMMARY:Food Drive", content)
+        self.assertNotIn("Past Event", content)
+
+    def test_organization_feed(self):
+        content = self.get_content(self.client.get(self.org_url))
+        self.assertIn("X-WR-CALNAME:Org - WeVolunteer", content)
+        self.assertIn("Park Cleanup", content)
+        self.assertNotIn("Food Drive", content)
+        self.assertEqual(self.client.get(reverse("core:org-event-feed", args=[0])).status_code, 404)
+
+    def test_address_only_for_logged_in_users(self):
+        self.assertNotIn("LOCATION", self.get_content(self.client.get(self.url)))
+        self.client.force_login(User.objects.create_user(username="john", password="password"))
+        self.assertIn("LOCATION:123 Main St", self.get_content(self.client.get(self.url)))
+
+    def test_occurrences_of_series_started_before_today(self):
+        series = Event.objects.create(
+            title="Weekly Shift", organization=self.org, date=date.today() - timedelta(days=6), start_time="09:00"
+        )
+        recurrence = EventRecurrence.objects.create(
+            event=series, frequency=RecurrenceFrequency.WEEKLY, until=date.today() + timedelta(days=15)
+        )
+        EventOccurrenceException.objects.create(recurrence=recurrence, date=date.today() + timedelta(days=8))
+        content = self.get_content(self.client.get(self.org_url))
+        self.assertEqual(content.count("SUMMARY:Weekly Shift"), 2)
+        occurrence_date = date.today() + timedelta(days=1)
+        self.assertIn(f"UID:event-{series.id}-{occurrence_date:%Y%m%d}@testserver", content)
+        self.assertIn(f"URL:http://testserver/events/{series.id}?date={occurrence_date:%Y-%m-%d}", content)
+        self.assertNotIn(f"UID:event-{series.id}@", content)
+        # the occurrence and the event on the same day are ordered by start time
+        self.assertLess(content.index("SUMMARY:Weekly Shift"), content.index("SUMMARY:Park Cleanup"))
+
+    def test_feed_is_cached_until_an_event_changes(self):
+        first = self.get_content(self.client.get(self.url))
+        response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(self.get_content(response), first)
+
+        self.event.title = "Renamed Cleanup"
+        self.event.save()
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn("Renamed Cleanup", self.get_content(response))
+
+    def test_feed_cache_is_shared_by_viewers_of_a_host(self):
+        self.client.force_login(User.objects.create_user(username="john", password="password"))
+        first = self.get_content(self.client.get(self.url))
+
+        # another logged in user gets the cached feed, even though the page ETag depends on the user
+        self.client.force_login(User.objects.create_user(username="jane", password="password"))
+        response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(self.get_content(response), first)
+
+        # anonymous users and other hosts get their own feeds
+        self.client.logout()
+        self.assertTrue(self.client.get(self.url).streaming)
+        response = self.client.get(self.url, headers={"host": "example.com"})
+        self.assertTrue(response.streaming)
+        self.assertIn(f"UID:event-{self.event.id}@example.com", self.get_content(response))
+
+    def test_not_modified(self):
+        response = self.client.get(self.org_url)
+        self.get_content(response)
+        not_modified = self.client.get(self.org_url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        Event.objects.create(title="New Event", organization=self.org, date=date.today(), start_time="10:00")
+        self.assertEqual(self.client.get(self.org_url, headers={"if-none-match": response["ETag"]}).status_code, 200)
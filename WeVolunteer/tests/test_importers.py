@@ -0,0 +1,148 @@
+import datetime
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.cache import get_versions, organization_version_key
+from core.importers import read_ics_rows
+from core.models import Event, EventDescriptors, Organization, OrganizationContact, TimeOfDay
+
+
+class IcsReaderTests(SimpleTestCase):
+    """
+    Test class for reading events from iCalendar files.
+    """
+
+    def test_reads_events(self):
+        ics = (
+            "BEGIN:VCALENDAR\r\n"
+            "BEGIN:VEVENT\r\n"
+            "SUMMARY:Park Cleanup\\, Day 1\r\n"
+            "DTSTART:20300115T170000Z\r\n"
+            "DTEND;TZID=America/New_York:20300115T140000\r\n"
+            "DESCRIPTION:Bring gloves\\nand water. This line is long enough that it has to\r\n"
+            "  be folded\r\n"
+            "CATEGORIES:Yard Work,CLEANING,Volunteering,outdoor\r\n"
+            "END:VEVENT\r\n"
+            "BEGIN:VEVENT\r\n"
+            "SUMMARY:All Day\r\n"
+            "DTSTART;VALUE=DATE:20300116\r\n"
+            "END:VEVENT\r\n"
+            "END:VCALENDAR\r\n"
+        )
+        rows = list(read_ics_rows(StringIO(ics)))
+        self.assertEqual([line_number for line_number, row in rows], [2, 10])
+
+        row = rows[0][1]
+        self.assertEqual(row["title"], "Park Cleanup, Day 1")
+        self.assertEqual(row["date"], date(2030, 1, 15))
+        self.assertEqual(row["start_time"], datetime.time(10, 0))
+        self.assertEqual(row["end_time"], datetime.time(12, 0))
+        self.assertEqual(row["description"], "Bring gloves\nand water. This line is long enough that it has to be folded")
+        self.assertEqual(row["event_descriptor_tags"], ["Yard Work", "CLEANING"])
+        self.assertEqual(row["location_descriptor_tags"], ["outdoor"])
+
+        self.assertEqual(rows[1][1]["date"], date(2030, 1, 16))
+        self.assertEqual(rows[1][1]["start_time"], "")
+
+
+class ImportEventsCommandTests(TestCase):
+    """
+    Test class for the import_events management command.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.other_org = Organization.objects.create(name="Other Org")
+        self.contact = OrganizationContact.objects.create(organization=self.org, name="Casey", email="casey@example.org")
+        self.other_contact = OrganizationContact.objects.create(organization=self.other_org, name="Jordan")
+        self.future = (date.today() + timedelta(days=30)).isoformat()
+
+    def write_file(self, content: str, suffix: str = ".csv") -> str:
+        file = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def run_command(self, path: str, *args) -> str:
+        stdout = StringIO()
+        call_command("import_events", path, "--organization", str(self.org.id), *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_csv_import(self):
+        path = self.write_file(
+            "title,date,start_time,end_time,event_descriptor_tags,location_descriptor_tags,primary_contact,address\n"
+            f"Painting,{self.future},09:00,11:00,Painting;yard work,OUTDOOR,casey@example.org,1 Main St\n"
+            f"Past,{date.today() - timedelta(days=1)},09:00,,,,,\n"
+            f"Backwards,{self.future},12:00,11:00,,,,\n"
+            f"Too Many Tags,{self.future},12:00,,MOVING;CLEANING;PAINTING;CHILDCARE;OTHER;RACE_CREW,,,\n"
+            f"Wrong Contact,{self.future},12:00,,,,{self.other_contact.id},\n"
+            f"Evening,{self.future},19:00,,,,Casey,\n"
+        )
+        version = get_versions([organization_version_key(self.org.id)])[organization_version_key(self.org.id)]
+        updated_at = Organization.objects.get(id=self.org.id).updated_at
+
+        output = self.run_command(path)
+
+        self.assertIn("Row 3: date: Date must not be in the past", output)
+        self.assertIn("Row 4: start_time: Start time must be before end time", output)
+        self.assertIn("Row 5: event_descriptor_tags: You may only select up to 5 descriptive tags", output)
+        self.assertIn("Row 6: primary_contact:", output)
+        self.assertIn("Imported 2 of 6 events", output)
+        self.assertIn("4 rows with errors", output)
+
+        event = Event.objects.get(title="Painting")
+        self.assertEqual(event.organization, self.org)
+        self.assertEqual(event.primary_contact, self.contact)
+        self.assertEqual(event.event_descriptor_tags, [EventDescriptors.PAINTING, EventDescriptors.YARD_WORK])
+        self.assertEqual(event.location_descriptor_tags, ["OUTDOOR"])
+        self.assertEqual(event.time_of_day(), [TimeOfDay.MORNING, TimeOfDay.MID_MORNING])
+        self.assertEqual(Event.objects.get(title="Evening").primary_contact, self.contact)
+
+        # the work of the skipped post_save receivers is done for the imported events
+        self.assertNotEqual(get_versions([organization_version_key(self.org.id)])[organization_version_key(self.org.id)], version)
+        self.assertGreater(Organization.objects.get(id=self.org.id).updated_at, updated_at)
+
+    def test_chunked_import(self):
+        rows = "".join(f"Event {i},{self.future},10:00\n" for i in range(7))
+        path = self.write_file("title,date,start_time\n" + rows)
+        with self.captureOnCommitCallbacks() as callbacks:
+            output = self.run_command(path, "--chunk-size", "3", "--batch-size", "2")
+        self.assertIn("Imported 7 of 7 events", output)
+        self.assertEqual(Event.objects.filter(organization=self.org).count(), 7)
+        # one live update per chunk
+        self.assertEqual(len(callbacks), 3)
+
+    def test_ics_import(self):
+        path = self.write_file(
+            "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nSUMMARY:Food Drive\r\n"
+            f"DTSTART:{self.future.replace('-', '')}T150000Z\r\nLOCATION:Food Bank\r\n"
+            "CATEGORIES:Food Service\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n",
+            suffix=".ics",
+        )
+        self.assertIn("Imported 1 of 1 events", self.run_command(path))
+        event = Event.objects.get(title="Food Drive")
+        self.assertEqual(
+            timezone.make_aware(datetime.datetime.combine(event.date, event.start_time)),
+            datetime.datetime.fromisoformat(f"{self.future}T15:00:00+00:00"),
+        )
+        self.assertEqual(event.event_descriptor_tags, [EventDescriptors.FOOD_SERVICE])
+
+    def test_dry_run(self):
+        path = self.write_file(f"title,date,start_time\nEvent,{self.future},10:00\n")
+        self.assertIn("Validated 1 of 1 events", self.run_command(path, "--dry-run"))
+        self.assertFalse(Event.objects.exists())
+
+    def test_invalid_input(self):
+        with self.assertRaises(CommandError):
+            self.run_command(self.write_file("title,date\nEvent,2030-01-01\n"))
+        with self.assertRaises(CommandError):
+            call_command("import_events", self.write_file("title,date,start_time\n"), "--organization", "0", stdout=StringIO())
@@ -0,0 +1,213 @@
+import asyncio
+from datetime import date, timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from core.live import HEARTBEAT, ConnectionLimiter, live_connections
+from core.models import Event, EventOccurrenceException, EventRecurrence, Organization, RecurrenceFrequency
+from core.views import events_live_updates_as_sse
+
+
+async def open_stream(organization_id=None):
+    params = {"organization": organization_id} if organization_id else {}
+    request = AsyncRequestFactory().get("/events/live", params)
+    request.user = AnonymousUser()
+    response = events_live_updates_as_sse(request)
+    stream = aiter(response.streaming_content)
+    # the first chunk is sent once the stream is listening
+    await anext(stream)
+    return response, stream
+
+
+async def close_stream(response):
+    # the ASGI handler ends an open stream by cancelling it, a test closes the LiveEventUpdates generator instead
+    await response._iterator.aclose()
+    response.close()
+
+
+@override_settings(LIVE_UPDATES_HEARTBEAT_SECONDS=0.1)
+class LiveEventUpdatesTests(TransactionTestCase):
+    """
+    Test class for the live event updates stream, which needs committed transactions for LISTEN/NOTIFY.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.other_org = Organization.objects.create(name="Other Org")
+        self.event = Event.objects.create(
+            title="Live Event", organization=self.org, date=date.today() + timedelta(days=1), start_time="10:00"
+        )
+
+    async def test_update_morphs_event_card(self):
+        response, stream = await open_stream()
+        try:
+            self.event.title = "Renamed Live Event"
+            await self.event.asave()
+            content = (await anext(stream)).decode()
+            self.assertIn("datastar-patch-elements", content)
+            self.assertIn(f'id="event-card-{self.event.id}"', content)
+            self.assertIn("Renamed Live Event", content)
+        finally:
+            await close_stream(response)
+
+    async def test_delete_removes_event_card(self):
+        response, stream = await open_stream()
+        try:
+            event_id = self.event.id
+            await self.event.adelete()
+            content = (await anext(stream)).decode()
+            self.assertIn("mode remove", content)
+            self.assertIn(f"selector #event-card-{event_id}", content)
+        finally:
+            await close_stream(response)
+
+    async def test_create_sets_new_events_signal(self):
+        response, stream = await open_stream()
+        try:
+            new_event = await Event.objects.acreate(title="New Event", organization=self.org, date=date.today(), start_time="10:00")
+            new_event.title = "Edited New Event"
+            await new_event.asave()
+            content = (await anext(stream)).decode()
+            self.assertIn('"live_new_events":true', content)
+            self.assertNotIn("Edited New Event", content)
+        finally:
+            await close_stream(response)
+
+    async def test_heartbeat_when_idle(self):
+        response, stream = await open_stream()
+        try:
+            self.assertEqual((await anext(stream)).decode(), HEARTBEAT)
+        finally:
+            await close_stream(response)
+
+    async def test_organization_stream_ignores_other_organizations(self):
+        response, stream = await open_stream(self.org.id)
+        try:
+            await Event.objects.acreate(title="Other Event", organization=self.other_org, date=date.today(), start_time="10:00")
+            self.assertEqual((await anext(stream)).decode(), HEARTBEAT)
+            await self.event.asave()
+            self.assertIn(f"event-card-{self.event.id}", (await anext(stream)).decode())
+        finally:
+            await close_stream(response)
+
+    async def test_moved_event_is_removed_from_previous_organization(self):
+        response, stream = await open_stream(self.org.id)
+        try:
+            self.event.organization = self.other_org
+            await self.event.asave()
+            content = (await anext(stream)).decode()
+            self.assertIn("mode remove", content)
+            self.assertIn(f"selector #event-card-{self.event.id}", content)
+        finally:
+            await close_stream(response)
+
+    async def test_series_changes_update_occurrence_cards(self):
+        recurrence = await EventRecurrence.objects.acreate(event=self.event, frequency=RecurrenceFrequency.WEEKLY)
+        response, stream = await open_stream()
+        try:
+            # a cancelled occurrence only removes its own card
+            cancelled_date = self.event.date + timedelta(days=7)
+            await EventOccurrenceException.objects.acreate(recurrence=recurrence, date=cancelled_date)
+            content = (await anext(stream)).decode()
+            self.assertIn(f"selector #event-card-{self.event.id}-{cancelled_date:%Y%m%d}", content)
+            self.assertNotIn("live_new_events", content)
+
+            # a changed rule may move every occurrence, so their cards are removed and the page offers a refresh
+            recurrence.interval = 2
+            await recurrence.asave()
+            content = (await anext(stream)).decode()
+            self.assertIn(f'selector [id^="event-card-{self.event.id}-"]', content)
+            self.assertIn('"live_new_events":true', content)
+
+            # so does an edit of the first occurrence, whose own card is morphed
+            self.event.title = "Renamed Series"
+            await self.event.asave()
+            content = (await anext(stream)).decode()
+            self.assertIn("Renamed Series", content)
+            self.assertIn(f'selector [id^="event-card-{self.event.id}-"]', content)
+
+            # deleting the series removes every card
+            event_id = self.event.id
+            await self.event.adelete()
+            content = (await anext(stream)).decode()
+            self.assertIn(f'selector #event-card-{event_id}, [id^="event-card-{event_id}-"]', content)
+        finally:
+            await close_stream(response)
+
+    @override_settings(LIVE_UPDATES_MAX_PENDING=2)
+    async def test_stream_that_falls_behind_asks_for_reload(self):
+        count = live_connections.count
+        response, stream = await open_stream()
+        try:
+            for i in range(3):
+                await Event.objects.acreate(title=f"Event {i}", organization=self.org, date=date.today(), start_time="10:00")
+            self.assertIn('"live_updates_stale":true', (await anext(stream)).decode())
+            with self.assertRaises(StopAsyncIteration):
+                await anext(stream)
+            # a stream that ended has released its slot
+            self.assertEqual(live_connections.count, count)
+        finally:
+            await close_stream(response)
+
+    async def test_closing_stream_releases_connection_slot(self):
+        count = live_connections.count
+        response, stream = await open_stream()
+        self.assertEqual(live_connections.count, count + 1)
+        await close_stream(response)
+        response.close()
+        self.assertEqual(live_connections.count, count)
+
+    async def test_cancelled_stream_releases_connection_slot(self):
+        count = live_connections.count
+        response, stream = await open_stream()
+        # like the ASGI handler does when the page is closed
+        read = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0.01)
+        read.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await read
+        self.assertEqual(live_connections.count, count)
+        response.close()
+        self.assertEqual(live_connections.count, count)
+
+
+class LiveConnectionLimitTests(TestCase):
+    """
+    Test class for the live updates connection cap.
+    """
+
+    @override_settings(LIVE_UPDATES_MAX_CONNECTIONS=2)
+    def test_limiter_caps_connections(self):
+        limiter = ConnectionLimiter()
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+        limiter.release()
+        self.assertTrue(limiter.acquire())
+
+    def test_view_responds_204_under_wsgi(self):
+        count = live_connections.count
+        response = events_live_updates_as_sse(RequestFactory().get("/events/live"))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(live_connections.count, count)
+
+    @override_settings(LIVE_UPDATES_MAX_CONNECTIONS=0)
+    def test_view_responds_503_when_full(self):
+        response = events_live_updates_as_sse(AsyncRequestFactory().get("/events/live"))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    def test_view_rejects_invalid_organization(self):
+        with self.assertRaises(BadRequest):
+            events_live_updates_as_sse(RequestFactory().get("/events/live", {"organization": "abc"}))
+
+    def test_unstarted_stream_releases_slot_on_close(self):
+        count = live_connections.count
+        response = events_live_updates_as_sse(AsyncRequestFactory().get("/events/live"))
+        self.assertEqual(live_connections.count, count + 1)
+        response.close()
+        self.assertEqual(live_connections.count, count)
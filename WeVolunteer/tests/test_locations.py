@@ -0,0 +1,250 @@
+import json
+import math
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.cursors import encode_month_cursor
+from core.filters import NEAR_FILTER, event_filters_q, get_event_filters
+from core.forms import EventForm
+from core.locations import EARTH_RADIUS_KM, get_bounding_box, get_grid_cell_ranges, get_locations_within, has_earth_index
+from core.models import GRID_COLUMNS, Event, Location, Organization, get_grid_cell
+from core.views import events_filter_as_sse, events_get_next_month_events_as_sse
+
+
+def get_distance_km(latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float) -> float:
+    latitude_1, longitude_1, latitude_2, longitude_2 = map(math.radians, (latitude_1, longitude_1, latitude_2, longitude_2))
+    haversine = (
+        math.sin((latitude_2 - latitude_1) / 2) ** 2
+        + math.cos(latitude_1) * math.cos(latitude_2) * math.sin((longitude_2 - longitude_1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(haversine, 1)))
+
+
+class GridTests(SimpleTestCase):
+    """
+    Test class for the grid cells and bounding boxes of the location lookups.
+    """
+
+    def test_grid_cell(self):
+        self.assertEqual(get_grid_cell(-90, -180), 0)
+        self.assertEqual(get_grid_cell(-90, 180), 0)
+        self.assertEqual(get_grid_cell(-89.75, -179.75), GRID_COLUMNS + 1)
+        self.assertEqual(get_grid_cell(90, 179.9), 720 * GRID_COLUMNS - 1)
+
+    def test_bounding_box_contains_circle(self):
+        south, north, longitude_ranges = get_bounding_box(41.2, -111.9, 80)
+        self.assertEqual(len(longitude_ranges), 1)
+        west, east = longitude_ranges[0]
+        for bearing in range(0, 360, 5):
+            # points on the circle, from the destination point formula
+            angle, bearing = 80 / EARTH_RADIUS_KM, math.radians(bearing)
+            latitude = math.asin(math.sin(math.radians(41.2)) * math.cos(angle) + math.cos(math.radians(41.2)) * math.sin(angle) * math.cos(bearing))
+            longitude = -111.9 + math.degrees(math.atan2(
+                math.sin(bearing) * math.sin(angle) * math.cos(math.radians(41.2)),
+                math.cos(angle) - math.sin(math.radians(41.2)) * math.sin(latitude),
+            ))
+            self.assertTrue(south - 1e-9 <= math.degrees(latitude) <= north + 1e-9)
+            self.assertTrue(west - 1e-9 <= longitude <= east + 1e-9)
+
+    def test_bounding_box_wraps(self):
+        south, north, longitude_ranges = get_bounding_box(0, 179.9, 50)
+        self.assertEqual(len(longitude_ranges), 2)
+        self.assertEqual(longitude_ranges[0][1], 180)
+        self.assertEqual(longitude_ranges[1][0], -180)
+
+        south, north, longitude_ranges = get_bounding_box(89.9, 0, 50)
+        self.assertEqual((north, longitude_ranges), (90, [(-180, 180)]))
+
+    def test_grid_cell_ranges(self):
+        # one range per row
+        ranges = get_grid_cell_ranges(41.0, 41.6, [(-112.3, -111.5)])
+        self.assertEqual(len(ranges), 3)
+        self.assertTrue(all(last - first == 4 for first, last in ranges))
+        # full rows merge into a single range
+        self.assertEqual(get_grid_cell_ranges(-1, 1, [(-180, 180)]), [(356 * GRID_COLUMNS, 364 * GRID_COLUMNS + GRID_COLUMNS - 1)])
+
+
+class LocationLookupTests(TestCase):
+    """
+    Test class for the radius lookups of locations and the events near me filter.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name="Org")
+        cls.other_org = Organization.objects.create(name="Other Org")
+        randomizer = random.Random(7)
+        cls.centers = [(41.22, -111.97), (0.1, 179.95), (-33.9, 18.4)]
+        Location.objects.bulk_create([
+            Location(
+                organization=cls.org,
+                name=f"Location {i}",
+                latitude=(latitude := center[0] + randomizer.uniform(-2, 2)),
+                longitude=(longitude := (center[1] + randomizer.uniform(-2, 2) + 180) % 360 - 180),
+                grid_cell=get_grid_cell(latitude, longitude),
+            )
+            for center in cls.centers
+            for i in range(150)
+        ])
+
+    def test_locations_within_match_distances(self):
+        locations = list(Location.objects.values_list("id", "latitude", "longitude"))
+        for latitude, longitude in self.centers:
+            for radius_km in [8, 40, 160]:
+                expected = {
+                    location_id for location_id, location_latitude, location_longitude in locations
+                    if get_distance_km(latitude, longitude, location_latitude, location_longitude) <= radius_km
+                }
+                found = get_locations_within(latitude, longitude, radius_km)
+                self.assertEqual({location.id for location in found}, expected, (latitude, longitude, radius_km))
+                self.assertTrue(all(location.distance <= radius_km for location in found))
+
+    def test_lookup_scans_grid_cells(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(get_locations_within(41.22, -111.97, 16))
+        self.assertIn("grid_cell", queries[-1]["sql"])
+
+    def test_earth_index_is_checked_once(self):
+        has_earth_index.cache_clear()
+        with self.assertNumQueries(2):
+            list(get_locations_within(41.22, -111.97, 16))
+        with self.assertNumQueries(1):
+            list(get_locations_within(41.22, -111.97, 16))
+
+    def test_near_filter(self):
+        tomorrow = date.today() + timedelta(days=1)
+        near = Location.objects.create(organization=self.org, name="Near", latitude=41.23, longitude=-111.96)
+        far = Location.objects.create(organization=self.org, name="Far", latitude=40.76, longitude=-111.89)
+        Event.objects.create(title="Near Event", organization=self.org, location=near, date=tomorrow, start_time="10:00")
+        Event.objects.create(title="Far Event", organization=self.org, location=far, date=tomorrow, start_time="10:00")
+        Event.objects.create(title="Unplaced Event", organization=self.org, date=tomorrow, start_time="10:00")
+
+        signals = {"filter_near_latitude": 41.22, "filter_near_longitude": -111.97, "filter_near_radius": "5"}
+        filters = get_event_filters(signals, True)
+        self.assertEqual(filters, {NEAR_FILTER: [41.22, -111.97, 5]})
+        self.assertEqual(list(Event.objects.filter(event_filters_q(filters)).values_list("title", flat=True)), ["Near Event"])
+        # the Far location is about 32 miles away
+        filters = get_event_filters({**signals, "filter_near_radius": 50}, True)
+        self.assertEqual(Event.objects.filter(event_filters_q(filters)).count(), 2)
+
+        request = RequestFactory().get("events/filter", {"datastar": json.dumps(signals)})
+        request.user = User.objects.create_user(username="john", password="password")
+        content = events_filter_as_sse(request).content.decode()
+        self.assertIn("Near Event", content)
+        self.assertNotIn("Far Event", content)
+        self.assertNotIn("Unplaced Event", content)
+        self.assertIn("Near me radius", content)
+
+        self.assertEqual(get_event_filters({"filter_near_radius": "0", "filter_near_latitude": None}, True), {})
+        for invalid in [
+            {**signals, "filter_near_radius": "7"},
+            {**signals, "filter_near_radius": "far"},
+            {**signals, "filter_near_latitude": 91},
+            {**signals, "filter_near_longitude": "-111.97"},
+            {**signals, "filter_near_latitude": None},
+        ]:
+            with self.assertRaises(ValueError):
+                get_event_filters(invalid, True)
+
+    def test_near_filter_needs_login(self):
+        tomorrow = date.today() + timedelta(days=1)
+        near = Location.objects.create(organization=self.org, name="Near", latitude=41.23, longitude=-111.96)
+        Event.objects.create(title="Near Event", organization=self.org, location=near, date=tomorrow, start_time="10:00")
+        Event.objects.create(title="Unplaced Event", organization=self.org, date=tomorrow, start_time="10:00")
+
+        # anonymous visitors could otherwise narrow the radius around a point to locate the organizations
+        signals = {"filter_near_latitude": 41.22, "filter_near_longitude": -111.97, "filter_near_radius": "5"}
+        self.assertEqual(get_event_filters(signals), {})
+        request = RequestFactory().get("events/filter", {"datastar": json.dumps(signals)})
+        request.user = AnonymousUser()
+        content = events_filter_as_sse(request).content.decode()
+        self.assertIn("Near Event", content)
+        self.assertIn("Unplaced Event", content)
+        self.assertNotIn("Near me radius", content)
+
+    async def test_next_month_near_filter_checks_earth_index_in_a_thread(self):
+        # a fresh process checks for the earthdistance index on the first near me lookup
+        has_earth_index.cache_clear()
+        next_month = (date.today() + relativedelta(months=+1)).replace(day=1)
+        near = await Location.objects.acreate(organization=self.org, name="Near", latitude=41.23, longitude=-111.96)
+        await Event.objects.acreate(title="Near Event", organization=self.org, location=near, date=next_month, start_time="10:00")
+        await Event.objects.acreate(title="Unplaced Event", organization=self.org, date=next_month, start_time="10:00")
+
+        signals = {
+            "next_month_cursor": encode_month_cursor(next_month),
+            "filter_near_latitude": 41.22, "filter_near_longitude": -111.97, "filter_near_radius": "5",
+        }
+        request = AsyncRequestFactory().get("events/get_next_month", {"datastar": json.dumps(signals)})
+        request.user = await User.objects.acreate(username="john")
+        response = await events_get_next_month_events_as_sse(request)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn("Near Event", content)
+        self.assertNotIn("Unplaced Event", content)
+
+    def test_grid_cell_follows_coordinates(self):
+        location = Location.objects.create(organization=self.org, name="Moved", latitude=41.23, longitude=-111.96)
+        location.latitude, location.longitude = -33.9, 18.4
+        location.save(update_fields=["latitude", "longitude"])
+        location.refresh_from_db()
+        self.assertEqual(location.grid_cell, get_grid_cell(-33.9, 18.4))
+
+    def test_event_form_location_must_belong_to_organization(self):
+        location = Location.objects.create(organization=self.other_org, name="Elsewhere", latitude=41.23, longitude=-111.96)
+        form = EventForm({
+            "title": "Event",
+            "organization": self.org.id,
+            "location": location.id,
+            "date": date.today() + timedelta(days=1),
+            "start_time": "10:00",
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn("location", form.errors)
+
+
+class ImportLocationsCommandTests(TestCase):
+    """
+    Test class for the import_locations management command, and the location column of import_events.
+    """
+
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+
+    def write_file(self, content: str) -> str:
+        file = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8")
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_import(self):
+        path = self.write_file(
+            "name,address,notes,latitude,longitude\n"
+            "Park,1 Main St,North gate,41.22,-111.97\n"
+            "Nowhere,,,95,-111.97\n"
+            "No Coordinates,,,,\n"
+        )
+        stdout = StringIO()
+        call_command("import_locations", path, "--organization", str(self.org.id), stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn("Row 3: latitude:", output)
+        self.assertIn("Row 4:", output)
+        self.assertIn("Imported 1 of 3 locations", output)
+
+        location = Location.objects.get()
+        self.assertEqual((location.organization, location.notes), (self.org, "North gate"))
+        self.assertEqual(location.grid_cell, get_grid_cell(41.22, -111.97))
+
+        future = (date.today() + timedelta(days=30)).isoformat()
+        path = self.write_file(f"title,date,start_time,location\nCleanup,{future},09:00,park\n")
+        call_command("import_events", path, "--organization", str(self.org.id), stdout=StringIO())
+        self.assertEqual(Event.objects.get().location, location)
@@ -0,0 +1,101 @@
+import gzip
+import zlib
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from WeVolunteer.middleware import SSECompressionMiddleware, brotli, get_sse_encoding
+from WeVolunteer.utils import respond_via_sse, stream_respond_via_sse
+
+
+CARD_HTML = "<div class=\"card h-100 mb-4 border-primary border-2 shadow-sm\"><div class=\"card-body\">Event</div></div>" * 20
+
+
+def process(response, accept_encoding="gzip, deflate, br"):
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+    return SSECompressionMiddleware(lambda request: response).process_response(request, response)
+
+
+class SseEncodingTests(SimpleTestCase):
+    """
+    Test class for the SSE content encoding negotiation.
+    """
+
+    def test_prefers_brotli_when_installed(self):
+        self.assertEqual(get_sse_encoding("gzip, br"), "br" if brotli else "gzip")
+
+    def test_gzip(self):
+        self.assertEqual(get_sse_encoding("gzip;q=0.5, deflate"), "gzip")
+
+    def test_rejected_and_missing_encodings(self):
+        self.assertIsNone(get_sse_encoding("gzip;q=0, br;q=0"))
+        self.assertIsNone(get_sse_encoding("identity"))
+        self.assertIsNone(get_sse_encoding(""))
+
+
+class SseCompressionMiddlewareTests(SimpleTestCase):
+    """
+    Test class for the SSE compression middleware.
+    """
+
+    def test_buffered_sse_is_compressed(self):
+        response = respond_via_sse(HttpResponse(CARD_HTML), signals={"more_events": True})
+        original = response.content
+        response = process(response, "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(original) / 5)
+        self.assertEqual(gzip.decompress(response.content), original)
+
+    def test_short_and_other_responses_are_not_compressed(self):
+        short = process(respond_via_sse(HttpResponse("<div></div>")))
+        self.assertFalse(short.has_header("Content-Encoding"))
+        page = process(HttpResponse(CARD_HTML))
+        self.assertFalse(page.has_header("Content-Encoding"))
+        self.assertFalse(page.has_header("Vary"))
+
+    def test_not_compressed_without_accept_encoding(self):
+        response = process(respond_via_sse(HttpResponse(CARD_HTML)), "")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_streamed_sse_is_flushed_per_event(self):
+        patches = [(CARD_HTML, "#list", None), ("<div>second</div>", "#list", None)]
+        response = process(stream_respond_via_sse(patches, signals={"more_events": True}), "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        events = [decompressor.decompress(chunk).decode() for chunk in response.streaming_content]
+        # every event decodes completely from its own chunk, followed by the end of the gzip stream
+        self.assertIn("datastar-patch-signals", events[0])
+        self.assertIn(CARD_HTML, events[1])
+        self.assertTrue(events[1].endswith("\n\n"))
+        self.assertIn("<div>second</div>", events[2])
+        self.assertEqual(events[3], "")
+        self.assertTrue(decompressor.eof)
+
+    def test_async_streamed_sse_is_compressed(self):
+        async def read(response):
+            return [chunk async for chunk in response.streaming_content]
+
+        response = process(stream_respond_via_sse([(CARD_HTML, "#list", None)], asynchronous=True), "gzip")
+        self.assertIn(CARD_HTML, gzip.decompress(b"".join(async_to_sync(read)(response))).decode())
+
+    def test_already_encoded_response_is_untouched(self):
+        response = StreamingHttpResponse(iter([b"data"]), content_type="text/event-stream")
+        response["Content-Encoding"] = "identity"
+        self.assertEqual(b"".join(process(response).streaming_content), b"data")
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_streamed_sse_brotli(self):
+        response = process(stream_respond_via_sse([(CARD_HTML, None, None), ("<p>b</p>", None, None)]), "br")
+        self.assertEqual(response["Content-Encoding"], "br")
+
+        decompressor = brotli.Decompressor()
+        events = [decompressor.process(chunk).decode() for chunk in response.streaming_content]
+        self.assertIn(CARD_HTML, events[0])
+        self.assertIn("<p>b</p>", events[1])
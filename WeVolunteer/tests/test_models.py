@@ -1,8 +1,11 @@
 import datetime
+import importlib.util
+import random
+import unittest
 
 from django import forms
 from django.db import models
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth.models import User
 from unittest.mock import MagicMock, patch
 
@@ -14,6 +17,12 @@ from core.models import (
     ranges_overlap,
     point_in_range,
     get_time_of_day_enum_list,
+    get_time_of_day_mask,
+    get_time_of_day_masks,
+    get_minute_of_day,
+    time_of_day_bits,
+    time_of_day_q,
+    possible_time_of_day_masks,
     CustomSocialAccountAdapter,
     MultipleChoiceArrayField,
     Organization,
@@ -180,3 +189,108 @@ class TimeOfDayRangeEdgeCasesTests(TestCase):
         for time, expected in times:
             enum_list = get_time_of_day_enum_list(time)
             self.assertEqual(enum_list, [expected])
+
+
+def get_time_of_day_enum_list_by_scan(time_1, time_2=None):
+    # the scan over every TimeOfDay block that the lookup tables replaced
+    if not time_2:
+        return [key for key, value in time_of_day_ranges.items() if point_in_range(time_1, value[0], value[1])]
+    return [key for key, value in time_of_day_ranges.items() if ranges_overlap(time_1, time_2, value[0], value[1])]
+
+
+class TimeOfDayLookupTests(SimpleTestCase):
+    """
+    Test class for the minute of day lookup tables of the TimeOfDay classification.
+    """
+
+    def setUp(self):
+        randomizer = random.Random(0)
+        self.times = [datetime.time(minute // 60, minute % 60) for minute in range(0, 24 * 60, 7)] + [
+            datetime.time(randomizer.randrange(24), randomizer.randrange(60), randomizer.randrange(60))
+            for _ in range(100)
+        ] + [datetime.time(hour, 59, 59) for hour in range(24)]
+
+    def test_single_time_matches_scan(self):
+        for minute in range(24 * 60):
+            time = datetime.time(minute // 60, minute % 60)
+            self.assertEqual(get_time_of_day_enum_list(time), get_time_of_day_enum_list_by_scan(time), time)
+        for time in self.times:
+            self.assertEqual(get_time_of_day_enum_list(time), get_time_of_day_enum_list_by_scan(time), time)
+
+    def test_range_matches_scan(self):
+        # also ranges ending before they start, which only overlap a block containing both times
+        for start in self.times:
+            for end in self.times:
+                self.assertEqual(
+                    get_time_of_day_enum_list(start, end), get_time_of_day_enum_list_by_scan(start, end), (start, end)
+                )
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy is not installed")
+    def test_batch_matches_single(self):
+        time_ranges = [(start, end) for start in self.times for end in self.times[::5]]
+        time_ranges += [(time, None) for time in self.times]
+        masks = get_time_of_day_masks(
+            [get_minute_of_day(start) for start, end in time_ranges],
+            [get_minute_of_day(end or start) for start, end in time_ranges],
+        )
+        self.assertEqual(masks.tolist(), [get_time_of_day_mask(start, end) for start, end in time_ranges])
+        self.assertEqual(get_time_of_day_masks([], []).tolist(), [])
+
+
+class TimeOfDayMaskTests(TestCase):
+    """
+    Test class for the stored TimeOfDay bitmask.
+    """
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Mask Org")
+
+    def test_mask_matches_enum_list(self):
+        start, end = datetime.time(9, 0), datetime.time(13, 0)
+        mask = get_time_of_day_mask(start, end)
+        decoded = [time_of_day for time_of_day, bit in time_of_day_bits.items() if mask & bit]
+        self.assertEqual(decoded, get_time_of_day_enum_list(start, end))
+
+    def test_possible_masks_cover_every_contiguous_range(self):
+        self.assertEqual(len(possible_time_of_day_masks), 1 + 7 * 8 // 2)
+        for hour in range(24):
+            for end_hour in range(hour, 24):
+                mask = get_time_of_day_mask(datetime.time(hour, 0), datetime.time(end_hour, 59))
+                self.assertIn(mask, possible_time_of_day_masks)
+
+    def test_save_computes_mask_from_string_times(self):
+        event = Event.objects.create(title="Breakfast", organization=self.organization,
+                                     date=datetime.date.today(), start_time="07:00", end_time="11:00")
+        event.refresh_from_db()
+        self.assertEqual(event.time_of_day_mask,
+                         time_of_day_bits[TimeOfDay.MORNING] | time_of_day_bits[TimeOfDay.MID_MORNING])
+        self.assertEqual(event.time_of_day(), [TimeOfDay.MORNING, TimeOfDay.MID_MORNING])
+
+    def test_save_without_end_time_uses_start_time_block(self):
+        event = Event.objects.create(title="Dinner", organization=self.organization,
+                                     date=datetime.date.today(), start_time="18:30")
+        self.assertEqual(event.time_of_day(), [TimeOfDay.EVENING])
+
+        # the list is a copy, so changing it leaves the shared lookup table alone
+        event.time_of_day().append(TimeOfDay.NIGHT)
+        self.assertEqual(event.time_of_day(), [TimeOfDay.EVENING])
+
+    def test_save_with_update_fields_updates_mask(self):
+        event = Event.objects.create(title="Shift", organization=self.organization,
+                                     date=datetime.date.today(), start_time="07:00")
+        event.start_time = datetime.time(21, 0)
+        event.save(update_fields=["start_time"])
+        event.refresh_from_db()
+        self.assertEqual(event.time_of_day(), [TimeOfDay.NIGHT])
+
+    def test_time_of_day_q_matches_any_given_block(self):
+        morning = Event.objects.create(title="Morning", organization=self.organization,
+                                       date=datetime.date.today(), start_time="07:00", end_time="08:00")
+        all_day = Event.objects.create(title="All Day", organization=self.organization,
+                                       date=datetime.date.today(), start_time="05:00", end_time="21:00")
+        Event.objects.create(title="Afternoon", organization=self.organization,
+                             date=datetime.date.today(), start_time="15:00", end_time="16:00")
+
+        matches = Event.objects.filter(time_of_day_q([TimeOfDay.MORNING, TimeOfDay.EVENING])).order_by("title")
+        self.assertEqual(list(matches), [all_day, morning])
+        self.assertEqual(Event.objects.filter(time_of_day_q(["NIGHT"])).get(), all_day)
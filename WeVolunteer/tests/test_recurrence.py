@@ -0,0 +1,284 @@
+import json
+from datetime import date, timedelta
+
+from asgiref.sync import async_to_sync
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.cache import SERIES_VERSION_KEY, get_versions
+from core.cursors import decode_event_cursor, encode_month_cursor
+from core.forms import EventForm
+from core.models import (
+    Event,
+    EventDescriptors,
+    EventOccurrenceException,
+    EventRecurrence,
+    Organization,
+    OrganizationAdministrator,
+    RecurrenceFrequency,
+)
+from core.recurrence import (
+    count_occurrences,
+    find_first_occurrence,
+    get_occurrence,
+    get_occurrence_ordinals,
+    get_occurrences,
+    has_series,
+    merge_occurrences,
+    remove_exceptions,
+)
+from core.views import ORGANIZATION_OCCURRENCES_PER_SERIES, events_get_next_month_events_as_sse, get_past_events_page
+from tests.test_views import read_stream
+
+
+def get_dates(first_date: date, frequency: str, start: date, end: date, interval: int = 1, weekdays: int = 0,
+              until: date | None = None) -> list[date]:
+    sequences = get_occurrence_ordinals(
+        first_date, frequency, interval, weekdays, until, start.toordinal(), end.toordinal()
+    )
+    return sorted(date.fromordinal(ordinal) for sequence in sequences for ordinal in sequence)
+
+
+class OccurrenceOrdinalsTests(SimpleTestCase):
+    """
+    Test class for the expansion of recurrence rules into occurrence dates.
+    """
+
+    def test_daily(self):
+        first = date(2030, 1, 1)
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.DAILY, first, date(2030, 1, 8), interval=2),
+            [date(2030, 1, 3), date(2030, 1, 5), date(2030, 1, 7)],
+        )
+        # a window starting later keeps the interval of the series
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.DAILY, date(2030, 1, 4), date(2030, 1, 8), interval=2),
+            [date(2030, 1, 5), date(2030, 1, 7)],
+        )
+
+    def test_weekly(self):
+        # Wednesday
+        first = date(2030, 1, 2)
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.WEEKLY, first, date(2030, 1, 24)),
+            [date(2030, 1, 9), date(2030, 1, 16), date(2030, 1, 23)],
+        )
+        # every other week on Monday and Wednesday, counted from the week of the first occurrence
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.WEEKLY, first, date(2030, 1, 31), interval=2, weekdays=0b101),
+            [date(2030, 1, 14), date(2030, 1, 16), date(2030, 1, 28), date(2030, 1, 30)],
+        )
+
+    def test_monthly_skips_months_without_the_day(self):
+        first = date(2030, 1, 31)
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.MONTHLY, first, date(2030, 6, 1)),
+            [date(2030, 3, 31), date(2030, 5, 31)],
+        )
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.MONTHLY, date(2030, 4, 1), date(2031, 1, 1), interval=3),
+            [date(2030, 7, 31), date(2030, 10, 31)],
+        )
+
+    def test_until(self):
+        first = date(2030, 1, 1)
+        self.assertEqual(
+            get_dates(first, RecurrenceFrequency.DAILY, first, date(2030, 2, 1), until=date(2030, 1, 3)),
+            [date(2030, 1, 2), date(2030, 1, 3)],
+        )
+        self.assertEqual(get_dates(first, RecurrenceFrequency.DAILY, date(2030, 1, 4), date(2030, 2, 1), until=date(2030, 1, 3)), [])
+
+    def test_exceptions_and_limits(self):
+        first = date(2030, 1, 1)
+        sequences = get_occurrence_ordinals(first, RecurrenceFrequency.DAILY, 1, 0, None, first.toordinal(), date(2030, 1, 11).toordinal())
+        excepted = {date(2030, 1, 3).toordinal()}
+        self.assertEqual(
+            [date.fromordinal(ordinal) for ordinal in remove_exceptions(sequences, excepted, limit=2)[0][:2]],
+            [date(2030, 1, 2), date(2030, 1, 4)],
+        )
+        self.assertEqual(
+            [date.fromordinal(ordinal) for ordinal in remove_exceptions(sequences, excepted, limit=2, latest=True)[0][-2:]],
+            [date(2030, 1, 9), date(2030, 1, 10)],
+        )
+
+        rules = [
+            (1, first, RecurrenceFrequency.DAILY, 1, 0, None),
+            (2, date(2030, 1, 4), RecurrenceFrequency.WEEKLY, 1, 0, None),
+        ]
+        self.assertEqual(count_occurrences(rules, {1: excepted}, first, date(2030, 1, 11)), {1: 8, 2: 0})
+        self.assertEqual(find_first_occurrence(rules, {1: {date(2030, 1, 2).toordinal()}}, first, date(2030, 2, 1)), date(2030, 1, 3))
+        self.assertIsNone(find_first_occurrence(rules[1:], {}, date(2030, 1, 5), date(2030, 1, 11)))
+
+
+class RecurringEventTests(TestCase):
+    """
+    Test class for recurring events and their occurrences in the event lists and views.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Org")
+        self.user = User.objects.create_user(username="john", password="password")
+        OrganizationAdministrator.objects.create(user=self.user, organization=self.org)
+
+        self.today = date.today()
+        self.series = Event.objects.create(title="Weekly Shift", organization=self.org, date=self.today + timedelta(days=1), start_time="10:00")
+        self.recurrence = EventRecurrence.objects.create(event=self.series, frequency=RecurrenceFrequency.WEEKLY)
+        self.second_date = self.series.date + timedelta(days=7)
+
+    def test_get_occurrences(self):
+        end = self.series.date + timedelta(days=22)
+        EventOccurrenceException.objects.create(recurrence=self.recurrence, date=self.series.date + timedelta(days=14))
+        has_series()
+        # the series, then its exceptions
+        with self.assertNumQueries(2):
+            occurrences = get_occurrences(self.today, end)
+        self.assertEqual([occurrence.date for occurrence in occurrences], [self.second_date, self.series.date + timedelta(days=21)])
+        self.assertTrue(all(occurrence.is_occurrence and occurrence.id == self.series.id for occurrence in occurrences))
+        self.assertFalse(self.series.is_occurrence)
+        self.assertEqual(get_occurrences(self.today, end, Q(organization_id=self.org.id + 1)), [])
+
+        merged = merge_occurrences([self.series], occurrences)
+        self.assertEqual([event.date for event in merged], [self.series.date, self.second_date, self.series.date + timedelta(days=21)])
+
+    def test_occurrences_are_not_listed_past_the_horizon(self):
+        occurrences = get_occurrences(self.today, self.today + relativedelta(years=3))
+        self.assertLess(max(occurrence.date for occurrence in occurrences), self.today.replace(day=1) + relativedelta(months=+12))
+
+    def test_series_version_is_bumped(self):
+        version = get_versions([SERIES_VERSION_KEY])[SERIES_VERSION_KEY]
+        EventOccurrenceException.objects.create(recurrence=self.recurrence, date=self.second_date)
+        self.assertNotEqual(get_versions([SERIES_VERSION_KEY])[SERIES_VERSION_KEY], version)
+
+        self.assertTrue(has_series())
+        self.recurrence.delete()
+        self.assertFalse(has_series())
+
+    def test_events_page_lists_occurrences(self):
+        response = self.client.get(reverse("core:events"))
+        self.assertContains(response, f'id="event-card-{self.series.id}"')
+        self.assertContains(response, f'id="event-card-{self.series.id}-{self.second_date.strftime("%Y%m%d")}"')
+        self.assertContains(response, f'?date={self.second_date.isoformat()}')
+
+        # the cached months are refreshed when the series changes
+        EventOccurrenceException.objects.create(recurrence=self.recurrence, date=self.second_date)
+        response = self.client.get(reverse("core:events"))
+        self.assertNotContains(response, f'id="event-card-{self.series.id}-{self.second_date.strftime("%Y%m%d")}"')
+
+    def test_next_month_sse_finds_month_of_occurrence(self):
+        Event.objects.filter(id=self.series.id).update(event_descriptor_tags=[EventDescriptors.PAINTING])
+        month = self.today.replace(day=1) + relativedelta(months=+4)
+        for signals, read_content in [
+            ({}, lambda response: response.content),
+            ({"filter_event_descriptors": ["PAINTING"]}, lambda response: b"".join(read_stream(response))),
+        ]:
+            datastar = json.dumps({"next_month_cursor": encode_month_cursor(month), **signals})
+            request = RequestFactory().get("events/get_next_month", {"datastar": datastar})
+            request.user = AnonymousUser()
+            content = read_content(async_to_sync(events_get_next_month_events_as_sse)(request)).decode()
+            self.assertIn(f"{month.strftime('%B')} {month.year}", content)
+            self.assertIn("Weekly Shift", content)
+            self.assertIn(encode_month_cursor(month + relativedelta(months=+1)), content)
+
+    def test_organization_details_lists_occurrences(self):
+        response = self.client.get(reverse("core:org-details", args=[self.org.id]))
+        self.assertContains(response, f'id="event-card-{self.series.id}-{self.second_date.strftime("%Y%m%d")}"')
+
+        # only the next occurrences of the series are listed, but all of them are counted
+        occurrence_count = len(get_occurrences(self.today, date.max))
+        self.assertEqual(
+            [event.date for event in response.context["upcoming_events"]],
+            [self.series.date + timedelta(days=7 * week) for week in range(ORGANIZATION_OCCURRENCES_PER_SERIES + 1)],
+        )
+        self.assertContains(response, f"{1 + occurrence_count} Upcoming Events")
+
+        response = self.client.get(reverse("core:organizations"))
+        self.assertEqual(response.context["org_list"][0].upcoming_events_count, 1 + len(get_occurrences(self.today, date.max)))
+
+    def test_past_events_page_lists_occurrences(self):
+        past_series = Event.objects.create(title="Past Shift", organization=self.org, date=self.today - timedelta(days=15), start_time="09:00")
+        EventRecurrence.objects.create(event=past_series, frequency=RecurrenceFrequency.WEEKLY, until=self.today - timedelta(days=1))
+        Event.objects.create(title="Past Event", organization=self.org, date=self.today - timedelta(days=3), start_time="09:00")
+
+        events, cursor = get_past_events_page(self.org)
+        self.assertEqual(
+            [(event.title, event.date) for event in events],
+            [
+                ("Past Shift", self.today - timedelta(days=1)),
+                ("Past Event", self.today - timedelta(days=3)),
+                ("Past Shift", self.today - timedelta(days=8)),
+            ],
+        )
+        events, cursor = get_past_events_page(self.org, decode_event_cursor(cursor))
+        self.assertEqual([(event.title, event.date, event.is_occurrence) for event in events], [("Past Shift", past_series.date, False)])
+        self.assertIsNone(cursor)
+
+    def test_event_details_of_occurrence(self):
+        self.client.force_login(self.user)
+        url = reverse("core:event-details", args=[self.series.id])
+        response = self.client.get(url, {"date": self.second_date.isoformat()})
+        self.assertEqual(response.context["event"].date, self.second_date)
+        self.assertContains(response, "Repeats weekly")
+        self.assertContains(response, reverse("core:event-occurrence-cancel", args=[self.series.id, self.second_date.isoformat()]))
+
+        self.assertEqual(self.client.get(url, {"date": (self.second_date + timedelta(days=1)).isoformat()}).status_code, 404)
+        self.assertEqual(self.client.get(url, {"date": "tomorrow"}).status_code, 404)
+
+    def test_cancel_occurrence(self):
+        url = reverse("core:event-occurrence-cancel", args=[self.series.id, self.second_date.isoformat()])
+        self.assertEqual(self.client.post(url).status_code, 302)
+        self.assertFalse(EventOccurrenceException.objects.exists())
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertRedirects(self.client.post(url), reverse("core:event-details", args=[self.series.id]))
+        self.assertIsNone(get_occurrence(self.series, self.second_date))
+        # a cancelled or unknown occurrence cannot be cancelled again
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+    def test_edit_occurrence(self):
+        self.client.force_login(self.user)
+        url = reverse("core:event-occurrence-edit", args=[self.series.id, self.second_date.isoformat()])
+        response = self.client.post(url)
+
+        exception = EventOccurrenceException.objects.get()
+        replacement = exception.replacement
+        self.assertRedirects(response, reverse("core:event-edit", args=[replacement.id]))
+        self.assertEqual((replacement.title, replacement.date), ("Weekly Shift", self.second_date))
+        self.assertFalse(hasattr(replacement, "recurrence"))
+        self.assertEqual(
+            [event.date for event in get_occurrences(self.today, self.second_date + timedelta(days=1))], []
+        )
+
+    def test_event_form_saves_recurrence(self):
+        data = {
+            "title": "Shift",
+            "organization": self.org.id,
+            "date": self.today + timedelta(days=2),
+            "start_time": "10:00",
+            "repeat_frequency": RecurrenceFrequency.WEEKLY,
+            "repeat_interval": 2,
+            "repeat_weekdays": ["0", "2"],
+            "repeat_until": self.today + timedelta(days=60),
+        }
+        form = EventForm(data)
+        self.assertTrue(form.is_valid(), form.errors)
+        event = form.save()
+        recurrence = EventRecurrence.objects.get(event=event)
+        self.assertEqual((recurrence.interval, recurrence.weekdays, recurrence.until), (2, 0b101, data["repeat_until"]))
+
+        # the form of an existing series starts from its rule, and clearing the frequency ends the series
+        form = EventForm(instance=event)
+        self.assertEqual(form.initial["repeat_weekdays"], ["0", "2"])
+        form = EventForm({**data, "repeat_frequency": ""}, instance=event)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertFalse(EventRecurrence.objects.filter(event=event).exists())
+
+        form = EventForm({**data, "repeat_until": data["date"]})
+        self.assertFalse(form.is_valid())
+        self.assertIn(EventForm.repeat_until_error, form.errors["repeat_until"])
@@ -1,8 +1,9 @@
 import rules
 from django.test import TestCase
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
 from core.models import Organization, OrganizationAdministrator, Event, OrganizationContact
 from core.rules import (
+    get_administered_organization_id,
     is_organization_admin_for_event,
     is_organization_admin,
     is_organization_admin_for_organization,
@@ -169,3 +170,29 @@ class RulesTests(TestCase):
         outsider = User.objects.create(username="outsider")
         self.assertFalse(rules.has_perm("organizationcontacts.change_organizationcontact", outsider, self.org_contact))
         self.assertFalse(rules.has_perm("organizationcontacts.delete_organizationcontact", outsider, self.org_contact))
+
+    def test_membership_is_looked_up_once_per_user_instance(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_administered_organization_id(self.user), self.org.id)
+            self.assertTrue(rules.has_perm("events.add_event", self.user))
+            self.assertTrue(rules.has_perm("events.change_event", self.user, self.event_same_org))
+            self.assertFalse(rules.has_perm("events.delete_event", self.user, self.event_other_org))
+            self.assertTrue(rules.has_perm("organizations.change_organization", self.user, self.org))
+            self.assertFalse(rules.has_perm("organizationcontacts.change_organizationcontact", self.user, self.other_org_contact))
+
+    def test_non_admin_membership_is_memoized(self):
+        outsider = User.objects.create(username="memo_outsider")
+        with self.assertNumQueries(1):
+            self.assertFalse(is_organization_admin(outsider))
+            self.assertFalse(is_organization_admin_for_organization(outsider, self.org))
+
+    def test_anonymous_user_makes_no_queries(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(is_organization_admin(AnonymousUser()))
+            self.assertFalse(rules.has_perm("events.change_event", AnonymousUser(), self.event_same_org))
+
+    def test_new_user_instance_looks_up_membership_again(self):
+        get_administered_organization_id(self.user)
+        self.admin_link.organization = self.other_org
+        self.admin_link.save()
+        self.assertEqual(get_administered_organization_id(User.objects.get(pk=self.user.pk)), self.other_org.id)
@@ -0,0 +1,122 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Event, EventOccurrenceException, EventRecurrence, Organization, RecurrenceFrequency
+from core.recurrence import has_series
+from core.search import HIGHLIGHT_START, HIGHLIGHT_STOP, highlight, search_events, search_organizations
+
+
+class SearchVectorTriggerTests(TestCase):
+    """
+    Test class for the trigger maintained search_vector columns.
+    """
+
+    def setUp(self):
+        self.org = Organization.objects.create(name="Ogden Food Bank", about="We sort donated groceries.")
+        self.event = Event.objects.create(
+            title="Pantry Shift",
+            organization=self.org,
+            date=date.today(),
+            start_time="10:00",
+            description="Stock shelves and greet neighbors.",
+        )
+
+    def test_vector_is_set_on_insert(self):
+        self.assertTrue(Event.objects.filter(pk=self.event.pk, search_vector="shelves").exists())
+        self.assertTrue(Organization.objects.filter(pk=self.org.pk, search_vector="groceries").exists())
+
+    def test_vector_follows_model_save(self):
+        self.event.description = "Pack weekend meal kits."
+        self.event.save()
+        self.assertFalse(Event.objects.filter(pk=self.event.pk, search_vector="shelves").exists())
+        self.assertTrue(Event.objects.filter(pk=self.event.pk, search_vector="kits").exists())
+
+    def test_vector_follows_queryset_update(self):
+        Organization.objects.filter(pk=self.org.pk).update(name="Ogden Clothing Closet")
+        self.assertTrue(Organization.objects.filter(pk=self.org.pk, search_vector="clothing").exists())
+
+
+class SearchTests(TestCase):
+    """
+    Test class for the ranked and highlighted search functions.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Trail Friends", about="We maintain hiking trails in the canyon.")
+        Organization.objects.create(name="Book Club", about="Reading together.")
+        today = date.today()
+        Event.objects.create(
+            title="Trail Cleanup",
+            organization=self.org,
+            date=today + relativedelta(days=5),
+            start_time="09:00",
+            description="Pick up litter along the river.",
+        )
+        Event.objects.create(
+            title="Canyon Hike Prep",
+            organization=self.org,
+            date=today + relativedelta(days=1),
+            start_time="09:00",
+            description="Clear brush from the trail head.",
+        )
+        Event.objects.create(
+            title="Past Trail Day",
+            organization=self.org,
+            date=today - relativedelta(days=30),
+            start_time="09:00",
+        )
+
+    def test_search_events_ranks_title_matches_first(self):
+        titles = [event.title for event in search_events("trail")]
+        self.assertEqual(titles, ["Trail Cleanup", "Canyon Hike Prep"])
+
+    def test_search_events_excludes_past_events(self):
+        self.assertEqual(search_events("past"), [])
+
+    def test_search_events_highlights_snippets(self):
+        event = search_events("litter")[0]
+        self.assertEqual(event.description_snippet, "Pick up <mark>litter</mark> along the river.")
+        self.assertEqual(event.title_snippet, "Trail Cleanup")
+
+    def test_search_events_stems_and_supports_websearch_syntax(self):
+        self.assertEqual([event.title for event in search_events("cleanups")], ["Trail Cleanup"])
+        self.assertEqual([event.title for event in search_events("trail -litter")], ["Canyon Hike Prep"])
+
+    def test_search_events_runs_one_query(self):
+        has_series()
+        with self.assertNumQueries(1):
+            events = search_events("trail")
+            [event.organization.name for event in events]
+
+    def test_search_events_lists_next_occurrence_of_series_started_before_today(self):
+        today = date.today()
+        series = Event.objects.create(
+            title="Weekly Trail Patrol", organization=self.org, date=today - relativedelta(days=6), start_time="08:00"
+        )
+        recurrence = EventRecurrence.objects.create(event=series, frequency=RecurrenceFrequency.WEEKLY)
+        EventOccurrenceException.objects.create(recurrence=recurrence, date=today + relativedelta(days=1))
+
+        events = search_events("patrol")
+        self.assertEqual([(event.id, event.date, event.is_occurrence) for event in events], [(series.id, today + relativedelta(days=8), True)])
+        self.assertEqual(events[0].title_snippet, "Weekly Trail <mark>Patrol</mark>")
+
+        # merged into the ranked results, once per series
+        self.assertEqual([event.title for event in search_events("trail")], ["Trail Cleanup", "Weekly Trail Patrol", "Canyon Hike Prep"])
+
+        # the stored events, then the series and their exceptions
+        with self.assertNumQueries(3):
+            search_events("trail")
+
+    def test_search_organizations(self):
+        organizations = search_organizations("hiking")
+        self.assertEqual([org.name for org in organizations], ["Trail Friends"])
+        self.assertIn("<mark>hiking</mark>", organizations[0].about_snippet)
+
+    def test_highlight_escapes_html(self):
+        snippet = f"<script>{HIGHLIGHT_START}alert{HIGHLIGHT_STOP}</script>"
+        self.assertEqual(highlight(snippet), "&lt;script&gt;<mark>alert</mark>&lt;/script&gt;")
+        self.assertEqual(highlight(None), "")
@@ -1,11 +1,17 @@
+import datetime
+import re
+
+from django.template import engines
 from django.test import SimpleTestCase
+from benchmarks.event_cards import FILTER_BADGES_TEMPLATE, build_events
 from core.templatetags.enum_tags import (
+    event_badges,
     event_descriptor_label,
     event_location_descriptor_label,
     time_of_day_label,
 )
 from core.templatetags.dict_tags import index_dict
-from core.models import EventDescriptors, EventLocationDescriptors, TimeOfDay
+from core.models import Event, EventDescriptors, EventLocationDescriptors, TimeOfDay, get_time_of_day_mask
 
 class EnumTagsTests(SimpleTestCase):
     """
@@ -40,6 +46,28 @@ class EnumTagsTests(SimpleTestCase):
         invalid_value = "INVALID_TIME"
         self.assertEqual(time_of_day_label(invalid_value), invalid_value)
 
+    def test_event_badges_match_label_filters(self):
+        events = build_events(200)
+        filter_badges = engines["django"].from_string(FILTER_BADGES_TEMPLATE)
+        for event in events:
+            expected = filter_badges.render({"events": [event]})
+            # whitespace between badges renders the same
+            self.assertEqual(str(event_badges(event)).split(), expected.split())
+
+    def test_event_badges_escape_unknown_values(self):
+        event = Event(
+            event_descriptor_tags=["<b>OLD</b>", EventDescriptors.MOVING],
+            location_descriptor_tags=[],
+            time_of_day_mask=get_time_of_day_mask(datetime.time(9), datetime.time(10)),
+        )
+        badges = event_badges(event)
+        self.assertIn("&lt;b&gt;OLD&lt;/b&gt;", badges)
+        self.assertIn(EventDescriptors.MOVING.label, badges)
+        self.assertEqual(len(re.findall("bg-wv-pink", badges)), len(event.time_of_day()))
+
+        event = Event(event_descriptor_tags=[], location_descriptor_tags=[], time_of_day_mask=0)
+        self.assertEqual(event_badges(event), "")
+
 
 class DictTagsTests(SimpleTestCase):
     def test_index_dict_with_valid_key(self):
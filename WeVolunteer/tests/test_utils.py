@@ -1,5 +1,6 @@
-from django.test import SimpleTestCase
-from django.http import HttpResponse
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
 from unittest.mock import patch, MagicMock
 from datastar_py.consts import ElementPatchMode
 
@@ -7,6 +8,8 @@ from WeVolunteer.utils import (
     respond_via_sse,
     patch_signals_respond_via_sse,
     remove_respond_via_sse,
+    stream_respond_via_sse,
+    allow_shared_caching,
 )
 
 
@@ -73,6 +76,73 @@ class RespondViaSseTests(SimpleTestCase):
         mock_patch_signals.assert_called_once_with({"state": "active"})
 
 
+class StreamRespondViaSseTests(SimpleTestCase):
+    """
+    Test class for the streamed SSE response util function.
+    """
+
+    def test_stream_sends_signals_then_patches_then_url(self):
+        response = stream_respond_via_sse(
+            [("<div>one</div>", "#list", ElementPatchMode.APPEND), ("<div>two</div>", None, None)],
+            signals={"state": "active"},
+            url="/updated/url",
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(response["X-Accel-Buffering"], "no")
+
+        events = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(events), 4)
+        self.assertIn('{"state":"active"}', events[0])
+        self.assertIn("selector #list", events[1])
+        self.assertIn("mode append", events[1])
+        self.assertIn("<div>one</div>", events[1])
+        self.assertIn("<div>two</div>", events[2])
+        self.assertIn("/updated/url", events[3])
+
+    def test_stream_consumes_patches_lazily(self):
+        rendered = []
+
+        def patches():
+            for html in ["<p>a</p>", "<p>b</p>"]:
+                rendered.append(html)
+                yield html, None, None
+
+        response = stream_respond_via_sse(patches())
+        self.assertEqual(rendered, [])
+        stream = iter(response.streaming_content)
+        self.assertIn("<p>a</p>", next(stream).decode())
+        self.assertEqual(rendered, ["<p>a</p>"])
+
+    def test_stream_asynchronous(self):
+        rendered = []
+
+        def patches():
+            for html in ["<p>a</p>", "<p>b</p>"]:
+                rendered.append(html)
+                yield html, "#list", ElementPatchMode.APPEND
+
+        async def read(response):
+            events = []
+            async for chunk in response.streaming_content:
+                events.append((chunk.decode(), list(rendered)))
+            return events
+
+        response = stream_respond_via_sse(patches(), signals={"state": "active"}, asynchronous=True)
+        self.assertTrue(response.is_async)
+        events = async_to_sync(read)(response)
+        self.assertEqual(len(events), 3)
+        self.assertIn("datastar-patch-signals", events[0][0])
+        self.assertIn("<p>a</p>", events[1][0])
+        # still rendered one patch at a time
+        self.assertEqual(events[1][1], ["<p>a</p>"])
+        self.assertIn("<p>b</p>", events[2][0])
+
+    def test_stream_is_sync_by_default(self):
+        self.assertFalse(stream_respond_via_sse([("<p>a</p>", None, None)]).is_async)
+
+
 class PatchSignalsRespondViaSseTests(SimpleTestCase):
     """
     Test class for the patch signals via SSE util function.
@@ -106,3 +176,27 @@ class RemoveRespondViaSseTests(SimpleTestCase):
         self.assertEqual(response["Content-Type"], "text/event-stream")
         self.assertEqual(response["Cache-Control"], "no-cache")
         self.assertIn("removed_string", response.content.decode())
+
+
+class AllowSharedCachingTests(SimpleTestCase):
+    """
+    Test class for the opt-in shared cache TTL of SSE responses.
+    """
+
+    @override_settings(SSE_SHARED_CACHE_SECONDS=30)
+    def test_anonymous_response_is_public(self):
+        response = allow_shared_caching(patch_signals_respond_via_sse({"item": 1}), RequestFactory().get("/"))
+        self.assertEqual(response["Cache-Control"], "public, max-age=0, s-maxage=30")
+        self.assertEqual(response["Vary"], "Cookie")
+
+    @override_settings(SSE_SHARED_CACHE_SECONDS=30)
+    def test_session_response_is_not_shared(self):
+        request = RequestFactory().get("/")
+        request.COOKIES["sessionid"] = "abc"
+        response = allow_shared_caching(patch_signals_respond_via_sse({"item": 1}), request)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_disabled_by_default(self):
+        response = allow_shared_caching(patch_signals_respond_via_sse({"item": 1}), RequestFactory().get("/"))
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(allow_shared_caching(response, RequestFactory().get("/"), seconds=10)["Cache-Control"], "public, max-age=0, s-maxage=10")
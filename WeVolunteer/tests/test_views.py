@@ -1,18 +1,32 @@
 import json
 from datetime import datetime, date
 
+from asgiref.sync import async_to_sync
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
 from django.core.exceptions import BadRequest
-from django.test import TestCase, Client, RequestFactory
-from django.contrib.auth.models import User
-from django.http import Http404
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
 from unittest.mock import patch
 
-from core.models import Event, Organization, OrganizationAdministrator, OrganizationContact
+from core.cursors import decode_event_cursor, decode_month_cursor, encode_month_cursor
+from core.models import Event, EventDescriptors, Organization, OrganizationAdministrator, OrganizationContact
+from core.recurrence import has_series
 from core.views import (
+    aget_past_events_page,
+    STREAMED_EVENTS_CHUNK_SIZE,
+    get_events_by_month,
     get_events_by_month_and_year,
+    get_monthly_events,
+    get_past_events_page,
     about,
+    search_results_as_sse,
+    events_filter_as_sse,
     events_get_next_month_events_as_sse,
     event_details,
     event_add,
@@ -21,18 +35,86 @@ from core.views import (
 )
 from datastar_py.consts import ElementPatchMode
 
+
+def read_stream(response) -> list[bytes]:
+    """
+    Read every chunk of a StreamingHttpResponse, which streams an async iterator when the request came from ASGI.
+    """
+
+    async def read():
+        return [chunk async for chunk in response.streaming_content]
+
+    return async_to_sync(read)() if response.is_async else list(response.streaming_content)
+
+
 class MiscViewsTests(TestCase):
     def test_about_view_renders(self):
         response = about(RequestFactory().get("/about/"))
         self.assertEqual(response.status_code, 200)
 
 
+class SearchViewsTests(TestCase):
+    """
+    Test class for the search views.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Garden Club", about="Community <b>gardens</b>.")
+        Event.objects.create(
+            title="Garden Weeding", organization=self.org, date=date.today() + relativedelta(days=1), start_time="10:00"
+        )
+
+    def test_search_view_without_query(self):
+        response = Client().get("/search/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["events"], [])
+        self.assertNotContains(response, "No upcoming events match")
+
+    def test_search_view_with_query(self):
+        response = Client().get("/search/", {"q": "garden"})
+        self.assertContains(response, "<mark>Garden</mark> Weeding", html=False)
+        self.assertContains(response, "<mark>gardens</mark>", html=False)
+        self.assertNotContains(response, "<b>", html=False)
+
+    @patch("core.views.respond_via_sse")
+    def test_search_results_as_sse(self, mock_respond_via_sse):
+        request = RequestFactory().get("search/results", {"datastar": json.dumps({"search_query": " weeding "})})
+        has_series()
+        with self.assertNumQueries(2):
+            search_results_as_sse(request)
+
+        called_args, called_kwargs = mock_respond_via_sse.call_args
+        html = called_args[0].content.decode()
+        self.assertIn('id="search-results"', html)
+        self.assertIn("<mark>Weeding</mark>", html)
+        self.assertIn("No organizations match", html)
+        self.assertEqual(called_kwargs["url"], "/search/?q=weeding")
+        self.assertEqual(called_kwargs["signals"], {"search_error": False})
+
+    @patch("core.views.respond_via_sse")
+    def test_search_results_as_sse_empty_query(self, mock_respond_via_sse):
+        request = RequestFactory().get("search/results", {"datastar": json.dumps({"search_query": ""})})
+        with self.assertNumQueries(0):
+            search_results_as_sse(request)
+        self.assertEqual(mock_respond_via_sse.call_args[1]["url"], "/search/")
+
+    @patch("core.views.patch_signals_respond_via_sse")
+    def test_search_results_as_sse_bad_datastar(self, mock_patch_signals):
+        search_results_as_sse(RequestFactory().get("search/results"))
+        mock_patch_signals.assert_called_with({"search_error": True})
+
+
 class EventViewsTests(TestCase):
     """
     Test class for the Event related core views.
     """
 
     def setUp(self):
+        cache.clear()
+        # the series count is loaded once per series version, like the version keys
+        has_series()
+
         # create user, organization, and admin links
         self.org = Organization.objects.create(name="Org")
         self.user = User.objects.create_user(username="john", password="password")
@@ -65,49 +147,265 @@ class EventViewsTests(TestCase):
         qs = get_events_by_month_and_year(month_year)
         self.assertEqual(list(qs.values_list("title", flat=True)), ["Oct Event"])
 
+    def test_get_monthly_events_groups_by_month(self):
+        today = date.today()
+        monthly_events = get_monthly_events(today, 3)
+
+        self.assertEqual(len(monthly_events), 3)
+        month_lists = list(monthly_events.values())
+        self.assertEqual([event.title for event in month_lists[0]], ["Oct Event"])
+        self.assertEqual([event.title for event in month_lists[1]], ["Nov Event"])
+        self.assertEqual(month_lists[2], [])
+
+    def test_get_monthly_events_excludes_days_before_start_date(self):
+        today = date.today()
+        Event.objects.create(
+            title="Yesterday Event",
+            organization=self.org,
+            date=today - relativedelta(days=1),
+            start_time="10:00",
+        )
+        titles = [event.title for event_list in get_monthly_events(today, 3).values() for event in event_list]
+        self.assertNotIn("Yesterday Event", titles)
+
+    def test_get_events_by_month_applies_cutoff_to_its_month_only(self):
+        month = date.today().replace(day=1) + relativedelta(months=+4)
+        next_month = month + relativedelta(months=+1)
+        for day in (2, 20):
+            Event.objects.create(title=f"Day {day}", organization=self.org, date=month.replace(day=day), start_time="10:00")
+            Event.objects.create(title=f"Next Day {day}", organization=self.org, date=next_month.replace(day=day), start_time="10:00")
+
+        with self.assertNumQueries(1):
+            events_by_month = get_events_by_month([month, next_month], month.replace(day=10))
+        self.assertEqual([event.title for event in events_by_month[month]], ["Day 20"])
+        self.assertEqual([event.title for event in events_by_month[next_month]], ["Next Day 2", "Next Day 20"])
+
     def test_events_view_renders_and_monthly_events(self):
         client = Client()
         response = client.get("")
         self.assertEqual(response.status_code, 200)
-        self.assertIn("monthly_events", response.context)
-        self.assertEqual(len(response.context["monthly_events"]), 3)
+        now = timezone.now().date().replace(day=1)
+        for i in range(3):
+            month = now + relativedelta(months=+i)
+            self.assertIn(f"{month.strftime('%B')} {month.year}", response.context["monthly_event_list_html"])
+        self.assertContains(response, "Nov Event")
+        self.assertEqual(
+            decode_month_cursor(response.context["next_month_cursor"]),
+            date.today().replace(day=1) + relativedelta(months=+3),
+        )
+
+    def test_events_view_query_count_does_not_grow_with_events(self):
+        client = Client()
+        client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as few_events_queries:
+            client.get("")
+
+        today = timezone.now().date()
+        for i in range(10):
+            contact = OrganizationContact.objects.create(organization=self.org, name=f"contact {i}")
+            Event.objects.create(
+                title=f"Extra Event {i}",
+                organization=self.org,
+                primary_contact=contact,
+                date=today + relativedelta(months=+(i % 3)),
+                start_time="10:00",
+            )
+
+        with CaptureQueriesContext(connection) as many_events_queries:
+            response = client.get("")
+
+        self.assertContains(response, "Extra Event 9")
+        self.assertEqual(len(many_events_queries), len(few_events_queries))
+
+    def test_events_view_renders_facets(self):
+        response = Client().get("")
+        self.assertContains(response, 'id="event-facets"')
+        self.assertContains(response, 'id="event-feed"')
+        self.assertEqual(len(response.context["facets"]), 3)
+
+    @patch("core.views.respond_via_sse")
+    def test_events_filter_sse_filters_feed_and_resets_cursor(self, mock_respond_via_sse):
+        Event.objects.filter(title="Nov Event").update(event_descriptor_tags=[EventDescriptors.PAINTING])
+        request = RequestFactory().get(
+            "events/filter",
+            {"datastar": json.dumps({"filter_event_descriptors": ["PAINTING"], "next_month_cursor": "stale"})},
+        )
+        request.user = AnonymousUser()
+
+        # facet counts, the filtered month window, and nothing else
+        with self.assertNumQueries(2):
+            events_filter_as_sse(request)
+
+        called_args, called_kwargs = mock_respond_via_sse.call_args
+        html = called_args[0].content.decode()
+        self.assertIn('id="event-facets"', html)
+        self.assertIn('id="event-feed"', html)
+        self.assertIn("Nov Event", html)
+        self.assertNotIn("Oct Event", html)
+        self.assertIsNone(called_kwargs.get('selector'))
+        self.assertEqual(called_kwargs['signals']['more_events'], True)
+        self.assertEqual(
+            decode_month_cursor(called_kwargs['signals']['next_month_cursor']),
+            date.today().replace(day=1) + relativedelta(months=+3),
+        )
+
+    @patch("core.views.patch_signals_respond_via_sse")
+    def test_events_filter_sse_bad_filter(self, mock_patch_signals):
+        request = RequestFactory().get("events/filter", {"datastar": json.dumps({"filter_times_of_day": ["NOON"]})})
+        events_filter_as_sse(request)
+        called_args, called_kwargs = mock_patch_signals.call_args
+        self.assertEqual(called_args[0]['next_month_events_error'], True)
+
+    @patch("core.views.patch_signals_respond_via_sse")
+    def test_get_next_month_events_sse_applies_filters(self, mock_patch_signals):
+        # the only event after the cursor does not match the filter
+        req_dict = {
+            "next_month_cursor": encode_month_cursor(date.today() + relativedelta(months=+1)),
+            "filter_event_descriptors": ["PAINTING"],
+        }
+        request = RequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        request.user = AnonymousUser()
+        async_to_sync(events_get_next_month_events_as_sse)(request)
+        called_args, called_kwargs = mock_patch_signals.call_args
+        self.assertEqual(called_args[0]['more_events'], False)
 
     @patch("core.views.respond_via_sse")
     def test_get_next_month_events_sse_success(self, mock_respond_via_sse):
         respond_sse_msg = "respond via sse called"
         mock_respond_via_sse.return_value = respond_sse_msg
 
-        today = timezone.now().date()
-        req_dict = {"current_month": today.month, "current_year": today.year}
+        today = date.today()
+        req_dict = {"next_month_cursor": encode_month_cursor(today)}
         request = RequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        request.user = AnonymousUser()
 
         # respond_via_sse should be called when there are events
-        response = events_get_next_month_events_as_sse(request)
+        response = async_to_sync(events_get_next_month_events_as_sse)(request)
         called_args, called_kwargs = mock_respond_via_sse.call_args
-        next_date = today + relativedelta(months=+1)
+        next_date = today.replace(day=1) + relativedelta(months=+1)
 
         mock_respond_via_sse.assert_called()
         self.assertEqual(response, respond_sse_msg)
-        self.assertEqual(called_kwargs['signals']['current_month'], next_date.month)
-        self.assertEqual(called_kwargs['signals']['current_year'], next_date.year)
+        self.assertEqual(decode_month_cursor(called_kwargs['signals']['next_month_cursor']), next_date)
         self.assertEqual(called_kwargs['selector'], '#appended-monthly-event-list')
         self.assertEqual(called_kwargs['patch_mode'], ElementPatchMode.APPEND)
 
+    def test_get_next_month_events_sse_skips_empty_months(self):
+        far_month = date.today().replace(day=1) + relativedelta(months=+7)
+        Event.objects.create(
+            title="Far Event",
+            organization=self.org,
+            date=far_month.replace(day=15),
+            start_time="10:00",
+            event_descriptor_tags=[EventDescriptors.PAINTING],
+        )
+
+        # cursor points past the Nov Event, so the months in between are empty
+        cursor = encode_month_cursor(date.today() + relativedelta(months=+2))
+        req_dict = {"next_month_cursor": cursor, "filter_event_descriptors": ["PAINTING"]}
+        request = RequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        request.user = AnonymousUser()
+
+        with self.assertNumQueries(1):
+            response = async_to_sync(events_get_next_month_events_as_sse)(request)
+            content = b"".join(read_stream(response)).decode()
+
+        self.assertIn(f"{far_month.strftime('%B')} {far_month.year}", content)
+        self.assertIn("Far Event", content)
+        self.assertIn(encode_month_cursor(far_month + relativedelta(months=+1)), content)
+
+    def test_get_next_month_events_sse_streams_filtered_month_in_chunks(self):
+        month = date.today().replace(day=1) + relativedelta(months=+7)
+        for i in range(STREAMED_EVENTS_CHUNK_SIZE + 1):
+            Event.objects.create(
+                title=f"Streamed Event {i}",
+                organization=self.org,
+                date=month.replace(day=15),
+                start_time="10:00",
+                event_descriptor_tags=[EventDescriptors.PAINTING],
+            )
+        cursor = encode_month_cursor(month)
+        req_dict = {"next_month_cursor": cursor, "filter_event_descriptors": ["PAINTING"]}
+        request = RequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        request.user = AnonymousUser()
+
+        response = async_to_sync(events_get_next_month_events_as_sse)(request)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        # a WSGI request gets a sync iterator, which Django streams without buffering
+        self.assertFalse(response.is_async)
+        events = [chunk.decode() for chunk in read_stream(response)]
+
+        # signals first, then the empty month, then two chunks of cards appended into it
+        self.assertEqual(len(events), 4)
+        self.assertIn("datastar-patch-signals", events[0])
+        self.assertIn("selector #appended-monthly-event-list", events[1])
+        self.assertIn(f'id="month-events-{month:%Y-%m}"', events[1])
+        self.assertEqual(events[2].count("Streamed Event"), STREAMED_EVENTS_CHUNK_SIZE)
+        self.assertIn(f"selector #month-events-{month:%Y-%m}", events[3])
+        self.assertEqual(events[3].count("Streamed Event"), 1)
+
+        # and an ASGI request the same events from an async iterator
+        request = AsyncRequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        request.user = AnonymousUser()
+        response = async_to_sync(events_get_next_month_events_as_sse)(request)
+        self.assertTrue(response.is_async)
+        self.assertEqual([chunk.decode() for chunk in read_stream(response)], events)
+
+    @patch("core.views.respond_via_sse")
+    def test_get_next_month_events_sse_uses_month_cache(self, mock_respond_via_sse):
+        far_month = date.today().replace(day=1) + relativedelta(months=+7)
+        far_event = Event.objects.create(title="Far Event", organization=self.org, date=far_month.replace(day=15), start_time="10:00")
+
+        cursor = encode_month_cursor(date.today() + relativedelta(months=+2))
+        request = RequestFactory().get("events/get_next_month", {"datastar": json.dumps({"next_month_cursor": cursor})})
+        request.user = AnonymousUser()
+
+        # find the month, then load it
+        with self.assertNumQueries(2):
+            async_to_sync(events_get_next_month_events_as_sse)(request)
+        self.assertIn("Far Event", mock_respond_via_sse.call_args[0][0].content.decode())
+
+        # only find the month
+        with self.assertNumQueries(1):
+            async_to_sync(events_get_next_month_events_as_sse)(request)
+        self.assertIn("Far Event", mock_respond_via_sse.call_args[0][0].content.decode())
+
+        # saving an event in the month invalidates it
+        far_event.title = "Renamed Far Event"
+        far_event.save()
+        async_to_sync(events_get_next_month_events_as_sse)(request)
+        self.assertIn("Renamed Far Event", mock_respond_via_sse.call_args[0][0].content.decode())
 
     @patch("core.views.patch_signals_respond_via_sse")
     def test_get_next_month_events_sse_calls_patch_signals_when_no_more_events(self, mock_patch_signals):
         patch_msg = "patch signals called"
         mock_patch_signals.return_value = patch_msg
 
-        req_dict = {"current_month": 1, "current_year": 9999}
+        req_dict = {"next_month_cursor": encode_month_cursor(date(9999, 1, 1))}
         no_event_req = RequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        no_event_req.user = AnonymousUser()
 
         # no more events triggers patch_signals_respond_via_sse
-        result = events_get_next_month_events_as_sse(no_event_req)
+        result = async_to_sync(events_get_next_month_events_as_sse)(no_event_req)
         self.assertEqual(result, patch_msg)
         called_args, called_kwargs = mock_patch_signals.call_args
         self.assertEqual(called_args[0]['more_events'], False)
 
+    @patch("core.views.patch_signals_respond_via_sse")
+    def test_get_next_month_events_sse_calls_patch_signals_when_bad_cursor(self, mock_patch_signals):
+        patch_msg = "patch signals called"
+        mock_patch_signals.return_value = patch_msg
+
+        req_dict = {"next_month_cursor": "not-a-cursor"}
+        bad_req = RequestFactory().get("events/get_next_month", {"datastar": json.dumps(req_dict)})
+        bad_req.user = AnonymousUser()
+
+        result = async_to_sync(events_get_next_month_events_as_sse)(bad_req)
+        self.assertEqual(result, patch_msg)
+        called_args, called_kwargs = mock_patch_signals.call_args
+        self.assertEqual(called_args[0]['next_month_events_error'], True)
+
     @patch("core.views.patch_signals_respond_via_sse")
     def test_get_next_month_events_sse_calls_patch_signals_when_no_datastar_dict(self, mock_patch_signals):
         patch_msg = "patch signals called"
@@ -115,7 +413,8 @@ class EventViewsTests(TestCase):
 
         # missing datastar triggers patch_signals_respond_via_sse
         bad_req = RequestFactory().get("events/get_next_month")
-        result = events_get_next_month_events_as_sse(bad_req)
+        bad_req.user = AnonymousUser()
+        result = async_to_sync(events_get_next_month_events_as_sse)(bad_req)
         self.assertEqual(result, patch_msg)
         mock_patch_signals.assert_called()
         called_args, called_kwargs = mock_patch_signals.call_args
@@ -130,6 +429,18 @@ class EventViewsTests(TestCase):
         self.assertIn("event", response.context)
         self.assertEqual(response.context["contact_event_count"], 1)
 
+    def test_event_details_permission_checks_share_one_membership_query(self):
+        client = Client()
+        client.force_login(self.user)
+        event = Event.objects.get(title="Oct Event")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f"/events/{event.id}")
+
+        self.assertContains(response, reverse("core:event-edit", args=[event.id]))
+        membership_queries = [q for q in queries if "core_organizationadministrator" in q["sql"]]
+        self.assertEqual(len(membership_queries), 1)
+
     def test_event_details_not_found(self):
         request = RequestFactory().get("/events/9999")
         with self.assertRaises(Http404):
@@ -167,7 +478,7 @@ class EventViewsTests(TestCase):
         request.user = self.user
         with patch("core.views.EventForm") as mock_event_form:
             event_edit(request, event_id=event.id)
-            mock_event_form.assert_called_with(instance=event, user=self.user)
+            mock_event_form.assert_called_with(instance=event, organization_id=self.org.id)
 
         self.assertTrue(mock_render.called)
 
@@ -224,6 +535,9 @@ class OrganizationViewsTests(TestCase):
     Test class for the Organization related core views.
     """
     def setUp(self):
+        cache.clear()
+        # the series count is loaded once per series version, like the version keys
+        has_series()
         self.org = Organization.objects.create(name="Test Org")
         self.user = User.objects.create_user(username="admin", password="password")
         OrganizationAdministrator.objects.create(user=self.user, organization=self.org)
@@ -239,12 +553,40 @@ class OrganizationViewsTests(TestCase):
         response = Client().get("/organizations/")
         self.assertEqual(response.status_code, 200)
         self.assertIn("org_list", response.context)
-        self.assertIn("org_event_counts", response.context)
+        self.assertIn("page_obj", response.context)
         self.assertIn(self.org, response.context["org_list"])
-        self.assertEqual(
-            response.context["org_event_counts"][self.org.id],
-            2  # only 2 upcoming events count
-        )
+        org = list(response.context["org_list"])[0]
+        self.assertEqual(org.upcoming_events_count, 2)  # only 2 upcoming events count
+        self.assertContains(response, "2 Upcoming Events")
+
+    def test_organizations_view_query_count_does_not_grow_with_organizations(self):
+        client = Client()
+        with CaptureQueriesContext(connection) as one_org_queries:
+            client.get("/organizations/")
+
+        today = timezone.now().date()
+        for i in range(5):
+            org = Organization.objects.create(name=f"Another Org {i}")
+            Event.objects.create(title=f"Another Event {i}", organization=org, date=today, start_time="10:00")
+
+        with CaptureQueriesContext(connection) as many_org_queries:
+            response = client.get("/organizations/")
+
+        self.assertEqual(len(list(response.context["org_list"])), 6)
+        self.assertEqual(len(many_org_queries), len(one_org_queries))
+
+    @patch("core.views.ORGANIZATIONS_PER_PAGE", 2)
+    def test_organizations_view_paginates(self):
+        for name in ["B Org", "C Org"]:
+            Organization.objects.create(name=name)
+
+        first_page = Client().get("/organizations/")
+        self.assertEqual([org.name for org in first_page.context["org_list"]], ["B Org", "C Org"])
+        self.assertTrue(first_page.context["page_obj"].has_next())
+
+        second_page = Client().get("/organizations/", {"page": 2})
+        self.assertEqual([org.name for org in second_page.context["org_list"]], ["Test Org"])
+        self.assertEqual(second_page.context["org_list"][0].upcoming_events_count, 2)
 
     def test_organization_details_view_success(self):
         response = Client().get(f"/organizations/{self.org.id}")
@@ -252,72 +594,124 @@ class OrganizationViewsTests(TestCase):
         self.assertEqual(response.context["org"], self.org)
         self.assertEqual(len(list(response.context["upcoming_events"])), 2)
         self.assertEqual(len(list(response.context["past_events"])), 3)  # max 3 past events shown
-        self.assertEqual(response.context["past_events_count"], 3)
-        self.assertEqual(len(response.context["past_events_shown"]), 3)
+        self.assertEqual(decode_event_cursor(response.context["past_events_cursor"])[2], "Past 2")
 
     def test_organization_details_view_404(self):
         request = RequestFactory().get("/organizations/9999")
         with self.assertRaises(Http404):
             organization_details(request, 9999)
 
-    @patch("core.views.render")
+    def test_get_past_events_page_walks_all_pages_in_order(self):
+        first_page, cursor = get_past_events_page(self.org)
+        self.assertEqual([event.title for event in first_page], ["Past 0", "Past 1", "Past 2"])
+        self.assertIsNotNone(cursor)
+
+        second_page, cursor = get_past_events_page(self.org, after=decode_event_cursor(cursor))
+        self.assertEqual([event.title for event in second_page], ["Past 3"])
+        self.assertIsNone(cursor)
+
+    def test_get_past_events_page_breaks_ties_on_id(self):
+        duplicate = Event.objects.create(
+            title="Past 3", organization=self.org, date=timezone.now().date().replace(day=1),
+            start_time="09:00", end_time="10:00",
+        )
+        first_page, cursor = get_past_events_page(self.org)
+        second_page, cursor = get_past_events_page(self.org, after=decode_event_cursor(cursor))
+
+        self.assertEqual([event.title for event in second_page], ["Past 3", "Past 3"])
+        self.assertEqual(second_page[1], duplicate)
+        self.assertIsNone(cursor)
+
+    def test_get_past_events_page_query_count_does_not_grow_with_pages(self):
+        for i in range(4, 12):
+            Event.objects.create(
+                title=f"Past {i:02}", organization=self.org, date=timezone.now().date().replace(day=1),
+                start_time="09:00", end_time="10:00",
+            )
+
+        after = None
+        while True:
+            with self.assertNumQueries(1):
+                past_events, cursor = get_past_events_page(self.org, after=after)
+            if cursor is None:
+                break
+            after = decode_event_cursor(cursor)
+
+    @patch("core.views.render_to_string", return_value="")
     @patch("core.views.respond_via_sse")
     def test_organization_details_get_next_past_events_as_sse_success(self, mock_respond_sse, mock_render):
         mock_respond_sse.return_value = "sse_response"
-        past_events_count = 2
-        past_events_shown = []
+        first_page, cursor = get_past_events_page(self.org)
 
-        qdict = {
-            "past_events_count": past_events_count,
-            "past_events_shown": past_events_shown
-        }
+        qdict = {"past_events_cursor": cursor}
         request = RequestFactory().get(f"/organizations/{self.org.id}/next_past_events", {"datastar": json.dumps(qdict)})
 
-        response = organization_details_get_next_past_events_as_sse(request, self.org.id)
+        response = async_to_sync(organization_details_get_next_past_events_as_sse)(request, self.org.id)
 
         self.assertEqual(response, "sse_response")
         mock_render.assert_called_once()
         mock_respond_sse.assert_called_once()
 
+        render_context = mock_render.call_args[0][1]
+        self.assertEqual([event.title for event in render_context["event_list"]], ["Past 3"])
+
         called_args, called_kwargs = mock_respond_sse.call_args
         self.assertIn("signals", called_kwargs)
-        self.assertIn("past_events_shown", called_kwargs["signals"])
+        self.assertIn("past_events_cursor", called_kwargs["signals"])
         self.assertIn("selector", called_kwargs)
         self.assertEqual(called_kwargs["patch_mode"], ElementPatchMode.APPEND)
 
-    @patch("core.views.render")
+    async def test_organization_details_get_next_past_events_as_sse_async_client(self):
+        first_page, cursor = await aget_past_events_page(self.org.id)
+        response = await self.async_client.get(
+            reverse("core:get-next-past-events", args=[self.org.id]),
+            {"datastar": json.dumps({"past_events_cursor": cursor})},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertIn("Past 3", response.content.decode())
+
+    @patch("core.views.render_to_string", return_value="")
     @patch("core.views.respond_via_sse")
     def test_organization_details_get_next_past_events_as_sse_sends_more_events_false(self, mock_respond_sse, mock_render):
         mock_respond_sse.return_value = "sse_response"
-        past_events_count = 2
-        past_events_shown = list(Event.objects.filter(organization=self.org, date__lt=timezone.now().date()).values_list("pk", flat=True))
+        first_page, cursor = get_past_events_page(self.org)
 
-        qdict = {
-            "past_events_count": past_events_count,
-            "past_events_shown": past_events_shown
-        }
+        qdict = {"past_events_cursor": cursor}
         request = RequestFactory().get(f"/organizations/{self.org.id}/next_past_events",
                                        {"datastar": json.dumps(qdict)})
 
-        response = organization_details_get_next_past_events_as_sse(request, self.org.id)
+        response = async_to_sync(organization_details_get_next_past_events_as_sse)(request, self.org.id)
         self.assertEqual(response, "sse_response")
 
         called_args, called_kwargs = mock_respond_sse.call_args
         # more_events signal should be set to false
         self.assertFalse(called_kwargs["signals"]["more_events"])
+        self.assertEqual(called_kwargs["signals"]["past_events_cursor"], "")
+
+    @patch("core.views.patch_signals_respond_via_sse")
+    def test_organization_details_get_next_past_events_as_sse_bad_cursor(self, mock_patch_signals):
+        mock_patch_signals.return_value = "patch_called"
+        qdict = {"past_events_cursor": "not-a-cursor"}
+        request = RequestFactory().get(f"/organizations/{self.org.id}/next_past_events", {"datastar": json.dumps(qdict)})
+
+        response = async_to_sync(organization_details_get_next_past_events_as_sse)(request, self.org.id)
+        self.assertEqual(response, "patch_called")
+        args, kwargs = mock_patch_signals.call_args
+        self.assertTrue(args[0].get("past_events_error"))
 
     @patch("core.views.patch_signals_respond_via_sse")
     def test_organization_details_get_next_past_events_as_sse_no_org(self, mock_patch_signals):
         mock_patch_signals.return_value = "patch_called"
         request = RequestFactory().get("/organizations/9999/next_past_events", {"datastar": "{}"})
         with self.assertRaises(Http404):
-            organization_details_get_next_past_events_as_sse(request, 9999)
+            async_to_sync(organization_details_get_next_past_events_as_sse)(request, 9999)
 
     @patch("core.views.patch_signals_respond_via_sse")
     def test_organization_details_get_next_past_events_as_sse_bad_datastar(self, mock_patch_signals):
         mock_patch_signals.return_value = "patch_called"
         request = RequestFactory().get(f"/organizations/{self.org.id}/next_past_events")
-        response = organization_details_get_next_past_events_as_sse(request, self.org.id)
+        response = async_to_sync(organization_details_get_next_past_events_as_sse)(request, self.org.id)
         self.assertEqual(response, "patch_called")
         mock_patch_signals.assert_called_once()
         args, kwargs = mock_patch_signals.call_args
@@ -399,7 +793,7 @@ class OrganizationContactViewsTests(TestCase):
         mock_redirect.return_value = "redirected"
 
         response = organization_contact_add(request)
-        mock_form_class.assert_called_with(request.POST, user=self.user)
+        mock_form_class.assert_called_with(request.POST, organization_id=self.org.id)
         mock_form.is_valid.assert_called_once()
         mock_form.save.assert_called_once()
         mock_redirect.assert_called_with('core:org-details', self.org.id)
@@ -412,7 +806,7 @@ class OrganizationContactViewsTests(TestCase):
         request.user = self.user
 
         organization_contact_add(request)
-        mock_form_class.assert_called_with(user=self.user)
+        mock_form_class.assert_called_with(organization_id=self.org.id)
         mock_render.assert_called_once()
 
     @patch("core.views.redirect")
@@ -429,7 +823,7 @@ class OrganizationContactViewsTests(TestCase):
         mock_redirect.return_value = "redirected"
 
         response = organization_contact_edit(request, org_contact_id=contact.id)
-        mock_form_class.assert_called_with(request.POST, instance=contact, user=self.user)
+        mock_form_class.assert_called_with(request.POST, instance=contact, organization_id=self.org.id)
         mock_form.is_valid.assert_called_once()
         mock_form.save.assert_called_once()
         mock_redirect.assert_called_with('core:org-details', self.org.id)
@@ -443,7 +837,7 @@ class OrganizationContactViewsTests(TestCase):
         request.user = self.user
 
         organization_contact_edit(request, org_contact_id=contact.id)
-        mock_form_class.assert_called_with(instance=contact, user=self.user)
+        mock_form_class.assert_called_with(instance=contact, organization_id=self.org.id)
         mock_render.assert_called_once()
 
     def test_organization_contact_edit_not_found(self):